@@ -0,0 +1,66 @@
+"""
+Walker/Vose alias tables for O(1) weighted sampling.
+
+An AliasTable turns n weights into two length-n arrays once; every draw
+afterwards is one uniform column pick plus one biased coin flip, whatever
+the weights. When all weights are equal the coin always lands on the
+column itself, so the flip is skipped and a draw consumes exactly the
+random numbers of a plain uniform choice.
+"""
+
+import random
+from typing import Sequence
+
+import numpy as np
+
+
+class AliasTable:
+    def __init__(self, weights: Sequence[float]):
+        """
+        Build the table
+
+        Args:
+            weights: Non-negative weight per outcome (need not sum to 1)
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        n = len(weights)
+        if n == 0 or weights.sum() <= 0 or (weights < 0).any():
+            raise ValueError("AliasTable needs at least one positive weight and no negative weights")
+
+        scaled = weights * (n / weights.sum())
+        prob = np.ones(n, dtype=np.float64)
+        alias = np.arange(n, dtype=np.int32)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            lo, hi = small.pop(), large.pop()
+            prob[lo] = scaled[lo]
+            alias[lo] = hi
+            scaled[hi] -= 1.0 - scaled[lo]
+            (small if scaled[hi] < 1.0 else large).append(hi)
+        # Whatever is left over is 1 up to rounding error
+
+        self.prob = prob
+        self.alias = alias
+        self.uniform = bool((prob == 1.0).all())
+        self.prob_list = prob.tolist()  # Plain lists for the scalar path
+        self.alias_list = alias.tolist()
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """Draw size outcome indices"""
+        column = rng.integers(0, len(self.prob), size=size)
+        if self.uniform:
+            return column
+        coin = rng.random(size)
+        return np.where(coin < self.prob[column], column, self.alias[column])
+
+    def sample_one(self, rand: random.Random) -> int:
+        """Draw one outcome index with a random.Random (scalar path)"""
+        column = rand.randrange(len(self.prob_list))
+        if self.uniform or rand.random() < self.prob_list[column]:
+            return column
+        return self.alias_list[column]
@@ -0,0 +1,64 @@
+"""
+Intraday arrival times for the BPI Transaction Generator.
+
+Customers arrive as a non-homogeneous Poisson process whose rate is a
+piecewise-constant hourly profile (one for normal days, one for peak days).
+A branch-day's customer count is already known, so its arrival times are
+drawn conditioned on that count by time rescaling: n + 1 exponential gaps
+are cumulated and normalised into n sorted points of a unit-rate process
+on the day's total intensity, then mapped back through the inverse of the
+cumulative rate. Every step is a NumPy array operation and the times come
+out sorted, so a branch-day's rows are in arrival order as drawn.
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+# Relative arrival rate per hour of day (0 = branch closed); only the shape matters
+DEFAULT_HOURLY_PROFILES = {
+    'normal': [0] * 9 + [1.2, 1.0, 1.1, 1.3, 1.0, 0.9, 0.7] + [0] * 8,  # 9:00-16:00, lunch bump
+    'peak': [0] * 9 + [1.8, 1.4, 1.2, 1.5, 1.1, 1.0, 0.9] + [0] * 8  # Opening rush on paydays and Mondays/Fridays
+}
+
+
+class ArrivalProfile:
+    def __init__(self, hourly_rates: Sequence[float]):
+        """
+        Build the cumulative intensity of one hourly profile
+
+        Args:
+            hourly_rates: 24 non-negative relative rates, one per hour of day
+        """
+        rates = np.asarray(hourly_rates, dtype=np.float64)
+        if rates.shape != (24,) or (rates < 0).any() or rates.sum() <= 0:
+            raise ValueError("An hourly profile needs 24 non-negative rates with at least one open hour")
+
+        # Only open hours take part; closed hours have no intensity to invert
+        self.rates = rates
+        self.open_hours = np.flatnonzero(rates > 0)
+        self.open_rates = rates[self.open_hours]
+        cumulative = np.concatenate([[0.0], np.cumsum(self.open_rates)])
+        self.cumulative = cumulative / cumulative[-1]  # Share of the day's intensity before each open hour starts
+        self.open_seconds = np.arange(len(self.open_hours) + 1) * 3600.0  # Same knots on a clock of open hours only
+
+        # Open-hours clock second -> seconds after midnight (the extra last entry absorbs rounding up)
+        clock = (self.open_hours[:, None] * 3600 + np.arange(3600)).ravel()
+        self.clock_seconds = np.append(clock, clock[-1]).astype(np.int32)
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """n sorted arrival times in seconds after midnight (int32)"""
+        if n == 0:
+            return np.zeros(0, dtype=np.int32)
+
+        # Normalised partial sums of exponential gaps are the sorted points of n uniform draws
+        points = np.cumsum(rng.standard_exponential(n + 1))
+
+        # Invert the piecewise-linear cumulative intensity on the open-hours clock, then skip closed hours
+        open_second = np.interp(points[:-1] / points[-1], self.cumulative, self.open_seconds).astype(np.intp)
+        return self.clock_seconds[open_second]
+
+
+def build_arrival_profiles(hourly_profiles: Dict[str, Sequence[float]]) -> Dict[bool, ArrivalProfile]:
+    """ArrivalProfile per is_peak flag from {'normal': rates, 'peak': rates}"""
+    return {False: ArrivalProfile(hourly_profiles['normal']), True: ArrivalProfile(hourly_profiles['peak'])}
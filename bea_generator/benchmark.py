@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the BPI Transaction Generator.
+
+Runs each generation mode (today, range, mixed, streaming into the fake
+Sheets backend) over scale tiers of branches x days and records wall
+time, rows per second, peak RSS and peak traced allocations. Every case
+runs in a fresh process, so peak RSS belongs to that case alone; the
+allocation figure comes from a second, tracemalloc-instrumented run of the
+same case so tracing never slows the timed run. Results are written as
+JSON (with the git commit and library versions) and two result files can
+be compared case by case.
+
+Usage:
+    python benchmark.py                                   # full grid
+    python benchmark.py --branches 5,100 --days 1,30 --modes range,mixed
+    python benchmark.py --compare bench_old.json bench_new.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+MODES = ['today', 'range', 'mixed', 'streaming']
+BRANCH_TIERS = [5, 100, 1250]
+DAY_TIERS = [1, 30, 365]
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+START_DATE = datetime.date(2025, 1, 6)
+
+
+def benchmark_branches(count: int) -> List[str]:
+    """count branch names: the real branch list, repeated with a suffix when more are needed"""
+    names = pd.read_csv(os.path.join(BENCHMARK_DIR, "branch.csv"))['branch_name'].dropna().unique().tolist()
+    return [names[i % len(names)] + (f" #{i // len(names) + 1}" if i >= len(names) else "") for i in range(count)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, KB elsewhere
+
+
+def git_commit() -> Optional[str]:
+    """Commit the benchmarked tree is at (None outside a git checkout)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(case: Dict, trace_allocations: bool = False) -> Dict:
+    """Run one benchmark case in this (fresh) process and return its measurements"""
+    sys.path.insert(0, BENCHMARK_DIR)
+
+    with tempfile.TemporaryDirectory(prefix="bpi_bench_") as work_dir, open(os.devnull, 'w') as devnull:
+        os.chdir(work_dir)  # Manifests, checkpoints and outputs stay in the scratch directory
+        try:
+            return measure_case(case, work_dir, devnull, trace_allocations)
+        finally:
+            os.chdir(BENCHMARK_DIR)
+
+
+def measure_case(case: Dict, work_dir: str, devnull, trace_allocations: bool) -> Dict:
+    """Build the generator for a case, then time (or trace) the run itself"""
+    from generate import BPITransactionGenerator
+    from fake_sheets import FakeSheetsClient
+    from sheets_sink import WriteScheduler
+
+    # Setup is not measured; generator progress output goes to /dev/null
+    with contextlib.redirect_stdout(devnull):
+        client = FakeSheetsClient(os.path.join(work_dir, "bench_sheets.db")) if case['mode'] == 'streaming' else None
+        generator = BPITransactionGenerator("benchmark", vectorized=case['vectorized'], seed=case['seed'],
+                                            workers=case['workers'], sheets_client=client)
+        generator.write_scheduler = WriteScheduler(requests_per_minute=10 ** 9, burst=10 ** 9)  # No quota
+        generator.branches = benchmark_branches(case['branches'])
+        generator.load_review_samples(os.path.join(BENCHMARK_DIR, "bpi_review_samples.csv"))
+
+    baseline_rss = peak_rss_mb()
+    if trace_allocations:
+        tracemalloc.start()
+
+    output_path = os.path.join(work_dir, "bench_output.csv")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(devnull):
+        if case['mode'] == 'streaming':
+            rows = generator.stream_realtime(
+                START_DATE, case['days'], frequency_seconds=0, records_per_interval=case['records_per_interval'],
+                output_file=os.path.join(work_dir, "bench_progress.csv"))
+        else:
+            days = 1 if case['mode'] == 'today' else case['days']
+            batches = generator.generate_iter(START_DATE, days, mixed=case['mode'] != 'range')
+            if case['sink'] == 'csv':
+                rows = generator.save_batches_to_csv(batches, output_path)
+            elif case['sink'] == 'parquet':
+                output_path = os.path.join(work_dir, "bench_dataset")
+                rows = generator.save_batches_to_parquet(batches, output_path)
+            else:
+                rows = sum(len(batch) for batch in batches)
+    wall = time.perf_counter() - start
+
+    result = {'rows': int(rows), 'wall_seconds': round(wall, 4),
+              'rows_per_second': round(rows / wall, 1) if wall > 0 else None}
+    if trace_allocations:
+        result['alloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    else:
+        peak = peak_rss_mb()
+        result['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+        result['baseline_rss_mb'] = round(baseline_rss, 1) if baseline_rss is not None else None
+        result['output_bytes'] = directory_size(output_path) if case['mode'] != 'streaming' else None
+    return result
+
+
+def directory_size(path: str) -> Optional[int]:
+    """Size of a file, or of every file under a directory (None if it does not exist)"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    if not os.path.isdir(path):
+        return None
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run_isolated(case: Dict, trace_allocations: bool = False) -> Dict:
+    """Run a case in a freshly spawned process so its peak RSS is its own"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run_case, case, trace_allocations).result()
+
+
+def build_cases(modes: List[str], branch_tiers: List[int], day_tiers: List[int], args) -> List[Dict]:
+    """Benchmark grid (today mode always covers one day, so it only runs in the 1-day tier)"""
+    cases = []
+    for mode in modes:
+        for branches in branch_tiers:
+            for days in day_tiers:
+                if mode == 'today' and days != 1:
+                    continue
+                cases.append({
+                    'mode': mode, 'branches': branches, 'days': days,
+                    'vectorized': args.engine == 'vectorized', 'workers': args.workers, 'seed': args.seed,
+                    'sink': 'fake_sheets' if mode == 'streaming' else args.sink,
+                    'records_per_interval': args.records_per_interval
+                })
+    return cases
+
+
+def case_key(result: Dict) -> tuple:
+    """Identity of a case for comparisons between result files"""
+    return result['mode'], result['branches'], result['days'], result['sink'], result['vectorized'], result['workers']
+
+
+def compare_results(old_path: str, new_path: str):
+    """Print per-case throughput and memory ratios between two result files"""
+    with open(old_path) as f:
+        old = {case_key(r): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new_file = json.load(f)
+
+    def ratio(before, after):
+        return f"{after / before:.2f}x" if before and after else "-"
+
+    print(f"{'mode':<10} {'branches':>8} {'days':>5} {'rows/s old':>12} {'rows/s new':>12} {'speed':>7} "
+          f"{'RSS old':>9} {'RSS new':>9} {'alloc':>7}")
+    for result in new_file['results']:
+        before = old.get(case_key(result))
+        if before is None:
+            continue
+        print(f"{result['mode']:<10} {result['branches']:>8} {result['days']:>5} "
+              f"{before['rows_per_second'] or 0:>12,.0f} {result['rows_per_second'] or 0:>12,.0f} "
+              f"{ratio(before['rows_per_second'], result['rows_per_second']):>7} "
+              f"{before.get('peak_rss_mb') or 0:>9.1f} {result.get('peak_rss_mb') or 0:>9.1f} "
+              f"{ratio(before.get('alloc_peak_mb'), result.get('alloc_peak_mb')):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BPI Transaction Generator")
+    parser.add_argument('--modes', default=",".join(MODES), help="Comma-separated modes (%(default)s)")
+    parser.add_argument('--branches', default=",".join(map(str, BRANCH_TIERS)), help="Branch tiers (%(default)s)")
+    parser.add_argument('--days', default=",".join(map(str, DAY_TIERS)), help="Day tiers (%(default)s)")
+    parser.add_argument('--engine', choices=['vectorized', 'scalar'], default='vectorized')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--sink', choices=['csv', 'parquet', 'none'], default='csv',
+                        help="Output for today/range/mixed ('none' = generation only)")
+    parser.add_argument('--records-per-interval', type=int, default=5000, help="Streaming batch size")
+    parser.add_argument('--seed', type=int, default=12345)
+    parser.add_argument('--no-allocations', action='store_true', help="Skip the tracemalloc run of each case")
+    parser.add_argument('--output', help="Results file (default: bench_results_<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    modes = [m for m in args.modes.split(',') if m]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(sorted(unknown))}")
+    cases = build_cases(modes, [int(b) for b in args.branches.split(',')], [int(d) for d in args.days.split(',')],
+                        args)
+
+    commit = git_commit()
+    output = args.output or f"bench_results_{(commit or 'nogit')[:12]}.json"
+    report = {
+        'commit': commit,
+        'started': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': []
+    }
+
+    print(f"🏁 Running {len(cases)} benchmark cases (results: {output})")
+    for case_num, case in enumerate(cases, 1):
+        print(f"[{case_num}/{len(cases)}] {case['mode']}: {case['branches']} branches x {case['days']} days ...",
+              end=" ", flush=True)
+        result = {**case, **run_isolated(case)}
+        if not args.no_allocations:
+            result['alloc_peak_mb'] = run_isolated(case, trace_allocations=True)['alloc_peak_mb']
+        report['results'].append(result)
+        print(f"{result['rows']:,} rows in {result['wall_seconds']:.2f}s "
+              f"({result['rows_per_second'] or 0:,.0f} rows/s, peak RSS {result['peak_rss_mb']} MB, "
+              f"allocations {result.get('alloc_peak_mb', '-')} MB)")
+
+        # Written after every case, so a long run keeps what it has measured
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=1)
+
+    print(f"\n✅ Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Precomputed per-branch parameters for the BPI Transaction Generator.
+
+BranchProfiles holds one row per branch in a NumPy structured array indexed
+by an integer branch id. Every value is drawn once from the branch's own
+random stream, so hot paths do a single array index per branch-day instead
+of recomputing (or reseeding) per transaction. A profile set can be saved
+and reloaded to reproduce a run exactly.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from .random_streams import RandomStreams
+except ImportError:  # Imported flat, from inside bea_generator (generate.py, the tests)
+    from random_streams import RandomStreams
+
+# Branch capacity standards shared with overall_data/compute.py: customers per normal/peak day and
+# tellers (Business Executive Associates) at a regular branch
+CAPACITY_STANDARDS = {
+    'normal_day': 190,
+    'peak_day': 310,
+    'regular_branch_bea': 4,
+}
+
+# One row per branch; add new per-branch parameters here and in draw_profile
+PROFILE_DTYPE = np.dtype([
+    ('performance_factor', np.float64),  # Multiplies waiting/processing times (0.7 to 1.3)
+    ('volume_variation', np.float64),  # Multiplies daily customer volume (0.8 to 1.2)
+    ('tellers', np.int16),  # Teller lanes on a normal day for the queue model (3 to 5)
+])
+
+
+def teller_count(volume_variation):
+    """Tellers staffed in proportion to a branch's volume (busier branches get one more, quieter one fewer)"""
+    return np.rint(CAPACITY_STANDARDS['regular_branch_bea'] * np.asarray(volume_variation)).astype(np.int16)
+
+
+def tellers_on_duty(tellers: int, is_peak: bool) -> int:
+    """Teller lanes open on a day: peak days are staffed up to the peak_day capacity standard"""
+    if not is_peak:
+        return int(tellers)
+    return int(np.rint(tellers * CAPACITY_STANDARDS['peak_day'] / CAPACITY_STANDARDS['normal_day']))
+
+
+def draw_profile(streams: RandomStreams, branch_name: str) -> tuple:
+    """Draw one branch's profile row from its own streams"""
+    performance_factor = 0.7 + streams.generator(branch_name, None, 'performance').random() * 0.6
+    volume_variation = 0.8 + streams.generator(branch_name, None, 'volume_variation').random() * 0.4
+    return performance_factor, volume_variation, teller_count(volume_variation)
+
+
+class BranchProfiles:
+    def __init__(self, streams: RandomStreams, branch_names: List[str] = None):
+        """
+        Initialize the profile table
+
+        Args:
+            streams: Random streams the profile values are drawn from
+            branch_names: Branches to build up front (others are added on first lookup)
+        """
+        self.streams = streams
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.table = np.zeros(0, dtype=PROFILE_DTYPE)
+
+        if branch_names:
+            self.add_branches(branch_names)
+
+    def add_branches(self, branch_names: List[str]):
+        """Add profile rows for branches that are not in the table yet"""
+        new_names = [name for name in dict.fromkeys(branch_names) if name not in self.index]
+        if not new_names:
+            return
+
+        rows = np.array([draw_profile(self.streams, name) for name in new_names], dtype=PROFILE_DTYPE)
+        for name in new_names:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        self.table = np.concatenate([self.table, rows])
+
+    def branch_id(self, branch_name: str) -> int:
+        """Integer id of a branch (adds a profile row for an unseen branch)"""
+        if branch_name not in self.index:
+            self.add_branches([branch_name])
+        return self.index[branch_name]
+
+    def get(self, branch_name: str) -> np.void:
+        """Profile row of a branch"""
+        branch_id = self.branch_id(branch_name)  # May grow the table, so look the row up afterwards
+        return self.table[branch_id]
+
+    def save(self, path: str):
+        """Save the profile set (names, table and master seed) to an .npz file"""
+        np.savez(path, names=np.array(self.names, dtype=str), table=self.table,
+                 master_seed=np.array(self.streams.master_seed))
+
+    @classmethod
+    def load(cls, path: str, streams: RandomStreams = None) -> "BranchProfiles":
+        """Reload a saved profile set"""
+        with np.load(path) as data:
+            if streams is None:
+                streams = RandomStreams(int(data['master_seed']))
+            profiles = cls(streams)
+            profiles.names = data['names'].tolist()
+            profiles.index = {name: i for i, name in enumerate(profiles.names)}
+            saved = data['table']
+            profiles.table = np.zeros(len(saved), dtype=PROFILE_DTYPE)
+            for field in PROFILE_DTYPE.names:
+                if field in saved.dtype.names:
+                    profiles.table[field] = saved[field]
+            if 'tellers' not in saved.dtype.names:  # Saved before the queue model existed
+                profiles.table['tellers'] = teller_count(profiles.table['volume_variation'])
+        return profiles
@@ -0,0 +1,164 @@
+"""
+Precomputed day calendar for the BPI Transaction Generator.
+
+CalendarTable holds one row per date in a NumPy structured array indexed by
+the date's offset from the table's first day: peak flag, Philippine public
+holiday, payday and month-end flags and a demand multiplier for customer
+volume. Rows are computed for whole years at a time with array operations,
+so per-date logic in the generator and in overall_data/compute.py is one
+array index instead of a Python call per date.
+
+Holidays come from a local CSV (date, name, type = regular/special), since
+movable holidays (Holy Week, Eid) are proclaimed year by year.
+"""
+
+import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Holiday type codes stored in the table (0 = working day)
+HOLIDAY_TYPES = ['', 'regular', 'special']
+
+# Volume multipliers per calendar condition, multiplied together for a day (used with seasonal demand)
+DEFAULT_DEMAND_FACTORS = {
+    'regular_holiday': 0.35,  # Most branches closed; mall branches open with a skeleton crew
+    'special_holiday': 0.7,  # Non-working day for most employers
+    'holiday_eve': 1.1,  # Withdrawals ahead of the holiday
+    'after_holiday': 1.2,  # Backlog on the first working day after a holiday
+    'payday': 1.1,  # 15th and last day of the month (semi-monthly pay)
+    'month_end': 1.05,  # Bills and loan amortizations
+    'december': 1.1,  # 13th-month pay and holiday spending
+}
+
+# One row per date; add new per-date values here and in build
+CALENDAR_DTYPE = np.dtype([
+    ('weekday', np.int8),  # Monday = 0, Sunday = 6
+    ('is_peak', np.bool_),  # Mondays, Fridays, the 15th and the 30th
+    ('holiday', np.int8),  # Code into HOLIDAY_TYPES
+    ('is_payday', np.bool_),
+    ('is_month_end', np.bool_),
+    ('demand_multiplier', np.float64),  # Multiplies daily customer volume
+])
+
+# Days between 0001-01-01 (ordinal 1) and the Unix epoch
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+Holidays = Dict[datetime.date, Tuple[str, str]]
+
+
+def load_holidays(csv_file: str) -> Holidays:
+    """{date: (name, type)} from a CSV with date, name and type (regular/special) columns"""
+    holiday_df = pd.read_csv(csv_file, keep_default_na=False)
+    if not {'date', 'name', 'type'}.issubset(holiday_df.columns):
+        raise ValueError(f"Required columns 'date', 'name' and 'type' not found in {csv_file}")
+    unknown = set(holiday_df['type']) - set(HOLIDAY_TYPES[1:])
+    if unknown:
+        raise ValueError(f"Unknown holiday types in {csv_file}: {', '.join(sorted(unknown))}")
+    return {datetime.date.fromisoformat(row.date): (row.name, row.type) for row in holiday_df.itertuples()}
+
+
+def max_demand_multiplier(demand_factors: Optional[Dict[str, float]]) -> float:
+    """Upper bound of a day's multiplier (every boosting condition at once)"""
+    if not demand_factors:
+        return 1.0
+    return float(np.prod([factor for factor in demand_factors.values() if factor > 1.0]))
+
+
+class CalendarTable:
+    def __init__(self, holidays: Optional[Holidays] = None, demand_factors: Optional[Dict[str, float]] = None):
+        """
+        Empty calendar; rows are built on first lookup and extended a whole year at a time
+
+        Args:
+            holidays: {date: (name, type)} public holidays (see load_holidays)
+            demand_factors: Volume multipliers per condition (see DEFAULT_DEMAND_FACTORS);
+                None leaves every day's demand_multiplier at 1.0
+        """
+        self.holidays = dict(holidays or {})
+        self.demand_factors = dict(demand_factors) if demand_factors else None
+        self.max_demand_multiplier = max_demand_multiplier(self.demand_factors)
+        self.first_ordinal = 0
+        self.days = np.zeros(0, dtype=CALENDAR_DTYPE)
+
+        holiday_dates = sorted(self.holidays)
+        self.holiday_ordinals = np.array([d.toordinal() for d in holiday_dates], dtype=np.int64)
+        self.holiday_codes = np.array([HOLIDAY_TYPES.index(self.holidays[d][1]) for d in holiday_dates],
+                                      dtype=np.int8)
+
+    def build(self, first_ordinal: int, last_ordinal: int) -> np.ndarray:
+        """Rows for first_ordinal..last_ordinal inclusive"""
+        # One extra day each side, so eve/after-holiday flags see holidays across the edges
+        ordinals = np.arange(first_ordinal - 1, last_ordinal + 2, dtype=np.int64)
+        dates = (ordinals - EPOCH_ORDINAL).astype('datetime64[D]')
+        months = dates.astype('datetime64[M]')
+        day = (dates - months).astype(np.int64) + 1
+        weekday = (ordinals - 1) % 7  # Ordinal 1 (0001-01-01) is a Monday
+        is_month_end = (dates + 1).astype('datetime64[M]') != months
+
+        holiday = np.zeros(len(ordinals), dtype=np.int8)
+        if len(self.holiday_ordinals):
+            positions = np.searchsorted(self.holiday_ordinals, ordinals).clip(max=len(self.holiday_ordinals) - 1)
+            matched = self.holiday_ordinals[positions] == ordinals
+            holiday[matched] = self.holiday_codes[positions[matched]]
+        is_holiday = holiday > 0
+
+        table = np.zeros(len(ordinals), dtype=CALENDAR_DTYPE)
+        table['weekday'] = weekday
+        table['is_peak'] = np.isin(weekday, [0, 4]) | np.isin(day, [15, 30])
+        table['holiday'] = holiday
+        table['is_payday'] = (day == 15) | is_month_end
+        table['is_month_end'] = is_month_end
+
+        multiplier = np.ones(len(ordinals))
+        if self.demand_factors:
+            conditions = {
+                'regular_holiday': holiday == HOLIDAY_TYPES.index('regular'),
+                'special_holiday': holiday == HOLIDAY_TYPES.index('special'),
+                'holiday_eve': np.append(is_holiday[1:], False) & ~is_holiday,
+                'after_holiday': np.insert(is_holiday[:-1], 0, False) & ~is_holiday,
+                'payday': table['is_payday'],
+                'month_end': is_month_end,
+                'december': months.astype(np.int64) % 12 == 11,
+            }
+            for name, factor in self.demand_factors.items():
+                multiplier = np.where(conditions[name], multiplier * factor, multiplier)
+        table['demand_multiplier'] = multiplier
+        return table[1:-1]
+
+    def cover(self, first: datetime.date, last: datetime.date):
+        """Make sure rows exist for first..last (whole years, merged with what is already built)"""
+        first_ordinal = datetime.date(first.year, 1, 1).toordinal()
+        last_ordinal = datetime.date(last.year, 12, 31).toordinal()
+        if len(self.days):
+            if first_ordinal >= self.first_ordinal and last_ordinal < self.first_ordinal + len(self.days):
+                return
+            first_ordinal = min(first_ordinal, self.first_ordinal)
+            last_ordinal = max(last_ordinal, self.first_ordinal + len(self.days) - 1)
+        self.days = self.build(first_ordinal, last_ordinal)
+        self.first_ordinal = first_ordinal
+
+    def day(self, date: datetime.date) -> np.void:
+        """Row for one date"""
+        index = date.toordinal() - self.first_ordinal
+        if not 0 <= index < len(self.days):
+            self.cover(date, date)
+            index = date.toordinal() - self.first_ordinal
+        return self.days[index]
+
+    def index(self, dates: Iterable[datetime.date]) -> np.ndarray:
+        """Row positions of many dates, for lookups such as calendar.days['is_peak'][positions]"""
+        ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64)
+        if len(ordinals):
+            self.cover(datetime.date.fromordinal(int(ordinals.min())), datetime.date.fromordinal(int(ordinals.max())))
+        return ordinals - self.first_ordinal
+
+    def lookup(self, dates: Iterable[datetime.date]) -> np.ndarray:
+        """Rows of many dates, in order"""
+        positions = self.index(dates)  # May rebuild self.days
+        return self.days[positions]
+
+    def holiday_name(self, date: datetime.date) -> Optional[str]:
+        holiday = self.holidays.get(date)
+        return holiday[0] if holiday else None
@@ -0,0 +1,130 @@
+"""
+Append-only checkpoints for real-time streaming.
+
+StreamCheckpoint keeps two files: the progress CSV, which doubles as the
+checkpoint log (each batch is appended once, so checkpoint cost is
+proportional to the batch), and a small JSON offset file next to it. The
+offset file records the run's settings and master seed, the dates being
+streamed, how many batches/rows were logged (and the log's byte length at
+that point), and how many leading rows are confirmed in Google Sheets.
+A restarted run truncates the log back to the last recorded batch,
+regenerates the same stream from the seed, re-sends only the rows after
+the committed prefix and continues from the next unsent batch.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def contiguous_runs(rows: np.ndarray) -> List[tuple]:
+    """[start, stop) runs of consecutive integers in rows"""
+    rows = np.unique(rows)
+    if len(rows) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+    starts = np.concatenate([[0], breaks])
+    stops = np.concatenate([breaks, [len(rows)]])
+    return [(int(rows[a]), int(rows[b - 1]) + 1) for a, b in zip(starts, stops)]
+
+
+class StreamCheckpoint:
+    def __init__(self, log_path: str, offset_path: Optional[str] = None):
+        """
+        Initialize the checkpoint
+
+        Args:
+            log_path: Progress CSV that serves as the append-only log
+            offset_path: JSON offset file (default: <log_path>.offset.json)
+        """
+        self.log_path = log_path
+        self.offset_path = offset_path or f"{log_path}.offset.json"
+        self.state: Dict = {}
+        self.log = None
+        self.lock = threading.Lock()  # Commits arrive from the uploader thread
+        self.committed_runs: Dict[int, int] = {}  # Committed [start, stop) row runs past the prefix
+
+    def load(self) -> Optional[Dict]:
+        """State of an unfinished run (None if there is none)"""
+        if not (os.path.exists(self.offset_path) and os.path.exists(self.log_path)):
+            return None
+        with open(self.offset_path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def matches(state: Optional[Dict], settings: Dict) -> bool:
+        """Whether a saved run was started with the same settings"""
+        return bool(state) and state.get('settings') == settings
+
+    def start(self, settings: Dict, seed: int, dates: List[str], columns: List[str]):
+        """Begin a new run: header-only log and a fresh offset file"""
+        pd.DataFrame(columns=columns).to_csv(self.log_path, index=False)
+        self.state = {
+            'settings': settings,
+            'seed': seed,
+            'dates': dates,
+            'emitted_batches': 0,
+            'emitted_rows': 0,
+            'committed_rows': 0,
+            'log_bytes': os.path.getsize(self.log_path)
+        }
+        self.committed_runs = {}
+        self.save()
+        self.log = open(self.log_path, 'a', newline='')
+
+    def resume(self, state: Dict):
+        """Continue a saved run: drop log bytes written after the last recorded batch"""
+        self.state = state
+        self.committed_runs = {}
+        with open(self.log_path, 'r+b') as f:
+            f.truncate(state['log_bytes'])
+        self.log = open(self.log_path, 'a', newline='')
+
+    def append(self, df: pd.DataFrame):
+        """Log one emitted batch, then record the new offsets"""
+        df.to_csv(self.log, header=False, index=False)
+        self.log.flush()
+        os.fsync(self.log.fileno())
+
+        with self.lock:
+            self.state['emitted_batches'] += 1
+            self.state['emitted_rows'] += len(df)
+            self.state['log_bytes'] = self.log.tell()
+            self.save()
+
+    def commit(self, rows: np.ndarray):
+        """Mark stream rows (by position) as confirmed in Google Sheets; saves when the prefix grows"""
+        with self.lock:
+            for start, stop in contiguous_runs(rows):
+                self.committed_runs[start] = max(stop, self.committed_runs.get(start, stop))
+
+            committed = self.state['committed_rows']
+            while committed in self.committed_runs:
+                committed = self.committed_runs.pop(committed)
+
+            if committed != self.state['committed_rows']:
+                self.state['committed_rows'] = committed
+                self.save()
+
+    def save(self):
+        """Write the offset file atomically"""
+        temp_path = f"{self.offset_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(temp_path, self.offset_path)
+
+    def close(self):
+        """Close the log and keep the offset file for a later resume"""
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def finish(self):
+        """Close the log and remove the offset file (the run is complete)"""
+        self.close()
+        if os.path.exists(self.offset_path):
+            os.remove(self.offset_path)
@@ -0,0 +1,386 @@
+"""
+Local stand-in for the gspread client, backed by SQLite.
+
+FakeSheetsClient implements the subset of gspread that the generator and
+the branch health calculator use (open_by_key, worksheet, add_worksheet,
+get_all_values, get, row_values, col_values, update, append_rows, clear, batch_get,
+hide), so both can run end to end without network access. Every API call can be
+slowed down (latency), rate limited (requests per minute, answered with a
+429 like the real quota) and made to fail at random (503s); the stats
+counters record requests and cells moved so upload and fetch paths can be
+benchmarked offline.
+
+Set BPI_FAKE_SHEETS=<path to .db> to make generate.py and compute.py use
+it instead of Google Sheets. The injected faults can be set the same way:
+BPI_FAKE_SHEETS_LATENCY_MS, BPI_FAKE_SHEETS_JITTER_MS, BPI_FAKE_SHEETS_RPM,
+BPI_FAKE_SHEETS_ERROR_RATE and BPI_FAKE_SHEETS_SEED.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import gspread
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+
+logger = logging.getLogger(__name__)
+
+# Environment variable that switches the command-line tools to the fake backend
+FAKE_SHEETS_ENV = "BPI_FAKE_SHEETS"
+
+# Environment variables for the injected faults: (FakeSheetsClient argument, parser)
+FAKE_SHEETS_FAULT_ENV = {
+    "BPI_FAKE_SHEETS_LATENCY_MS": ('latency', lambda value: float(value) / 1000),
+    "BPI_FAKE_SHEETS_JITTER_MS": ('latency_jitter', lambda value: float(value) / 1000),
+    "BPI_FAKE_SHEETS_RPM": ('requests_per_minute', int),
+    "BPI_FAKE_SHEETS_ERROR_RATE": ('error_rate', float),
+    "BPI_FAKE_SHEETS_SEED": ('seed', int),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS worksheets (
+    spreadsheet TEXT NOT NULL,
+    title TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    col_count INTEGER NOT NULL,
+    hidden INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (spreadsheet, title)
+);
+CREATE TABLE IF NOT EXISTS cells (
+    spreadsheet TEXT NOT NULL,
+    title TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    vals TEXT NOT NULL,
+    PRIMARY KEY (spreadsheet, title, row)
+);
+"""
+
+
+class FakeResponse:
+    """Minimal requests.Response look-alike so gspread.exceptions.APIError can wrap fake errors"""
+
+    def __init__(self, status_code: int, message: str, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = message
+
+    def json(self) -> Dict:
+        return {'error': {'code': self.status_code, 'message': self.text, 'status': 'FAKE'}}
+
+
+def api_error(status_code: int, message: str) -> gspread.exceptions.APIError:
+    """APIError shaped like the one gspread raises for a failed request"""
+    return gspread.exceptions.APIError(FakeResponse(status_code, message))
+
+
+def cell_text(value) -> str:
+    """How a written value reads back (get_all_values returns formatted strings)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+def parse_range(range_name: str) -> tuple:
+    """Drop an optional 'Sheet'! prefix and return 0-based (start_row, end_row, start_col, end_col); None = open"""
+    if '!' in range_name:
+        range_name = range_name.rsplit('!', 1)[1]
+    grid = a1_range_to_grid_range(range_name)
+    return (grid.get('startRowIndex', 0), grid.get('endRowIndex'),
+            grid.get('startColumnIndex', 0), grid.get('endColumnIndex'))
+
+
+class FakeSheetsClient:
+    def __init__(self, path: str = "fake_sheets.db", latency: float = 0.0, latency_jitter: float = 0.0,
+                 requests_per_minute: Optional[int] = None, error_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize the fake client
+
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+            latency: Seconds added to every API call
+            latency_jitter: Extra random latency of up to this many seconds per call
+            requests_per_minute: Calls allowed in any 60 s window before 429s (None = unlimited)
+            error_rate: Probability that a call fails with a 503
+            seed: Seed for the injected jitter and errors
+        """
+        self.path = path
+        # Names this store in local state files (e.g. the date manifest), apart from Google Sheets and other stores
+        self.backend = "fake-" + hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:10]
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.requests_per_minute = requests_per_minute
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()  # One connection shared with background upload threads
+        self.recent_requests = collections.deque()
+        self.stats = collections.Counter()
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def request(self, method: str):
+        """Account for one API call: latency, quota and injected failures"""
+        delay = self.latency + (self.random.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats[f'requests.{method}'] += 1
+
+            if self.requests_per_minute:
+                now = time.monotonic()
+                while self.recent_requests and now - self.recent_requests[0] >= 60:
+                    self.recent_requests.popleft()
+                if len(self.recent_requests) >= self.requests_per_minute:
+                    self.stats['errors.429'] += 1
+                    raise api_error(429, "Quota exceeded for quota metric 'Requests per minute' (fake)")
+                self.recent_requests.append(now)
+
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats['errors.503'] += 1
+                raise api_error(503, "The service is currently unavailable (fake)")
+
+    def open_by_key(self, key: str) -> "FakeSpreadsheet":
+        """Open a spreadsheet (created with an empty Sheet1 on first use, like a new Google Sheet)"""
+        self.request('open_by_key')
+        with self.lock:
+            exists = self.db.execute("SELECT 1 FROM worksheets WHERE spreadsheet = ? LIMIT 1", (key,)).fetchone()
+            if not exists:
+                self.db.execute("INSERT INTO worksheets VALUES (?, 'Sheet1', 0, 1000, 26, 0)", (key,))
+                self.db.commit()
+        return FakeSpreadsheet(self, key)
+
+
+class FakeSpreadsheet:
+    def __init__(self, client: FakeSheetsClient, key: str):
+        self.client = client
+        self.id = key
+
+    def worksheet(self, title: str) -> "FakeWorksheet":
+        """Open a worksheet by title"""
+        self.client.request('worksheet')
+        with self.client.lock:
+            row = self.client.db.execute("SELECT 1 FROM worksheets WHERE spreadsheet = ? AND title = ?",
+                                         (self.id, title)).fetchone()
+        if not row:
+            raise gspread.WorksheetNotFound(title)
+        return FakeWorksheet(self.client, self.id, title)
+
+    def worksheets(self) -> List["FakeWorksheet"]:
+        """Every worksheet in tab order"""
+        self.client.request('worksheets')
+        with self.client.lock:
+            titles = self.client.db.execute("SELECT title FROM worksheets WHERE spreadsheet = ? ORDER BY position",
+                                            (self.id,)).fetchall()
+        return [FakeWorksheet(self.client, self.id, title) for title, in titles]
+
+    @property
+    def sheet1(self) -> "FakeWorksheet":
+        return self.worksheets()[0]
+
+    def add_worksheet(self, title: str, rows: int, cols: int, index: Optional[int] = None) -> "FakeWorksheet":
+        """Create a worksheet (400 if the title is taken, like the real API)"""
+        self.client.request('add_worksheet')
+        with self.client.lock:
+            db = self.client.db
+            if db.execute("SELECT 1 FROM worksheets WHERE spreadsheet = ? AND title = ?",
+                          (self.id, title)).fetchone():
+                raise api_error(400, f'A sheet with the name "{title}" already exists.')
+            position = db.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM worksheets WHERE spreadsheet = ?",
+                                  (self.id,)).fetchone()[0]
+            db.execute("INSERT INTO worksheets VALUES (?, ?, ?, ?, ?, 0)",
+                       (self.id, title, position, int(rows), int(cols)))
+            db.commit()
+        return FakeWorksheet(self.client, self.id, title)
+
+
+class FakeWorksheet:
+    def __init__(self, client: FakeSheetsClient, spreadsheet: str, title: str):
+        self.client = client
+        self.spreadsheet = spreadsheet
+        self.title = title
+
+    @property
+    def row_count(self) -> int:
+        return self.grid()[0]
+
+    @property
+    def col_count(self) -> int:
+        return self.grid()[1]
+
+    def grid(self) -> tuple:
+        with self.client.lock:
+            return self.client.db.execute(
+                "SELECT row_count, col_count FROM worksheets WHERE spreadsheet = ? AND title = ?",
+                (self.spreadsheet, self.title)).fetchone()
+
+    def read(self, start_row: int = 0, end_row: Optional[int] = None,
+             start_col: int = 0, end_col: Optional[int] = None) -> List[List[str]]:
+        """Values in a 0-based, end-exclusive block, trimmed of trailing empty rows and columns like the API"""
+        with self.client.lock:
+            rows = self.client.db.execute(
+                "SELECT row, vals FROM cells WHERE spreadsheet = ? AND title = ? AND row >= ? AND row < ? ORDER BY row",
+                (self.spreadsheet, self.title, start_row, end_row if end_row is not None else 2 ** 62)).fetchall()
+
+        values = []
+        last_row = start_row - 1
+        for row, vals in rows:
+            cells = json.loads(vals)[start_col:end_col]
+            while cells and cells[-1] == "":
+                cells.pop()
+            if not cells:
+                continue
+            values.extend([] for _ in range(row - last_row - 1))
+            values.append(cells)
+            last_row = row
+
+        self.client.stats['cells_read'] += sum(len(r) for r in values)
+        return values
+
+    def get_all_values(self) -> List[List[str]]:
+        """Every value, rows padded to the same width"""
+        self.client.request('get_all_values')
+        values = self.read()
+        width = max((len(r) for r in values), default=0)
+        return [r + [""] * (width - len(r)) for r in values]
+
+    def get(self, range_name: Optional[str] = None) -> List[List[str]]:
+        """Values of one A1 range (unpadded, like gspread's get)"""
+        self.client.request('get')
+        return self.read(*parse_range(range_name)) if range_name else self.read()
+
+    def row_values(self, row: int) -> List[str]:
+        """One row up to its last non-empty cell"""
+        self.client.request('row_values')
+        values = self.read(start_row=row - 1, end_row=row)
+        return values[0] if values else []
+
+    def col_values(self, col: int) -> List[str]:
+        """One column down to its last non-empty cell"""
+        self.client.request('col_values')
+        values = [r[0] if r else "" for r in self.read(start_col=col - 1, end_col=col)]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def batch_get(self, ranges: List[str]) -> List[List[List[str]]]:
+        """Values of several A1 ranges in one request"""
+        self.client.request('batch_get')
+        return [self.read(*parse_range(r)) for r in ranges]
+
+    def write(self, start_row: int, start_col: int, values: List[List], grow: bool = False):
+        """Write a block of values at a 0-based position (400 past the grid unless grow is set)"""
+        if not values:
+            return
+        width = max(len(r) for r in values)
+        row_count, col_count = self.grid()
+        end_row, end_col = start_row + len(values), start_col + width
+
+        db = self.client.db
+        if end_col > col_count or end_row > row_count:
+            if not grow or end_col > col_count:
+                raise api_error(400, f"Range ({self.title}!{rowcol_to_a1(end_row, end_col)}) exceeds grid limits. "
+                                     f"Max rows: {row_count}, max columns: {col_count}")
+            db.execute("UPDATE worksheets SET row_count = ? WHERE spreadsheet = ? AND title = ?",
+                       (end_row, self.spreadsheet, self.title))
+
+        existing = dict(db.execute(
+            "SELECT row, vals FROM cells WHERE spreadsheet = ? AND title = ? AND row >= ? AND row < ?",
+            (self.spreadsheet, self.title, start_row, end_row)).fetchall())
+
+        updates = []
+        for offset, new_values in enumerate(values):
+            row = start_row + offset
+            cells = json.loads(existing[row]) if row in existing else []
+            if len(cells) < start_col + len(new_values):
+                cells.extend([""] * (start_col + len(new_values) - len(cells)))
+            cells[start_col:start_col + len(new_values)] = [cell_text(v) for v in new_values]
+            updates.append((self.spreadsheet, self.title, row, json.dumps(cells)))
+
+        db.executemany("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?)", updates)
+        db.commit()
+        self.client.stats['cells_written'] += sum(len(r) for r in values)
+
+    def update(self, values=None, range_name: Optional[str] = None, **kwargs) -> Dict:
+        """Write values to a range (accepts the older update(range_name, values) argument order too)"""
+        if isinstance(values, str) and not isinstance(range_name, str):
+            values, range_name = range_name, values
+        self.client.request('update')
+
+        start_row, _, start_col, _ = parse_range(range_name or "A1")
+        with self.client.lock:
+            self.write(start_row, start_col, values)
+
+        end = rowcol_to_a1(start_row + len(values), start_col + max((len(r) for r in values), default=1))
+        return {'updatedRange': f"'{self.title}'!{rowcol_to_a1(start_row + 1, start_col + 1)}:{end}",
+                'updatedRows': len(values)}
+
+    def append_rows(self, values: List[List], value_input_option: str = 'RAW',
+                    insert_data_option: Optional[str] = None, table_range: Optional[str] = None, **kwargs) -> Dict:
+        """Append rows after the last non-empty row (the grid grows as needed)"""
+        self.client.request('append_rows')
+
+        with self.client.lock:
+            last_row = self.client.db.execute("SELECT MAX(row) FROM cells WHERE spreadsheet = ? AND title = ?",
+                                              (self.spreadsheet, self.title)).fetchone()[0]
+            start_row = 0 if last_row is None else last_row + 1
+            self.write(start_row, 0, values, grow=True)
+
+        width = max((len(r) for r in values), default=1)
+        return {'tableRange': f"'{self.title}'!A1:{rowcol_to_a1(max(start_row, 1), width)}",
+                'updates': {'updatedRange': f"'{self.title}'!A{start_row + 1}:"
+                                            f"{rowcol_to_a1(start_row + len(values), width)}",
+                            'updatedRows': len(values)}}
+
+    def hide(self) -> Dict:
+        """Hide the worksheet tab"""
+        self.client.request('hide')
+        with self.client.lock:
+            self.client.db.execute("UPDATE worksheets SET hidden = 1 WHERE spreadsheet = ? AND title = ?",
+                                   (self.spreadsheet, self.title))
+            self.client.db.commit()
+        return {}
+
+    def clear(self) -> Dict:
+        """Remove every value (the grid keeps its size)"""
+        self.client.request('clear')
+        with self.client.lock:
+            self.client.db.execute("DELETE FROM cells WHERE spreadsheet = ? AND title = ?",
+                                   (self.spreadsheet, self.title))
+            self.client.db.commit()
+        return {'clearedRange': f"'{self.title}'"}
+
+
+def client_from_env() -> Optional[FakeSheetsClient]:
+    """
+    FakeSheetsClient on the database named by BPI_FAKE_SHEETS (None when the variable is unset),
+    with the latency, quota and errors set by the BPI_FAKE_SHEETS_* fault variables
+    """
+    path = os.environ.get(FAKE_SHEETS_ENV)
+    if not path:
+        return None
+
+    faults = {}
+    for name, (argument, parse) in FAKE_SHEETS_FAULT_ENV.items():
+        value = os.environ.get(name)
+        if not value:
+            continue
+        try:
+            faults[argument] = parse(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number, got {value!r}") from None
+
+    logger.info("Using local fake Google Sheets backend: %s (faults: %s)", path, faults or "none")
+    return FakeSheetsClient(path, **faults)
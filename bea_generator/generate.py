@@ -1,17 +1,73 @@
-import random
+import argparse
 import datetime
+import hashlib
+import json
+import logging
+import sys
 import gspread
 from google.oauth2.service_account import Credentials
 import pandas as pd
 import time
 import os
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple, Optional
+
+from branch_profiles import CAPACITY_STANDARDS, BranchProfiles, tellers_on_duty
+from random_streams import RandomStreams
+from transaction_batch import ARRAY_DTYPES, SENTIMENTS, TransactionBatch, clock_strings
+from alias_table import AliasTable
+from arrivals import DEFAULT_HOURLY_PROFILES, build_arrival_profiles
+from calendar_table import DEFAULT_DEMAND_FACTORS, CalendarTable, load_holidays
+from teller_queue import lindley_waits
+from sinks import ParquetSink
+from sheets_sink import BackgroundUploader, SheetsAppender, WriteScheduler
+from fake_sheets import client_from_env
+from watermark import DateManifest, manifest_path
+from checkpoint import StreamCheckpoint
+from summary import SummaryAccumulator
+from metrics import (BATCH_GENERATION_SECONDS, ROWS_GENERATED, ROWS_WRITTEN, STREAM_EMIT_LAG, STREAM_ROWS_PENDING,
+                     MetricsExporter)
+from shards import (block_branches, cell_file, cell_grid, cell_key, combine_csv, load_shard_manifests, parse_shard,
+                    shard_cells, validate_shards, write_dataset_manifest, write_shard_manifest)
+
+logger = logging.getLogger(__name__)
+
+# Your Google Sheet ID and service account credentials
+SHEET_ID = "1rHjXMxilei_FCJN49NDKmdFz8kSiX4ryCnaHPNcqeDc"
+CREDENTIALS_PATH = "trashscan-450913-39acb2996c94.json"
+
+# Column order of every generated transaction (CSV, Parquet and batch layout)
+TRANSACTION_COLUMNS = [
+    'transaction_id', 'customer_id', 'branch_name', 'transaction_type', 'waiting_time', 'processing_time',
+    'transaction_time', 'date', 'timestamp', 'sentiment', 'sentiment_score', 'review_id', 'review_text', 'bhs'
+]
+
+# Google Sheets keeps the original 12-column layout (compute.py and existing sheets rely on it);
+# columns added since are appended after it, and an existing legacy header is extended in place
+LEGACY_SHEET_COLUMNS = [
+    'transaction_id', 'customer_id', 'branch_name', 'transaction_type', 'waiting_time', 'processing_time',
+    'transaction_time', 'date', 'sentiment', 'sentiment_score', 'review_text', 'bhs'
+]
+SHEET_COLUMNS = LEGACY_SHEET_COLUMNS + ['timestamp', 'review_id']
+
+# Memory model for memory_budget_mb: bytes per row as a TransactionBatch and as a DataFrame being written,
+# the most rows one branch-day can have before seasonal demand (peak volume x 110% draw x 120% branch
+# variation) and a fallback process baseline where RSS cannot be read
+BATCH_ROW_BYTES = sum(np.dtype(dtype).itemsize for dtype in ARRAY_DTYPES.values())
+FRAME_ROW_BYTES = 1536
+MAX_BRANCH_DAY_ROWS = int(CAPACITY_STANDARDS['peak_day'] * 1.10 * 1.2) + 1
+BASELINE_RSS_MB = 200
 
 
 class BPITransactionGenerator:
     def __init__(self, sheet_id: str, credentials_path: str = None,
-                 data_dispersion: float = 1.0, good_data_percentage: float = 70.0):
+                 data_dispersion: float = 1.0, good_data_percentage: float = 70.0,
+                 vectorized: bool = False, seed: Optional[int] = None, workers: int = 1,
+                 shard_branches: int = 50, shard_days: int = 7, sheets_client=None,
+                 include_review_text: bool = False, hourly_profiles: Optional[Dict[str, List[float]]] = None,
+                 queue_model: bool = False, memory_budget_mb: Optional[float] = None,
+                 seasonal_demand: bool = False, output_dir: str = "."):
         """
         Initialize the BPI Transaction Generator with improved data control
 
@@ -20,20 +76,76 @@ class BPITransactionGenerator:
             credentials_path: Path to Google credentials file
             data_dispersion: Controls how spread out the data is (0.5 = tight, 2.0 = very spread)
             good_data_percentage: Percentage of transactions that should be "good" (fast, high sentiment)
+            vectorized: Draw each branch-day with NumPy array operations instead of a per-row loop
+            seed: Master seed for the per-(branch, date) random streams (None = fresh seed every run)
+            workers: Number of worker processes for branch-day generation (1 = single process)
+            shard_branches: Branches per parallel shard
+            shard_days: Days per parallel shard
+            sheets_client: Ready gspread-compatible client, e.g. FakeSheetsClient (used instead of credentials_path)
+            include_review_text: Join review text into CSV/Parquet output (review_id is always written;
+                Sheets always carries review_text, as in the legacy layout)
+            hourly_profiles: {'normal': 24 rates, 'peak': 24 rates} arrival profile per hour of day
+                (default: DEFAULT_HOURLY_PROFILES in arrivals.py)
+            queue_model: Derive waiting times from arrivals, processing times and the branch's tellers
+                (Lindley recursion per teller lane) instead of drawing them independently
+            memory_budget_mb: Resident memory limit for batch generation; worker count, days in flight and
+                batch size are fitted to it and exceeding it raises MemoryError (None = no limit)
+            seasonal_demand: Scale daily customer volume by the calendar's demand multipliers (holidays,
+                paydays, month-end, December); off keeps the plain normal/peak day volumes
+            output_dir: Directory for local state such as the date manifest
         """
         self.sheet_id = sheet_id
         self.branches = []  # Will be loaded from CSV
         self.review_samples = {}  # Will be loaded from review CSV
+        self.review_texts = []  # Interned review texts (batches store ids into this table)
+        self.review_ids_by_sentiment = {}  # Review ids per sentiment, in review_samples order
+        self.review_weights = {}  # Optional sampling weights per sentiment ('weight' column of the review CSV)
+        self.review_samplers: Dict[str, AliasTable] = {}  # Alias table per sentiment over review_ids_by_sentiment
+        self.review_index: Dict[str, int] = {}  # Review text -> review_id
+
+        # Sinks write review_id; the text itself is only joined in on request
+        self.include_review_text = include_review_text
+        self.output_columns = [c for c in TRANSACTION_COLUMNS if include_review_text or c != 'review_text']
+        self.sheets_appenders: Dict[str, SheetsAppender] = {}  # Cached row cursor per worksheet
+        self.write_scheduler = WriteScheduler()  # Shared Sheets quota (token bucket + retry on 429/5xx)
+        self.date_manifest: Optional[DateManifest] = None  # Committed dates per worksheet (see watermark.py)
+        self.output_dir = output_dir
 
         # Data quality control parameters
         self.data_dispersion = max(0.1, min(5.0, data_dispersion))  # Clamp between 0.1 and 5.0
         self.good_data_percentage = max(10.0, min(95.0, good_data_percentage))  # Clamp between 10% and 95%
         self.bad_data_percentage = 100.0 - self.good_data_percentage
 
-        print(f"📊 Data Configuration:")
-        print(f"   Dispersion Factor: {self.data_dispersion} (0.5=tight, 2.0=spread)")
-        print(f"   Good Data: {self.good_data_percentage}%")
-        print(f"   Bad Data: {self.bad_data_percentage}%")
+        logger.info("📊 Data Configuration:")
+        logger.info("   Dispersion Factor: %s (0.5=tight, 2.0=spread)", self.data_dispersion)
+        logger.info("   Good Data: %s%%", self.good_data_percentage)
+        logger.info("   Bad Data: %s%%", self.bad_data_percentage)
+
+        self.vectorized = vectorized
+
+        # Intraday arrival profiles (non-homogeneous Poisson), one for normal and one for peak days
+        self.hourly_profiles = hourly_profiles or DEFAULT_HOURLY_PROFILES
+        self.arrival_profiles = build_arrival_profiles(self.hourly_profiles)
+        self.queue_model = queue_model
+
+        logger.info("   Waiting times: %s", 'teller queue model' if queue_model else 'independent draws')
+
+        # Per-date flags and demand multipliers, looked up by array index (see calendar_table.py)
+        self.seasonal_demand = seasonal_demand
+        self.holidays = {}  # Will be loaded from the holiday CSV
+        self.build_calendar()
+
+        # Parallel generation over (branch-block, date-block) shards
+        self.workers = max(1, workers)
+        self.shard_branches = max(1, shard_branches)
+        self.shard_days = max(1, shard_days)
+        self.memory_budget_mb = memory_budget_mb
+
+        # Independent, reproducible random stream per (seed, branch, date, purpose) - never global state
+        self.streams = RandomStreams(seed)
+        self.requested_seed = seed  # None: fresh seed, so a resumed stream takes the interrupted run's seed
+        self.random = self.streams.python_random(purpose='default')  # Replaced per branch-day
+        self.branch_profiles = BranchProfiles(self.streams)  # Per-branch parameters, built once per branch
 
         # Enhanced transaction type configurations with dispersion control
         self.transaction_config = {
@@ -116,33 +228,37 @@ class BPITransactionGenerator:
             }
         }
 
-        # Initialize Google Sheets connection if credentials provided
-        if credentials_path:
+        # Array views of transaction_config used by the vectorized engine
+        self.build_vectorized_tables()
+
+        # Initialize Google Sheets connection if credentials (or a ready client) provided
+        self.gc = sheets_client
+        if sheets_client is None and credentials_path:
             self.setup_sheets_connection(credentials_path)
-        else:
-            self.gc = None
-            print("No credentials provided. Will generate data only (no Google Sheets upload)")
+        elif sheets_client is None:
+            logger.info("No credentials provided. Will generate data only (no Google Sheets upload)")
 
     def load_branches(self, csv_file: str = "branch.csv") -> bool:
         """Load branch names from CSV file"""
         try:
             if not os.path.exists(csv_file):
-                print(f"Branch CSV file '{csv_file}' not found!")
+                logger.error("Branch CSV file '%s' not found!", csv_file)
                 return False
 
             branch_df = pd.read_csv(csv_file)
 
             if 'branch_name' not in branch_df.columns:
-                print(f"Column 'branch_name' not found in {csv_file}")
-                print(f"Available columns: {list(branch_df.columns)}")
+                logger.error("Column 'branch_name' not found in %s", csv_file)
+                logger.info("Available columns: %s", list(branch_df.columns))
                 return False
 
             self.branches = branch_df['branch_name'].dropna().unique().tolist()
-            print(f"Loaded {len(self.branches)} branches: {', '.join(self.branches)}")
+            self.branch_profiles.add_branches(self.branches)
+            logger.info("Loaded %d branches: %s", len(self.branches), ', '.join(self.branches))
             return True
 
         except Exception as e:
-            print(f"Error loading branches from {csv_file}: {e}")
+            logger.error("Error loading branches from %s: %s", csv_file, e)
             return False
 
     def setup_sheets_connection(self, credentials_path: str):
@@ -154,21 +270,22 @@ class BPITransactionGenerator:
             ]
             credentials = Credentials.from_service_account_file(credentials_path, scopes=scope)
             self.gc = gspread.authorize(credentials)
-            print("Google Sheets connection established successfully!")
+            logger.info("Google Sheets connection established successfully!")
         except Exception as e:
-            print(f"An error occurred: {e}")
+            self.gc = None
+            logger.error("An error occurred: %s", e)
 
     def load_review_samples(self, csv_file: str = "bpi_review_samples.csv") -> bool:
         """Load review text samples from CSV file"""
         try:
             if not os.path.exists(csv_file):
-                print(f"Review samples CSV file '{csv_file}' not found!")
+                logger.error("Review samples CSV file '%s' not found!", csv_file)
                 return False
 
             review_df = pd.read_csv(csv_file)
 
             if 'sentiment' not in review_df.columns or 'review_text' not in review_df.columns:
-                print(f"Required columns 'sentiment' and 'review_text' not found in {csv_file}")
+                logger.error("Required columns 'sentiment' and 'review_text' not found in %s", csv_file)
                 return False
 
             # Group reviews by sentiment
@@ -178,63 +295,120 @@ class BPITransactionGenerator:
                 'neutral': review_df[review_df['sentiment'] == 'neutral']['review_text'].tolist()
             }
 
-            print(f"Loaded review samples: {len(self.review_samples['positive'])} positive, "
-                  f"{len(self.review_samples['negative'])} negative, {len(self.review_samples['neutral'])} neutral")
+            # Optional relative weights (uniform when the column is absent)
+            self.review_weights = {}
+            if 'weight' in review_df.columns:
+                self.review_weights = {
+                    sentiment: review_df[review_df['sentiment'] == sentiment]['weight'].astype(float).tolist()
+                    for sentiment in self.review_samples
+                }
+
+            self.build_review_table()
+
+            logger.info("Loaded review samples: %d positive, %d negative, %d neutral",
+                        len(self.review_samples['positive']), len(self.review_samples['negative']),
+                        len(self.review_samples['neutral']))
             return True
 
         except Exception as e:
-            print(f"Error loading review samples from {csv_file}: {e}")
+            logger.error("Error loading review samples from %s: %s", csv_file, e)
             return False
 
-    def is_peak_day(self, date: datetime.date) -> bool:
-        """Determine if a given date is a peak day"""
-        # Monday = 0, Sunday = 6
-        weekday = date.weekday()
-        day = date.day
+    def load_hourly_profiles(self, csv_file: str = "bpi_hourly_profiles.csv") -> bool:
+        """Load hourly arrival profiles from CSV file (columns: hour, normal, peak)"""
+        try:
+            if not os.path.exists(csv_file):
+                logger.error("Hourly profiles CSV file '%s' not found!", csv_file)
+                return False
+
+            profile_df = pd.read_csv(csv_file)
+
+            if not {'hour', 'normal', 'peak'}.issubset(profile_df.columns):
+                logger.error("Required columns 'hour', 'normal' and 'peak' not found in %s", csv_file)
+                return False
+
+            # Hours missing from the file are closed
+            profile_df = profile_df.set_index('hour').reindex(range(24), fill_value=0)
+            hourly_profiles = {period: profile_df[period].astype(float).tolist() for period in ('normal', 'peak')}
+            self.arrival_profiles = build_arrival_profiles(hourly_profiles)
+            self.hourly_profiles = hourly_profiles
+
+            open_hours = {period: int((profile_df[period] > 0).sum()) for period in ('normal', 'peak')}
+            logger.info("Loaded hourly profiles: %s open hours on normal days, %s on peak days",
+                        open_hours['normal'], open_hours['peak'])
+            return True
 
-        # Peak days: Mondays (0), Fridays (4), 15th, and 30th of month
-        return weekday in [0, 4] or day in [15, 30]
+        except Exception as e:
+            logger.error("Error loading hourly profiles from %s: %s", csv_file, e)
+            return False
+
+    def load_holidays(self, csv_file: str = "ph_holidays.csv") -> bool:
+        """Load public holidays from CSV file (columns: date, name, type = regular/special)"""
+        try:
+            if not os.path.exists(csv_file):
+                logger.error("Holiday CSV file '%s' not found!", csv_file)
+                return False
+
+            self.holidays = load_holidays(csv_file)
+            self.build_calendar()
+            logger.info("Loaded %d holidays from %s", len(self.holidays), csv_file)
+            return True
+
+        except Exception as e:
+            logger.error("Error loading holidays from %s: %s", csv_file, e)
+            return False
+
+    def build_calendar(self):
+        """(Re)build the calendar table from the loaded holidays"""
+        self.calendar = CalendarTable(self.holidays, DEFAULT_DEMAND_FACTORS if self.seasonal_demand else None)
+
+    def is_peak_day(self, date: datetime.date) -> bool:
+        """Determine if a given date is a peak day (Mondays, Fridays, 15th and 30th of month)"""
+        return bool(self.calendar.day(date)['is_peak'])
 
     def get_customer_volume(self, date: datetime.date, branch_name: str) -> int:
         """Get expected customer volume for a given date and branch (with realistic variations)"""
-        # Create branch-specific seed for consistent but different patterns
-        branch_seed = hash(branch_name + date.strftime("%Y-%m-%d")) % 1000
-        random.seed(branch_seed)
+        # Branch-day stream gives consistent but different patterns without touching global RNG
+        rng = self.streams.generator(branch_name, date, 'volume')
 
-        # Branch-specific performance factors (some branches are busier than others)
-        branch_performance_factor = (hash(branch_name) % 100) / 100.0  # 0.0 to 1.0
+        base_volume = CAPACITY_STANDARDS['normal_day']  # Standard volume
+        peak_volume = CAPACITY_STANDARDS['peak_day']  # Peak volume
 
-        base_volume = 190  # Standard volume
-        peak_volume = 310  # Peak volume
+        # Branch-specific variation (±20%, some branches are busier than others) from the profile table
+        branch_variation = self.branch_profiles.get(branch_name)['volume_variation']  # 0.8 to 1.2
 
-        # Apply branch-specific variation (±20%)
-        branch_variation = 0.8 + (branch_performance_factor * 0.4)  # 0.8 to 1.2
+        # Seasonal demand (1.0 unless seasonal_demand is on)
+        day = self.calendar.day(date)
+        demand = float(day['demand_multiplier'])
 
-        if self.is_peak_day(date):
+        if day['is_peak']:
             # Peak day with some variation (85-110% of peak volume)
-            volume = int(peak_volume * random.uniform(0.85, 1.10) * branch_variation)
+            volume = int(peak_volume * rng.uniform(0.85, 1.10) * branch_variation * demand)
         else:
             # Normal day with more variation (70-115% of base volume)
-            volume = int(base_volume * random.uniform(0.70, 1.15) * branch_variation)
-
-        # Reset random seed to maintain randomness for other operations
-        random.seed()
+            volume = int(base_volume * rng.uniform(0.70, 1.15) * branch_variation * demand)
 
         return max(90, volume)  # Minimum 90 customers per day
 
     def get_branch_performance_factor(self, branch_name: str) -> float:
-        """Get branch-specific performance factor that affects transaction times"""
-        # Create consistent but varied performance factors for each branch
-        branch_hash = hash(branch_name) % 1000
-        np.random.seed(branch_hash)
-
-        # Generate performance factor: 0.7 to 1.3 (some branches are faster/slower)
-        performance_factor = 0.7 + (np.random.random() * 0.6)
+        """Get branch-specific performance factor that affects transaction times (0.7 to 1.3)"""
+        return float(self.branch_profiles.get(branch_name)['performance_factor'])
 
-        # Reset seed
-        np.random.seed(None)
+    def save_branch_profiles(self, path: str = "branch_profiles.npz"):
+        """Save the per-branch profile table so a run can be reproduced later"""
+        self.branch_profiles.add_branches(self.branches)
+        self.branch_profiles.save(path)
+        logger.info("Saved %d branch profiles to %s", len(self.branch_profiles.names), path)
 
-        return performance_factor
+    def load_branch_profiles(self, path: str = "branch_profiles.npz") -> bool:
+        """Reload a saved per-branch profile table"""
+        try:
+            self.branch_profiles = BranchProfiles.load(path, self.streams)
+            logger.info("Loaded %d branch profiles from %s", len(self.branch_profiles.names), path)
+            return True
+        except Exception as e:
+            logger.error("Error loading branch profiles from %s: %s", path, e)
+            return False
 
     def generate_transaction_id(self, customer_num: int, is_bulk: bool, date: datetime.date, branch_name: str) -> str:
         """Generate transaction ID format: BranchInitials + Date + CustomerType + Number"""
@@ -248,7 +422,7 @@ class BPITransactionGenerator:
         """Get random transaction type based on weights"""
         types = list(self.transaction_config.keys())
         weights = [self.transaction_config[t]['weight'] for t in types]
-        return random.choices(types, weights=weights)[0]
+        return self.random.choices(types, weights=weights)[0]
 
     def get_waiting_processing_time(self, transaction_type: str, is_peak: bool, branch_name: str = None) -> Tuple[
         int, int]:
@@ -257,7 +431,7 @@ class BPITransactionGenerator:
         period = 'peak' if is_peak else 'normal'
 
         # Determine if this transaction is "good" or "bad" based on percentage
-        is_good = random.random() < self.good_data_percentage / 100.0
+        is_good = self.random.random() < self.good_data_percentage / 100.0
 
         if is_good:
             # Good data: use the 'good' range
@@ -273,8 +447,8 @@ class BPITransactionGenerator:
         processing_range = processing_max - processing_min
 
         # Use normal distribution for more realistic spread
-        waiting_time = int(waiting_min + (random.gauss(0.5, 0.2) * waiting_range * self.data_dispersion))
-        processing_time = int(processing_min + (random.gauss(0.5, 0.2) * processing_range * self.data_dispersion))
+        waiting_time = int(waiting_min + (self.random.gauss(0.5, 0.2) * waiting_range * self.data_dispersion))
+        processing_time = int(processing_min + (self.random.gauss(0.5, 0.2) * processing_range * self.data_dispersion))
 
         # Apply branch-specific performance factor if branch name provided
         if branch_name:
@@ -293,31 +467,31 @@ class BPITransactionGenerator:
         # If is_good_transaction is provided, use it; otherwise determine based on time
         if is_good_transaction is None:
             # Determine if this should be a good transaction based on percentage
-            is_good_transaction = random.random() < self.good_data_percentage / 100.0
+            is_good_transaction = self.random.random() < self.good_data_percentage / 100.0
 
         if is_good_transaction:
             # Good transaction: higher sentiment scores
             if total_time <= 8:
-                base_score = random.uniform(4.0, 5.0)  # Excellent
+                base_score = self.random.uniform(4.0, 5.0)  # Excellent
             elif total_time <= 15:
-                base_score = random.uniform(3.5, 4.5)  # Very good
+                base_score = self.random.uniform(3.5, 4.5)  # Very good
             elif total_time <= 25:
-                base_score = random.uniform(3.0, 4.0)  # Good
+                base_score = self.random.uniform(3.0, 4.0)  # Good
             else:
-                base_score = random.uniform(2.5, 3.5)  # Acceptable
+                base_score = self.random.uniform(2.5, 3.5)  # Acceptable
         else:
             # Bad transaction: lower sentiment scores
             if total_time <= 10:
-                base_score = random.uniform(2.5, 3.5)  # Neutral to slightly positive
+                base_score = self.random.uniform(2.5, 3.5)  # Neutral to slightly positive
             elif total_time <= 20:
-                base_score = random.uniform(2.0, 3.0)  # Neutral
+                base_score = self.random.uniform(2.0, 3.0)  # Neutral
             elif total_time <= 30:
-                base_score = random.uniform(1.5, 2.5)  # Slightly negative
+                base_score = self.random.uniform(1.5, 2.5)  # Slightly negative
             else:
-                base_score = random.uniform(1.0, 2.0)  # Negative
+                base_score = self.random.uniform(1.0, 2.0)  # Negative
 
         # Add controlled randomness based on dispersion
-        variation = random.gauss(0, 0.3) * self.data_dispersion
+        variation = self.random.gauss(0, 0.3) * self.data_dispersion
         sentiment_score = max(1.0, min(5.0, base_score + variation))
 
         # Determine sentiment category
@@ -328,28 +502,216 @@ class BPITransactionGenerator:
         else:
             sentiment = "positive"
 
-        # Get random review text for this sentiment
+        # Get random review text for this sentiment (O(1) alias-table draw)
         review_text = ""
-        if self.review_samples and sentiment in self.review_samples:
-            if self.review_samples[sentiment]:
-                review_text = random.choice(self.review_samples[sentiment])
+        sampler = self.review_samplers.get(sentiment)
+        if sampler is not None:
+            review_id = self.review_ids_by_sentiment[sentiment][sampler.sample_one(self.random)]
+            review_text = self.review_texts[review_id]
 
         return sentiment, round(sentiment_score, 2), review_text
 
+    def build_vectorized_tables(self):
+        """Build NumPy lookup tables from transaction_config for the vectorized engine"""
+        self.transaction_types = list(self.transaction_config.keys())
+        weights = np.array([self.transaction_config[t]['weight'] for t in self.transaction_types], dtype=float)
+        self.transaction_type_probs = weights / weights.sum()
+
+        # Time ranges indexed as [type, period (0=normal, 1=peak), quality (0=good, 1=bad), (min, max)]
+        periods = ['normal', 'peak']
+        qualities = ['good', 'bad']
+        self.waiting_ranges = np.array([
+            [[self.transaction_config[t]['waiting_time'][p][q] for q in qualities] for p in periods]
+            for t in self.transaction_types
+        ], dtype=float)
+        self.processing_ranges = np.array([
+            [[self.transaction_config[t]['processing_time'][p][q] for q in qualities] for p in periods]
+            for t in self.transaction_types
+        ], dtype=float)
+
+        # Sentiment bands from generate_sentiment: upper total-time bounds and the low end of
+        # each uniform score band (every band is 1.0 wide)
+        self.sentiment_bands = {
+            True: (np.array([8, 15, 25]), np.array([4.0, 3.5, 3.0, 2.5])),
+            False: (np.array([10, 20, 30]), np.array([2.5, 2.0, 1.5, 1.0]))
+        }
+
+    def draw_transaction_arrays(self, customer_volume: int, is_peak: bool, performance_factor: float,
+                                rng: np.random.Generator, tellers: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Draw one branch-day of transactions as NumPy arrays (same distributions as the scalar path)
+
+        With tellers > 0 the waiting times come from the teller queue instead of their own draw.
+        """
+        n = customer_volume
+        period = 1 if is_peak else 0
+
+        # Bulk flags and weighted transaction types
+        is_bulk = rng.random(n) < 0.20
+        type_codes = rng.choice(len(self.transaction_types), size=n, p=self.transaction_type_probs)
+
+        # Good/bad quality for the times, then gauss-spread waiting and processing times
+        time_quality = (rng.random(n) >= self.good_data_percentage / 100.0).astype(np.intp)
+        waiting_bounds = self.waiting_ranges[type_codes, period, time_quality]
+        processing_bounds = self.processing_ranges[type_codes, period, time_quality]
+
+        waiting_spread = rng.normal(0.5, 0.2, n) * (waiting_bounds[:, 1] - waiting_bounds[:, 0]) * self.data_dispersion
+        processing_spread = rng.normal(0.5, 0.2, n) * (processing_bounds[:, 1] - processing_bounds[:, 0]) * self.data_dispersion
+        waiting_time = np.trunc(waiting_bounds[:, 0] + waiting_spread)
+        processing_time = np.trunc(processing_bounds[:, 0] + processing_spread)
+
+        # Branch-specific performance factor, truncated like int() and floored at 1 minute
+        waiting_time = np.maximum(1, np.trunc(waiting_time * performance_factor)).astype(np.int64)
+        processing_time = np.maximum(1, np.trunc(processing_time * performance_factor)).astype(np.int64)
+
+        arrival_seconds = None
+        if tellers:
+            # Queue model: waits build up from arrivals and service times, so arrivals are needed here
+            arrival_seconds = self.arrival_profiles[is_peak].sample(rng, n)
+            waiting_time = queue_wait_minutes(lindley_waits(arrival_seconds, processing_time * 60, tellers))
+        transaction_time = waiting_time + processing_time
+
+        # Independent good/bad draw for sentiment, then pick the score band by total time
+        is_good_sentiment = rng.random(n) < self.good_data_percentage / 100.0
+        band_low = np.empty(n)
+        for quality, (thresholds, lows) in self.sentiment_bands.items():
+            mask = is_good_sentiment == quality
+            band_low[mask] = lows[np.searchsorted(thresholds, transaction_time[mask], side='left')]
+
+        base_score = band_low + rng.random(n)
+        variation = rng.normal(0, 0.3, n) * self.data_dispersion
+        sentiment_score = np.clip(base_score + variation, 1.0, 5.0)
+
+        # Sentiment codes index SENTIMENTS: negative < 2 <= neutral < 3 <= positive
+        sentiment_codes = np.digitize(sentiment_score, [2, 3])
+
+        # Review picks: alias-table draw within each sentiment's samples (-1 = no review text)
+        review_ids = np.full(n, -1, dtype=np.int16)
+        for category in ('positive', 'negative', 'neutral'):
+            sampler = self.review_samplers.get(category)
+            if sampler is None:
+                continue
+            mask = sentiment_codes == SENTIMENTS.index(category)
+            review_ids[mask] = self.review_ids_by_sentiment[category][sampler.sample(rng, int(mask.sum()))]
+
+        if arrival_seconds is None:
+            # Drawn last so the columns above do not depend on the arrival profile
+            arrival_seconds = self.arrival_profiles[is_peak].sample(rng, n)
+
+        return {
+            'is_bulk': is_bulk,
+            'type_codes': type_codes,
+            'waiting_time': waiting_time,
+            'processing_time': processing_time,
+            'transaction_time': transaction_time,
+            'sentiment_codes': sentiment_codes,
+            'sentiment_score': np.round(sentiment_score, 2),
+            'review_ids': review_ids,
+            'arrival_seconds': arrival_seconds
+        }
+
+    def build_review_table(self):
+        """Intern review samples into one indexed table (batches carry ids into review_texts) with alias samplers"""
+        self.review_texts = list(dict.fromkeys(text for texts in self.review_samples.values() for text in texts))
+        self.review_index = {text: i for i, text in enumerate(self.review_texts)}
+        self.review_ids_by_sentiment = {
+            sentiment: np.array([self.review_index[text] for text in texts], dtype=np.int16)
+            for sentiment, texts in self.review_samples.items()
+        }
+        self.review_samplers = {
+            sentiment: AliasTable(self.review_weights.get(sentiment) or np.ones(len(texts)))
+            for sentiment, texts in self.review_samples.items() if texts
+        }
+
+    def save_review_table(self, path: str = "bpi_review_table.csv"):
+        """Write the review_id -> review_text lookup so id-only output can be joined later"""
+        pd.DataFrame({'review_id': range(len(self.review_texts)), 'review_text': self.review_texts}).to_csv(
+            path, index=False)
+        logger.info("Review text lookup saved to %s (%d texts)", path, len(self.review_texts))
+
+    def load_review_table(self, path: str = "bpi_review_table.csv") -> bool:
+        """Load a review_id -> review_text lookup written by save_review_table (to join id-only output)"""
+        try:
+            if not os.path.exists(path):
+                logger.error("Review table '%s' not found!", path)
+                return False
+
+            table = pd.read_csv(path, keep_default_na=False).sort_values('review_id')
+            if table['review_id'].tolist() != list(range(len(table))):
+                logger.error("Review ids in %s are not 0..%d", path, len(table) - 1)
+                return False
+
+            self.review_texts = table['review_text'].astype(str).tolist()
+            self.review_index = {text: i for i, text in enumerate(self.review_texts)}
+            logger.info("Loaded review table: %d texts from %s", len(self.review_texts), path)
+            return True
+
+        except Exception as e:
+            logger.error("Error loading review table from %s: %s", path, e)
+            return False
+
+    def empty_batch(self) -> TransactionBatch:
+        """Batch with no rows, sharing this generator's dictionaries"""
+        return TransactionBatch.empty(self.branch_profiles.names, self.transaction_types, self.review_texts)
+
+    def generate_daily_batch_for_branch(self, date: datetime.date, branch_name: str) -> TransactionBatch:
+        """Generate all transactions for a specific date and branch as a columnar batch"""
+        if not self.vectorized:
+            transactions = self.generate_daily_transactions_for_branch(date, branch_name)
+            return TransactionBatch.from_records(transactions, self.branch_profiles.names,
+                                                 self.transaction_types, self.review_texts)
+
+        is_peak = self.is_peak_day(date)
+        customer_volume = self.get_customer_volume(date, branch_name)
+
+        logger.debug("  └─ %s: %d transactions (%s day)", branch_name, customer_volume, 'Peak' if is_peak else 'Normal')
+
+        # One profile lookup per branch-day, then the whole day in a few array draws
+        branch_id = self.branch_profiles.branch_id(branch_name)
+        profile = self.branch_profiles.table[branch_id]
+        tellers = tellers_on_duty(profile['tellers'], is_peak) if self.queue_model else 0
+        rng = self.streams.generator(branch_name, date, 'transactions')
+        arrays = self.draw_transaction_arrays(customer_volume, is_peak, float(profile['performance_factor']), rng,
+                                              tellers)
+
+        # Sequential numbering per customer kind (bulk and normal counters run independently)
+        is_bulk = arrays['is_bulk']
+        arrays['sequence'] = np.where(is_bulk, np.cumsum(is_bulk), np.cumsum(~is_bulk))
+        arrays['branch_ids'] = np.full(customer_volume, branch_id)
+        arrays['date_ordinals'] = np.full(customer_volume, date.toordinal())
+
+        return TransactionBatch(self.branch_profiles.names, self.transaction_types, self.review_texts, **arrays)
+
     def generate_daily_transactions_for_branch(self, date: datetime.date, branch_name: str) -> List[Dict]:
         """Generate all transactions for a specific date and branch"""
+        if self.vectorized:
+            batch = self.generate_daily_batch_for_branch(date, branch_name)
+            return batch.to_pandas(review_text=True).to_dict('records')
+
         is_peak = self.is_peak_day(date)
         customer_volume = self.get_customer_volume(date, branch_name)
 
+        logger.debug("  └─ %s: %d transactions (%s day)", branch_name, customer_volume, 'Peak' if is_peak else 'Normal')
+
+        # Scalar helpers draw from this branch-day's own stream
+        self.random = self.streams.python_random(branch_name, date, 'transactions')
+
+        # Sorted arrival times, handed out in customer order
+        arrival_rng = self.streams.generator(branch_name, date, 'arrivals')
+        arrival_seconds = self.arrival_profiles[is_peak].sample(arrival_rng, customer_volume).tolist()
+        date_str = date.strftime('%Y-%m-%d')
+
+        # Queue model: time each teller lane frees up (customer i joins lane i % tellers)
+        tellers = tellers_on_duty(self.branch_profiles.get(branch_name)['tellers'], is_peak) if self.queue_model else 0
+        lane_free = [0] * tellers
+
         transactions = []
         normal_counter = 1
         bulk_counter = 1
 
-        print(f"  └─ {branch_name}: {customer_volume} transactions ({'Peak' if is_peak else 'Normal'} day)")
-
-        for _ in range(customer_volume):
+        for customer_num, arrival_second in enumerate(arrival_seconds):
             # Determine if this is a bulk transaction (10% chance)
-            is_bulk = random.random() < 0.20
+            is_bulk = self.random.random() < 0.20
 
             # Generate customer ID based on transaction type with sequential numbering
             if is_bulk:
@@ -364,10 +726,16 @@ class BPITransactionGenerator:
             # Get transaction type and times
             transaction_type = self.get_random_transaction_type()
             waiting_time, processing_time = self.get_waiting_processing_time(transaction_type, is_peak, branch_name)
+            if tellers:
+                # One step of the Lindley recursion on this customer's lane
+                lane = customer_num % tellers
+                wait_seconds = max(0, lane_free[lane] - arrival_second)
+                lane_free[lane] = arrival_second + wait_seconds + processing_time * 60
+                waiting_time = int(queue_wait_minutes(wait_seconds))
             transaction_time = waiting_time + processing_time
 
             # Determine if this is a good transaction for consistency
-            is_good_transaction = random.random() < self.good_data_percentage / 100.0
+            is_good_transaction = self.random.random() < self.good_data_percentage / 100.0
 
             # Generate sentiment and review with consistent quality
             sentiment, sentiment_score, review_text = self.generate_sentiment(transaction_time, is_good_transaction)
@@ -380,9 +748,11 @@ class BPITransactionGenerator:
                 'waiting_time': waiting_time,
                 'processing_time': processing_time,
                 'transaction_time': transaction_time,
-                'date': date.strftime('%Y-%m-%d'),
+                'date': date_str,
+                'timestamp': f"{date_str} {clock_strings()[arrival_second]}",
                 'sentiment': sentiment,
                 'sentiment_score': sentiment_score,
+                'review_id': self.review_index.get(review_text, -1),
                 'review_text': review_text,
                 'bhs': ''
             }
@@ -391,266 +761,633 @@ class BPITransactionGenerator:
 
         return transactions
 
-    def generate_all_transactions_mixed(self, start_date: datetime.date, days: int) -> List[Dict]:
-        """Generate all transactions for date range with mixed branch order (not sequential by branch)"""
-        all_transactions = []
+    def generate_branch_days(self, dates: List[datetime.date], branches: Optional[List[str]] = None):
+        """Yield (date, {branch: TransactionBatch}) for each date, serially or across worker processes"""
+        if branches is None:
+            branches = self.branches
+        self.branch_profiles.add_branches(self.branches)
+        self.build_review_table()
+
+        if self.workers <= 1:
+            for date in dates:
+                yield date, {branch: self.generate_daily_batch_for_branch(date, branch) for branch in branches}
+            return
+
+        # Split into (branch-block, date-block) shards; every branch-day has its own random
+        # stream, so the shards reproduce a single-process run exactly
+        branch_blocks = [branches[i:i + self.shard_branches] for i in range(0, len(branches), self.shard_branches)]
+        date_blocks = [dates[i:i + self.shard_days] for i in range(0, len(dates), self.shard_days)]
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_shard_worker,
+                                 initargs=(self.get_worker_settings(),)) as executor:
+            for date_block in date_blocks:
+                futures = [executor.submit(_generate_shard, branch_block, date_block)
+                           for branch_block in branch_blocks]
+
+                # Merge in deterministic order: date, then branch order from self.branches
+                shard_results = [future.result() for future in futures]
+                for date in date_block:
+                    daily_branch_batches = {}
+                    for shard in shard_results:
+                        daily_branch_batches.update(shard.pop(date))  # Released once the day is consumed
+                    yield date, daily_branch_batches
+                del futures, shard_results  # Futures hold their results; free the block before the next one
+
+    def iter_cells(self, cells: List[Tuple[datetime.date, int]]) -> Iterator[Tuple[datetime.date, int, TransactionBatch]]:
+        """Yield (date, block, batch) for (date, branch block) cells of a sharded run (see shards.py)"""
+        dates_by_block: Dict[int, List[datetime.date]] = {}
+        for date, block in cells:
+            dates_by_block.setdefault(block, []).append(date)
+
+        for block, dates in sorted(dates_by_block.items()):
+            branches = block_branches(self.branches, block, self.shard_branches)
+            for date, daily_branch_batches in self.generate_branch_days(dates, branches):
+                cell_batch = TransactionBatch.concat([daily_branch_batches[branch] for branch in branches])
+                ROWS_GENERATED.inc(len(cell_batch))
+                yield date, block, cell_batch
+
+    def get_dataset_settings(self, start_date: datetime.date, days: int, output_format: str) -> Dict:
+        """Everything that decides a dataset's rows; shards of one dataset must agree on all of it"""
+        review_digest = hashlib.blake2b(json.dumps([self.review_samples, self.review_weights], sort_keys=True).encode("utf-8"),
+                                        digest_size=16).hexdigest()
+        return {
+            'seed': self.streams.master_seed,
+            'start_date': start_date.isoformat(),
+            'days': days,
+            'branches': self.branches,
+            'block_size': self.shard_branches,
+            'output_format': output_format,
+            'data_dispersion': self.data_dispersion,
+            'good_data_percentage': self.good_data_percentage,
+            'vectorized': self.vectorized,
+            'queue_model': self.queue_model,
+            'review_text': self.include_review_text,
+            'hourly_profiles': self.hourly_profiles,
+            'review_samples': review_digest,
+            'seasonal_demand': self.seasonal_demand,
+            # Holidays only change the data through seasonal demand
+            'holidays': ({d.isoformat(): list(h) for d, h in sorted(self.holidays.items())}
+                         if self.seasonal_demand else {})
+        }
 
-        print(f"Generating mixed transactions for {days} days across {len(self.branches)} branches...")
+    def get_stream_settings(self, start_date: datetime.date, days: int, records_per_interval: int) -> Dict:
+        """Everything that decides a real-time stream's rows and batches except the seed (checked on resume)"""
+        settings = self.get_dataset_settings(start_date, days, 'realtime')
+        for key in ('seed', 'block_size', 'output_format'):
+            del settings[key]
+        settings['branches'] = hashlib.blake2b(json.dumps(self.branches).encode("utf-8"), digest_size=16).hexdigest()
+        settings['records_per_interval'] = records_per_interval
+        return json.loads(json.dumps(settings))  # As the offset file stores them
+
+    def get_worker_settings(self) -> Dict:
+        """Settings a worker process needs to rebuild an equivalent generator"""
+        return {
+            'sheet_id': self.sheet_id,
+            'data_dispersion': self.data_dispersion,
+            'good_data_percentage': self.good_data_percentage,
+            'vectorized': self.vectorized,
+            'seed': self.streams.master_seed,
+            'transaction_config': self.transaction_config,
+            'review_samples': self.review_samples,
+            'review_weights': self.review_weights,
+            'hourly_profiles': self.hourly_profiles,
+            'queue_model': self.queue_model,
+            'seasonal_demand': self.seasonal_demand,
+            'holidays': self.holidays,
+            'branch_profiles': self.branch_profiles
+        }
 
-        for day_num in range(days):
-            current_date = start_date + datetime.timedelta(days=day_num)
-            print(f"Day {day_num + 1}/{days} - {current_date}:")
+    def concat_branch_batches(self, daily_branch_batches: Dict[str, TransactionBatch]) -> TransactionBatch:
+        """One day's branch batches in branch order (sequential by branch)"""
+        if not self.branches:
+            return self.empty_batch()
+        return TransactionBatch.concat([daily_branch_batches[branch] for branch in self.branches])
 
-            # Generate transactions for each branch separately first
-            daily_branch_transactions = {}
-            total_daily = 0
+    def mix_branch_transactions(self, daily_branch_batches: Dict[str, TransactionBatch]) -> TransactionBatch:
+        """
+        Mix one day's branch transactions in arrival-time order (not sequential by branch)
 
-            for branch in self.branches:
-                branch_transactions = self.generate_daily_transactions_for_branch(current_date, branch)
-                daily_branch_transactions[branch] = branch_transactions
-                total_daily += len(branch_transactions)
+        This replaced the seeded random interleave of branches, so the row order of mixed output differs
+        from runs before arrival timestamps; the rows themselves are the same.
+        """
+        day_batch = self.concat_branch_batches(daily_branch_batches)
 
-            # Mix all branch transactions randomly
-            mixed_daily_transactions = []
-            branch_indices = {branch: 0 for branch in self.branches}
-            branch_lengths = {branch: len(daily_branch_transactions[branch]) for branch in self.branches}
+        # Each branch-day is already in arrival order; a stable sort merges them and breaks ties by branch order
+        return day_batch.take(np.argsort(day_batch.arrival_seconds, kind='stable'))
 
-            # Create a mixed order by randomly selecting from available branches
-            while len(mixed_daily_transactions) < total_daily:
-                # Get branches that still have transactions
-                available_branches = [branch for branch in self.branches
-                                      if branch_indices[branch] < branch_lengths[branch]]
+    def iter_days(self, dates: List[datetime.date], mixed: bool = False) -> Iterator[TransactionBatch]:
+        """Yield one columnar batch per date, each as soon as the day is generated"""
+        day_start = time.perf_counter()
 
-                if not available_branches:
-                    break
+        for day_num, (current_date, daily_branch_batches) in enumerate(self.generate_branch_days(dates), 1):
+            logger.info("Day %d/%d - %s:", day_num, len(dates), current_date)
 
-                # Randomly select a branch
-                selected_branch = random.choice(available_branches)
+            if mixed:
+                day_batch = self.mix_branch_transactions(daily_branch_batches)
+                logger.info("  Mixed %d transactions from all branches", len(day_batch))
+            else:
+                day_batch = self.concat_branch_batches(daily_branch_batches)
+            del daily_branch_batches
+
+            # Time spent in consumers between yields is not generation time
+            BATCH_GENERATION_SECONDS.observe(time.perf_counter() - day_start)
+            ROWS_GENERATED.inc(len(day_batch))
+            self.check_memory_budget()
+
+            yield day_batch
+            day_start = time.perf_counter()
+
+    def iter_batches(self, dates: List[datetime.date], batch_rows: int = 10000,
+                     mixed: bool = False) -> Iterator[TransactionBatch]:
+        """Yield transactions for the given dates as columnar batches of batch_rows rows (last may be shorter)"""
+        if self.memory_budget_mb:
+            batch_rows = min(batch_rows, self.plan_memory_budget(batch_rows))
+        pending = []
+        pending_rows = 0
+
+        for day_batch in self.iter_days(dates, mixed):
+            # Only the current day (plus a partial batch) is held in memory
+            pending.append(day_batch)
+            pending_rows += len(day_batch)
+            del day_batch
+
+            if pending_rows >= batch_rows:
+                combined = TransactionBatch.concat(pending)
+                full_rows = (len(combined) // batch_rows) * batch_rows
+                for batch_start in range(0, full_rows, batch_rows):
+                    yield combined.slice(batch_start, batch_start + batch_rows)
+                pending = [combined.slice(full_rows, len(combined))]
+                pending_rows = len(combined) - full_rows
+
+        if pending_rows:
+            yield TransactionBatch.concat(pending)
+
+    def plan_memory_budget(self, batch_rows: int) -> int:
+        """Fit workers, days in flight and batch size into memory_budget_mb; returns rows per batch"""
+        budget = self.memory_budget_mb
+        baseline = current_rss_mb() or BASELINE_RSS_MB
+        available = budget - baseline
+        branch_day_rows = MAX_BRANCH_DAY_ROWS * self.calendar.max_demand_multiplier
+        day_mb = len(self.branches) * branch_day_rows * BATCH_ROW_BYTES / 2 ** 20
+
+        # An output batch is converted to a DataFrame (and CSV text) once it is complete
+        batch_rows = int(max(1000, min(batch_rows, available * 0.25 * 2 ** 20 / FRAME_ROW_BYTES)))
+        # The current day is held twice at most (mixing reorders a copy)
+        needed = 2 * day_mb + batch_rows * FRAME_ROW_BYTES / 2 ** 20
+
+        if self.workers > 1:
+            # Every worker process costs about this process's baseline; a date block's results are held in
+            # the worker while pickled and again here once received
+            workers = max(1, min(self.workers, int((available - needed) * 0.5 // baseline)))
+            block_days = int((available - needed - workers * baseline) // (2 * day_mb)) if day_mb else self.shard_days
+            shard_days = max(1, min(self.shard_days, block_days))
+            if (workers, shard_days) != (self.workers, self.shard_days):
+                logger.info("💾 Memory budget %s MB: %s workers, %s days per block (was %s workers, %s days)",
+                            format(budget, ',.0f'), workers, shard_days, self.workers, self.shard_days)
+            self.workers, self.shard_days = workers, shard_days
+            needed += workers * baseline + 2 * self.shard_days * day_mb
+
+        if needed > available:
+            logger.warning("⚠️  Memory budget %s MB is tight: about %s MB is needed for %d branches",
+                           format(budget, ',.0f'), format(baseline + needed, ',.0f'), len(self.branches))
+        return batch_rows
+
+    def check_memory_budget(self):
+        """Stop the run once resident memory exceeds memory_budget_mb"""
+        if not self.memory_budget_mb:
+            return
+        rss = current_rss_mb()
+        if rss is not None and rss > self.memory_budget_mb:
+            raise MemoryError(f"Resident memory {rss:,.0f} MB exceeds the {self.memory_budget_mb:,.0f} MB budget; "
+                              f"raise the budget or use fewer workers")
+
+    def generate_iter(self, start_date: datetime.date, days: int, batch_rows: int = 10000,
+                      mixed: bool = False) -> Iterator[TransactionBatch]:
+        """Lazily generate a date range as fixed-size columnar batches (memory stays flat for any range)"""
+        dates = [start_date + datetime.timedelta(days=day_num) for day_num in range(days)]
+        return self.iter_batches(dates, batch_rows, mixed)
+
+    def count_transactions(self, dates: List[datetime.date]) -> int:
+        """Number of transactions the given dates will produce (volumes are deterministic per branch-day)"""
+        return sum(self.get_customer_volume(date, branch) for date in dates for branch in self.branches)
+
+    def generate_all_transactions_mixed(self, start_date: datetime.date, days: int,
+                                        output_file: Optional[str] = None) -> List[Dict]:
+        """
+        Generate all transactions for date range with mixed branch order (not sequential by branch)
 
-                # Add next transaction from selected branch
-                transaction = daily_branch_transactions[selected_branch][branch_indices[selected_branch]]
-                mixed_daily_transactions.append(transaction)
-                branch_indices[selected_branch] += 1
+        With output_file, each day is appended to that CSV as soon as it is generated and nothing is kept,
+        so the returned list is empty; without it every row of the range is returned in memory.
+        """
+        dates = [start_date + datetime.timedelta(days=day_num) for day_num in range(days)]
+        logger.info("Generating mixed transactions for %d days across %d branches...", days, len(self.branches))
 
-            all_transactions.extend(mixed_daily_transactions)
-            print(f"  Mixed {total_daily} transactions from all branches")
+        if output_file:
+            rows = self.save_batches_to_csv(self.iter_days(dates, mixed=True), output_file, review_text=True)
+            logger.info("Total mixed transactions generated: %d", rows)
+            return []
 
-        print(f"Total mixed transactions generated: {len(all_transactions)}")
+        all_transactions = []
+        for day_batch in self.iter_days(dates, mixed=True):
+            all_transactions.extend(day_batch.to_pandas(review_text=True).to_dict('records'))
+
+        logger.info("Total mixed transactions generated: %d", len(all_transactions))
         return all_transactions
 
     def generate_daily_transactions_all_branches(self, date: datetime.date) -> List[Dict]:
         """Generate all transactions for all branches on a specific date"""
         all_transactions = []
 
-        for branch in self.branches:
-            branch_transactions = self.generate_daily_transactions_for_branch(date, branch)
-            all_transactions.extend(branch_transactions)
+        for _, daily_branch_batches in self.generate_branch_days([date]):
+            all_transactions.extend(
+                self.concat_branch_batches(daily_branch_batches).to_pandas(review_text=True).to_dict('records'))
 
         return all_transactions
 
-    def generate_date_range_data(self, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
-        """Generate transaction data for a date range across all branches"""
-        all_transactions = []
-        current_date = start_date
+    def generate_date_range_data(self, start_date: datetime.date, end_date: datetime.date,
+                                 output_file: Optional[str] = None) -> pd.DataFrame:
+        """
+        Generate transaction data for a date range across all branches
 
+        With output_file, each day is appended to that CSV as soon as it is generated and nothing is kept,
+        so the returned DataFrame is empty; without it the whole range is returned, built one day at a time.
+        """
         total_days = (end_date - start_date).days + 1
-        print(
-            f"Generating data for {total_days} days ({start_date} to {end_date}) across {len(self.branches)} branches\n")
-
-        day_counter = 1
-        while current_date <= end_date:
-            print(f"Day {day_counter}/{total_days}:")
-            daily_transactions = self.generate_daily_transactions_all_branches(current_date)
-            all_transactions.extend(daily_transactions)
-
-            current_date += datetime.timedelta(days=1)
-            day_counter += 1
-
-        print(f"Total transactions generated: {len(all_transactions)}")
-        return pd.DataFrame(all_transactions)
+        dates = [start_date + datetime.timedelta(days=day_num) for day_num in range(total_days)]
+        logger.info("Generating data for %d days (%s to %s) across %d branches\n",
+                    total_days, start_date, end_date, len(self.branches))
+
+        if output_file:
+            rows = self.save_batches_to_csv(self.iter_days(dates), output_file, review_text=True)
+            logger.info("Total transactions generated: %d", rows)
+            return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+        # Each day is converted as it is produced, so its columnar batch is freed before the next one
+        frames = [day_batch.to_pandas(review_text=True) for day_batch in self.iter_days(dates)]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+        logger.info("Total transactions generated: %d", len(df))
+        return df
+
+    def get_date_manifest(self) -> DateManifest:
+        """Date watermark manifest for this spreadsheet (local file mirrored to a hidden worksheet)"""
+        if self.date_manifest is None:
+            spreadsheet = self.write_scheduler.run(self.gc.open_by_key, self.sheet_id)
+            backend = getattr(self.gc, 'backend', "sheets")  # FakeSheetsClient names its own store
+            self.date_manifest = DateManifest(manifest_path(self.sheet_id, backend, self.output_dir), spreadsheet,
+                                              self.write_scheduler)
+        return self.date_manifest
 
     def check_existing_data_dates(self, worksheet_name: str = "Sheet1") -> set:
-        """Check what dates already exist in the Google Sheet"""
+        """Check what dates already exist in the Google Sheet (manifest first, date column only as fallback)"""
         if not self.gc:
             return set()
 
         try:
-            sheet = self.gc.open_by_key(self.sheet_id)
-            worksheet = sheet.worksheet(worksheet_name)
-
-            # Get all data
-            all_data = worksheet.get_all_values()
-            if len(all_data) <= 1:  # Only headers or empty
-                return set()
-
-            # Find the date column index (assuming it's named 'date')
-            headers = all_data[0]
-            if 'date' not in headers:
-                print("Warning: 'date' column not found in existing data")
-                return set()
-
-            date_col_index = headers.index('date')
-            existing_dates = set()
-
-            # Extract dates from all rows (skip header)
-            for row in all_data[1:]:
-                if len(row) > date_col_index and row[date_col_index]:
-                    existing_dates.add(row[date_col_index])
+            manifest = self.get_date_manifest()
+            if manifest.load(worksheet_name) and not manifest.unconfirmed.get(worksheet_name):
+                source = "date manifest"
+            else:
+                # No manifest yet, or dates only the local file knows: read the date column alone (not the whole
+                # sheet) to confirm them, and rebuild the manifest from it if they do not match
+                sheet = self.write_scheduler.run(self.gc.open_by_key, self.sheet_id)
+                try:
+                    worksheet = self.write_scheduler.run(sheet.worksheet, worksheet_name)
+                except gspread.WorksheetNotFound:
+                    manifest.reset(worksheet_name)
+                    return set()
+                dates = manifest.read_dates(worksheet)
+                if dates is None:
+                    logger.warning("'date' column not found in existing data")
+                    return set()
+                if manifest.dates(worksheet_name) and manifest.verify(worksheet_name, dates):
+                    source = "date manifest, checked against the date column"
+                else:
+                    manifest.replace(worksheet_name, dates)
+                    manifest.publish()
+                    source = "date column scan"
 
-            print(f"Found existing data for {len(existing_dates)} dates in Google Sheets")
+            existing_dates = manifest.dates(worksheet_name)
+            logger.info("Found existing data for %d dates in Google Sheets (%s)", len(existing_dates), source)
             return existing_dates
 
+        except gspread.WorksheetNotFound:
+            return set()
         except Exception as e:
-            print(f"Error checking existing dates: {e}")
+            logger.error("Error checking existing dates: %s", e)
             return set()
 
+    def reseed(self, seed: int):
+        """Switch to another master seed (per-branch profiles are redrawn from it)"""
+        self.streams = RandomStreams(seed)
+        self.requested_seed = seed  # None: fresh seed, so a resumed stream takes the interrupted run's seed
+        self.random = self.streams.python_random(purpose='default')
+        self.branch_profiles = BranchProfiles(self.streams, self.branches)
+
     def generate_with_realtime_streaming(self, start_date: datetime.date, days: int,
-                                         frequency_seconds: int = 1, records_per_interval: int = 5) -> pd.DataFrame:
-        """Generate and stream data in real-time batches to Google Sheets (APPEND MODE ONLY)"""
-        print(f"Starting real-time streaming generation:")
-        print(f"  Date range: {start_date} to {start_date + datetime.timedelta(days=days - 1)}")
-        print(f"  Frequency: Every {frequency_seconds} seconds")
-        print(f"  Records per interval: {records_per_interval}")
-        print(f"  Total days: {days}")
-        print(f"  Branches: {len(self.branches)}")
-        print("-" * 50)
-
-        # Check for existing data in Google Sheets to avoid duplicates
-        existing_dates = self.check_existing_data_dates() if self.gc else set()
-
-        # Filter out dates that already exist
-        dates_to_generate = []
-        for day_num in range(days):
-            current_date = start_date + datetime.timedelta(days=day_num)
-            date_str = current_date.strftime('%Y-%m-%d')
-            if date_str not in existing_dates:
-                dates_to_generate.append(current_date)
-            else:
-                print(f"⏭️  Skipping {date_str} - already exists in Google Sheets")
+                                         frequency_seconds: int = 1, records_per_interval: int = 5,
+                                         output_file: str = None, upload_queue_size: int = 100,
+                                         queue_full_policy: str = 'block', resume: bool = True,
+                                         summary: Optional[SummaryAccumulator] = None) -> pd.DataFrame:
+        """
+        Generate and stream data in real-time batches to Google Sheets (APPEND MODE ONLY), returns the streamed rows
 
-        if not dates_to_generate:
-            print("🔄 All requested dates already exist in Google Sheets. No new data to generate.")
-            # Still return existing data for display purposes
-            return pd.DataFrame()
+        Runs stream_realtime (see there for the arguments), then reads the streamed rows back from the
+        output_file log; use stream_realtime directly to get only the row count and keep nothing in memory.
+        """
+        if output_file is None:
+            output_file = f"bpi_realtime_progress_{start_date.strftime('%Y%m%d')}.csv"
+        rows = self.stream_realtime(start_date, days, frequency_seconds, records_per_interval, output_file,
+                                    upload_queue_size, queue_full_policy, resume, summary)
+        return pd.read_csv(output_file, keep_default_na=False) if rows else pd.DataFrame()
+
+    def stream_realtime(self, start_date: datetime.date, days: int, frequency_seconds: int = 1,
+                        records_per_interval: int = 5, output_file: str = None, upload_queue_size: int = 100,
+                        queue_full_policy: str = 'block', resume: bool = True,
+                        summary: Optional[SummaryAccumulator] = None) -> int:
+        """
+        Generate and stream data in real-time batches to Google Sheets (APPEND MODE ONLY), returns rows streamed
 
-        print(f"📅 Will generate data for {len(dates_to_generate)} new dates")
+        Batches are emitted on a fixed wall-clock cadence; uploads run on a background thread behind a
+        bounded queue. queue_full_policy decides what happens when uploads fall that far behind:
+        'block' (wait), 'drop' (discard the batch) or 'spill' (write it to disk and upload it at the end).
 
-        # Generate ALL transactions first (mixed order, not sequential by branch)
-        all_transactions = []
-        for date in dates_to_generate:
-            print(f"Generating for {date}:")
-            daily_transactions = self.generate_all_transactions_mixed(date, 1)
-            all_transactions.extend(daily_transactions)
+        output_file is an append-only checkpoint log with an offset file beside it. If a run with the same
+        settings was interrupted (Ctrl-C or crash) and resume is set, streaming picks up at the next unsent
+        batch and re-sends only rows that never reached Google Sheets. Ctrl-C is re-raised once the
+        checkpoint is saved.
+
+        summary, if given, accumulates every batch of the stream (including batches a resume skips).
+        """
+        if output_file is None:
+            output_file = f"bpi_realtime_progress_{start_date.strftime('%Y%m%d')}.csv"
+
+        logger.info("Starting real-time streaming generation:")
+        logger.info("  Date range: %s to %s", start_date, start_date + datetime.timedelta(days=days - 1))
+        logger.info("  Frequency: Every %s seconds", frequency_seconds)
+        logger.info("  Records per interval: %s", records_per_interval)
+        logger.info("  Total days: %s", days)
+        logger.info("  Branches: %d", len(self.branches))
+        logger.info("-" * 50)
+
+        checkpoint = StreamCheckpoint(output_file)
+        settings = self.get_stream_settings(start_date, days, records_per_interval)
+        state = checkpoint.load() if resume else None
+        if state and not checkpoint.matches(state, settings):
+            changed = sorted(key for key in set(settings) | set(state['settings'])
+                             if settings.get(key) != state['settings'].get(key))
+            logger.warning("⚠️  Not resuming %s: %s changed since the interrupted run; starting a new stream",
+                           output_file, ', '.join(changed))
+            state = None
+        elif state and self.requested_seed is not None and state['seed'] != self.requested_seed:
+            logger.warning("⚠️  Not resuming %s: it was started with seed %s, not %s; starting a new stream",
+                           output_file, state['seed'], self.requested_seed)
+            state = None
+
+        if state:
+            # Same stream as the interrupted run: same seed, same dates (already-uploaded dates included)
+            if state['seed'] != self.streams.master_seed:
+                self.reseed(state['seed'])
+            dates_to_generate = [datetime.date.fromisoformat(d) for d in state['dates']]
+            checkpoint.resume(state)
+            logger.info("⏯️  Resuming from %s: %s batches logged, %s/%s rows confirmed in Google Sheets",
+                        output_file, state['emitted_batches'], format(state['committed_rows'], ','),
+                        format(state['emitted_rows'], ','))
+        else:
+            # Check for existing data in Google Sheets to avoid duplicates
+            existing_dates = self.check_existing_data_dates() if self.gc else set()
+
+            # Filter out dates that already exist
+            dates_to_generate = []
+            for day_num in range(days):
+                current_date = start_date + datetime.timedelta(days=day_num)
+                date_str = current_date.strftime('%Y-%m-%d')
+                if date_str not in existing_dates:
+                    dates_to_generate.append(current_date)
+                else:
+                    logger.info("⏭️  Skipping %s - already exists in Google Sheets", date_str)
+
+            # Start the checkpoint log with headers; batches are appended as they stream
+            checkpoint.start(settings, self.streams.master_seed, [d.isoformat() for d in dates_to_generate],
+                             self.output_columns)
+
+        if not dates_to_generate:
+            checkpoint.finish()
+            logger.info("🔄 All requested dates already exist in Google Sheets. No new data to generate.")
+            return 0
+
+        logger.info("📅 Will generate data for %d new dates", len(dates_to_generate))
 
-        total_transactions = len(all_transactions)
+        # Transactions are generated lazily (mixed order, not sequential by branch); only the count is needed up front
+        total_transactions = self.count_transactions(dates_to_generate)
         if total_transactions == 0:
-            print("No transactions to stream")
-            return pd.DataFrame()
+            checkpoint.finish()
+            logger.info("No transactions to stream")
+            return 0
 
         # Calculate batch configuration
         batch_size = records_per_interval
         total_batches = (total_transactions + batch_size - 1) // batch_size  # Ceiling division
+        logged_batches = checkpoint.state['emitted_batches']
+        committed_rows = checkpoint.state['committed_rows']
+
+        logger.info("\n📊 Streaming Configuration:")
+        logger.info("  Total transactions: %s", format(total_transactions, ','))
+        logger.info("  Records per batch: %s", batch_size)
+        logger.info("  Total batches: %s", total_batches)
+        logger.info("  Estimated time: %s seconds (%.1f minutes)",
+                    (total_batches - logged_batches) * frequency_seconds,
+                    ((total_batches - logged_batches) * frequency_seconds) / 60)
+        logger.info("-" * 50)
+
+        records_processed = 0
+        branches_streamed = set()
+        interrupted = False
+
+        # Uploads run behind a bounded queue so a slow API call does not delay the emitter
+        uploader = None
+        handed_rows = []  # Stream positions given to the appender but not yet confirmed
+
+        def upload(df: pd.DataFrame) -> int:
+            """Append a batch and commit its stream positions once the appender holds nothing back"""
+            handed_rows.append(df.index.to_numpy())
+            held = self.append_batch_to_sheets(df)
+            if not held:
+                checkpoint.commit(np.concatenate(handed_rows))
+                handed_rows.clear()
+            return held
+
+        if self.gc:
+            uploader = BackgroundUploader(upload, max_queue=upload_queue_size, full_policy=queue_full_policy,
+                                          spill_path=f"{os.path.splitext(output_file)[0]}.spill.csv").start()
+
+        # Stream transactions in batches, one every frequency_seconds of wall-clock time
+        stream_start = time.monotonic()
+        batches = self.iter_batches(dates_to_generate, batch_size, mixed=True)
+        try:
+            for batch_num, transaction_batch in enumerate(batches):
+                row_start = records_processed
+                records_processed += len(transaction_batch)
+                if summary is not None:
+                    summary.update(transaction_batch)
+
+                if batch_num < logged_batches:
+                    # Already in the log: only rows that never reached Google Sheets are sent again
+                    if uploader and records_processed > committed_rows:
+                        unsent = max(0, committed_rows - row_start)
+                        batch = transaction_batch.slice(unsent, len(transaction_batch)).to_pandas(
+                            review_text=self.include_review_text)
+                        batch.index = pd.RangeIndex(row_start + unsent, records_processed)
+                        uploader.submit(batch)
+                        logger.info("      📤 Re-sending %d unconfirmed records from batch %s", len(batch),
+                                    batch_num + 1)
+                    continue
+
+                batch = transaction_batch.to_pandas(review_text=self.include_review_text)
+                batch.index = pd.RangeIndex(row_start, records_processed)  # Stream positions, for commits
+                branches_streamed.update(batch['branch_name'].unique())
+                percentage_complete = (records_processed / total_transactions) * 100
+
+                logger.info("[%s] Batch %s/%s: %d records added (%s/%s - %.1f%%)",
+                            datetime.datetime.now().strftime('%H:%M:%S'), batch_num + 1, total_batches, len(batch),
+                            format(records_processed, ','), format(total_transactions, ','), percentage_complete)
+
+                # Show sample transactions from current batch
+                if len(batch):
+                    first, last = batch.iloc[0], batch.iloc[-1]
+                    logger.info("  Sample: %s - %s - %s", first['branch_name'], first['transaction_type'],
+                                first['customer_id'])
+                    if len(batch) > 1:
+                        logger.info("          %s - %s - %s", last['branch_name'], last['transaction_type'],
+                                    last['customer_id'])
+
+                # Log the batch before it can reach Google Sheets, so a resume never skips it
+                checkpoint.append(batch)
+                STREAM_EMIT_LAG.set(max(0.0, time.monotonic() - stream_start
+                                        - (batch_num - logged_batches) * frequency_seconds))
+
+                # Queue current batch for the background uploader (APPEND MODE ONLY)
+                if uploader:
+                    queued = uploader.submit(batch)
+                    if not queued and queue_full_policy == 'drop':
+                        checkpoint.commit(batch.index.to_numpy())  # Deliberately discarded; never re-sent
+                    stats = uploader.stats()
+                    action = "Queued" if queued else ("Spilled" if queue_full_policy == 'spill' else "Dropped")
+                    logger.info("      📤 %s %d records for Google Sheets (queue depth %s, upload lag %.1fs)",
+                                action, len(batch), stats['queue_depth'], stats['last_lag_seconds'])
+                    STREAM_ROWS_PENDING.set(checkpoint.state['emitted_rows'] - checkpoint.state['committed_rows'])
+
+                # Wait for the next tick (except for last batch); generation time counts toward the interval
+                if batch_num < total_batches - 1:
+                    tick = batch_num + 1 - logged_batches
+                    time.sleep(max(0.0, stream_start + tick * frequency_seconds - time.monotonic()))
+
+        except KeyboardInterrupt:
+            interrupted = True
+            logger.info("\n⏸️  Interrupted - finishing queued uploads and saving the checkpoint...")
+
+        if uploader:
+            logger.info("   Waiting for queued uploads to finish...")
+            uploader.close()
+            try:
+                self.flush_sheets()
+                if handed_rows and not self.get_sheets_appender().pending:
+                    checkpoint.commit(np.concatenate(handed_rows))
+            except Exception as e:
+                logger.error("   ❌ Final Google Sheets flush failed: %s", e)
+            uploader.settle(len(self.get_sheets_appender().pending))
+            stats = uploader.stats()
+            logger.info("   Uploaded to Google Sheets: %s records in %s writes (max lag %.1fs)",
+                        format(stats['uploaded'], ','), stats['writes'], stats['max_lag_seconds'])
+            if stats['dropped'] or stats['failed'] or stats['held']:
+                logger.warning("   ⚠️  Not uploaded: %s dropped, %s failed, %s still held back (re-sent on resume)",
+                               format(stats['dropped'], ','), format(stats['failed'], ','), format(stats['held'], ','))
+
+        if interrupted:
+            checkpoint.close()
+            logger.info("   Checkpoint saved: %s rows logged, %s confirmed in Google Sheets",
+                        format(checkpoint.state['emitted_rows'], ','), format(checkpoint.state['committed_rows'], ','))
+            logger.info("   Run again with the same start date, days and records per interval to resume")
+            raise KeyboardInterrupt
+
+        STREAM_ROWS_PENDING.set(checkpoint.state['emitted_rows'] - checkpoint.state['committed_rows'] if uploader else 0)
+        if uploader and checkpoint.state['committed_rows'] < checkpoint.state['emitted_rows']:
+            checkpoint.close()  # Keep the offset file so a rerun re-sends the unconfirmed rows
+            logger.warning("   ⚠️  %s rows are not confirmed in Google Sheets; run again with the same settings "
+                           "to re-send them",
+                           format(checkpoint.state['emitted_rows'] - checkpoint.state['committed_rows'], ','))
+        else:
+            checkpoint.finish()
 
-        print(f"\n📊 Streaming Configuration:")
-        print(f"  Total transactions: {total_transactions:,}")
-        print(f"  Records per batch: {batch_size}")
-        print(f"  Total batches: {total_batches}")
-        print(
-            f"  Estimated time: {total_batches * frequency_seconds} seconds ({(total_batches * frequency_seconds) / 60:.1f} minutes)")
-        print("-" * 50)
-
-        streamed_transactions = []
-
-        # Stream transactions in batches
-        for batch_num in range(total_batches):
-            start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, total_transactions)
-            batch = all_transactions[start_idx:end_idx]
-
-            # Add batch to streamed transactions
-            streamed_transactions.extend(batch)
-
-            records_processed = len(streamed_transactions)
-            percentage_complete = (records_processed / total_transactions) * 100
-
-            print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] Batch {batch_num + 1}/{total_batches}: "
-                  f"{len(batch)} records added ({records_processed:,}/{total_transactions:,} - {percentage_complete:.1f}%)")
-
-            # Show sample transactions from current batch
-            if batch:
-                print(
-                    f"  Sample: {batch[0]['branch_name']} - {batch[0]['transaction_type']} - {batch[0]['customer_id']}")
-                if len(batch) > 1:
-                    print(
-                        f"          {batch[-1]['branch_name']} - {batch[-1]['transaction_type']} - {batch[-1]['customer_id']}")
-
-            # Upload current batch to Google Sheets if available (APPEND MODE ONLY)
-            if self.gc:
-                try:
-                    # Convert only the new batch to DataFrame
-                    batch_df = pd.DataFrame(batch)
-                    self.upload_batch_to_sheets(batch_df, append_mode=True)  # ALWAYS APPEND
-                    print(f"      ✅ Appended {len(batch)} records to Google Sheets")
-                except Exception as e:
-                    print(f"      ❌ Failed to append to Google Sheets: {e}")
-
-            # Save progress periodically
-            if (batch_num + 1) % 20 == 0 or batch_num == total_batches - 1:
-                temp_df = pd.DataFrame(streamed_transactions)
-                filename = f"bpi_realtime_progress_batch{batch_num + 1}_of_{total_batches}.csv"
-                temp_df.to_csv(filename, index=False)
-                print(f"      💾 Progress saved: {filename}")
-
-            # Wait for next batch (except for last batch)
-            if batch_num < total_batches - 1:
-                time.sleep(frequency_seconds)
-
-        print(f"\n🎉 Real-time streaming complete!")
-        print(f"   Total transactions streamed: {len(streamed_transactions):,}")
-        print(f"   Branches represented: {len(set(t['branch_name'] for t in streamed_transactions))}")
-        print(f"   Total time taken: {total_batches * frequency_seconds} seconds")
-
-        return pd.DataFrame(streamed_transactions)
-
-    def upload_batch_to_sheets(self, df: pd.DataFrame, worksheet_name: str = "Sheet1",
-                               append_mode: bool = True) -> bool:
-        """Upload dataframe batch to Google Sheets with improved append logic"""
-        if not self.gc:
-            return False
+        logger.info("\n🎉 Real-time streaming complete!")
+        logger.info("   Total transactions streamed: %s", format(records_processed, ','))
+        logger.info("   Branches represented: %d", len(branches_streamed))
+        logger.info("   Total time taken: %.1f seconds", time.monotonic() - stream_start)
 
-        try:
-            sheet = self.gc.open_by_key(self.sheet_id)
+        return records_processed
+
+    def get_sheets_appender(self, worksheet_name: str = "Sheet1", rows: int = 50000) -> SheetsAppender:
+        """Appender for a worksheet (opened and row-counted once, then reused for every batch)"""
+        if worksheet_name not in self.sheets_appenders:
+            sheet = self.write_scheduler.run(self.gc.open_by_key, self.sheet_id)
 
             try:
-                worksheet = sheet.worksheet(worksheet_name)
+                worksheet = self.write_scheduler.run(sheet.worksheet, worksheet_name)
             except gspread.WorksheetNotFound:
-                worksheet = sheet.add_worksheet(title=worksheet_name, rows=50000, cols=15)
+                worksheet = self.write_scheduler.run(sheet.add_worksheet, title=worksheet_name, rows=rows, cols=15)
+
+            self.sheets_appenders[worksheet_name] = SheetsAppender(worksheet, SHEET_COLUMNS,
+                                                                   scheduler=self.write_scheduler,
+                                                                   manifest=self.get_date_manifest())
+        return self.sheets_appenders[worksheet_name]
+
+    def flush_sheets(self):
+        """Write rows still held back by the write scheduler, then mirror the date manifest"""
+        for appender in self.sheets_appenders.values():
+            appender.flush()
+        if self.date_manifest is not None:
+            self.date_manifest.publish()
+
+    def sheet_values(self, df: pd.DataFrame) -> List[List]:
+        """Rows of a transaction DataFrame in SHEET_COLUMNS order (review text joined from review_id if absent)"""
+        if 'review_text' not in df and 'review_id' in df:
+            review_ids = df['review_id'].to_numpy(dtype=np.int64)
+            if len(review_ids) and review_ids.max() >= len(self.review_texts):
+                raise ValueError(f"review_id {review_ids.max()} has no review text ({len(self.review_texts)} loaded); "
+                                 f"load the review samples or the run's bpi_review_table.csv")
+            texts = np.asarray(self.review_texts + [""], dtype=object)  # Id -1 (no review) picks the trailing ""
+            df = df.assign(review_text=texts[review_ids])
+        return df.reindex(columns=SHEET_COLUMNS, fill_value="").values.tolist()
+
+    def append_batch_to_sheets(self, df: pd.DataFrame, worksheet_name: str = "Sheet1") -> int:
+        """
+        Append a batch for a BackgroundUploader; returns the rows the appender still holds back
+
+        A write that fails after its retries keeps its rows pending for the next write or flush, so the
+        error is logged and the rows are reported as held; only errors before the rows reach the appender raise.
+        """
+        appender = self.get_sheets_appender(worksheet_name)
+        try:
+            appender.append(self.sheet_values(df))
+        except Exception as e:
+            if not appender.pending:
+                raise
+            logger.warning("      ⏳ Sheets write failed, %d records held for the next write: %s",
+                           len(appender.pending), e)
+        return len(appender.pending)
 
-            # Check if worksheet is empty or needs headers
-            existing_data = worksheet.get_all_values()
-            is_empty = len(existing_data) == 0
+    def upload_batch_to_sheets(self, df: pd.DataFrame, worksheet_name: str = "Sheet1") -> bool:
+        """
+        Append a dataframe batch to Google Sheets (no read-back; may be held back until a write token is free)
 
-            # Convert DataFrame to list of lists for upload
-            data_to_upload = df.values.tolist()
+        Always appends; use upload_to_sheets(append_mode=False) to replace a worksheet's data.
+        """
+        if not self.gc:
+            return False
 
-            if is_empty:
-                # First time upload - include headers
-                headers = [df.columns.tolist()]
-                all_data = headers + data_to_upload
-                start_row = 1
-            else:
-                # Append mode - just add data without headers
-                all_data = data_to_upload
-                start_row = len(existing_data) + 1
-
-            # Calculate the correct column range dynamically
-            num_columns = len(df.columns)
-            end_column = chr(ord('A') + num_columns - 1)  # Convert to letter (A, B, C... L)
-            end_row = start_row + len(all_data) - 1
-            range_name = f'A{start_row}:{end_column}{end_row}'
-
-            # Upload the data
-            worksheet.update(values=all_data, range_name=range_name)
+        try:
+            appender = self.get_sheets_appender(worksheet_name)
+            appender.append(self.sheet_values(df))
             return True
 
         except Exception as e:
@@ -659,62 +1396,32 @@ class BPITransactionGenerator:
     def upload_to_sheets(self, df: pd.DataFrame, worksheet_name: str = "Sheet1", append_mode: bool = False) -> bool:
         """Upload dataframe to Google Sheets with option to append or replace"""
         if not self.gc:
-            print("No Google Sheets connection available")
+            logger.info("No Google Sheets connection available")
             return False
 
         try:
-            # Open the spreadsheet
-            sheet = self.gc.open_by_key(self.sheet_id)
-
-            try:
-                # Try to open existing worksheet
-                worksheet = sheet.worksheet(worksheet_name)
-                if not append_mode:
-                    # Clear existing data only if explicitly not appending
-                    worksheet.clear()
-            except gspread.WorksheetNotFound:
-                # Create new worksheet if it doesn't exist
-                worksheet = sheet.add_worksheet(title=worksheet_name, rows=10000, cols=15)
-
-            if append_mode:
-                # Check existing data to determine where to start appending
-                existing_data = worksheet.get_all_values()
-                start_row = len(existing_data) + 1 if existing_data else 1
-
-                # Only add headers if worksheet is empty
-                if len(existing_data) == 0:
-                    data = [df.columns.tolist()] + df.values.tolist()
-                    start_row = 1
-                else:
-                    data = df.values.tolist()
-            else:
-                # Replace mode - include headers
-                data = [df.columns.tolist()] + df.values.tolist()
-                start_row = 1
+            appender = self.get_sheets_appender(worksheet_name, rows=10000)
+            if not append_mode:
+                # Clear existing data only if explicitly not appending
+                appender.clear()
 
-            # Update the worksheet in batches for large datasets
+            # Append the worksheet in batches for large datasets (held-back batches are merged into one write)
+            data = self.sheet_values(df)
             batch_size = 1000
+            total_batches = max(1, (len(data) - 1) // batch_size + 1)
             for i in range(0, len(data), batch_size):
-                batch = data[i:i + batch_size]
-                current_start_row = start_row + i
-                end_row = current_start_row + len(batch) - 1
-
-                # Calculate the correct column range based on actual data columns
-                end_column = chr(ord('A') + len(df.columns) - 1)  # Dynamic column calculation
-                range_name = f'A{current_start_row}:{end_column}{end_row}'
-
-                # Use the new API format: values first, then range_name
-                worksheet.update(values=batch, range_name=range_name)
+                appender.append(data[i:i + batch_size])
 
                 if len(data) > batch_size:
-                    print(f"Uploaded batch {i // batch_size + 1}/{(len(data) - 1) // batch_size + 1}")
+                    logger.info("Uploaded batch %s/%s", i // batch_size + 1, total_batches)
+            self.flush_sheets()
 
             action = "appended to" if append_mode else "uploaded to"
-            print(f"Successfully {action} Google Sheets: {len(df)} transactions!")
+            logger.info("Successfully %s Google Sheets: %d transactions!", action, len(df))
             return True
 
         except Exception as e:
-            print(f"Error uploading to Google Sheets: {e}")
+            logger.error("Error uploading to Google Sheets: %s", e)
             return False
 
     def save_to_csv(self, df: pd.DataFrame, filename: str = None):
@@ -723,62 +1430,93 @@ class BPITransactionGenerator:
             filename = f"bpi_transactions_{datetime.date.today().strftime('%Y%m%d')}.csv"
 
         df.to_csv(filename, index=False)
-        print(f"Data saved to {filename}")
+        logger.info("Data saved to %s", filename)
+
+    def save_batches_to_csv(self, batches: Iterator[TransactionBatch], filename: str,
+                            review_text: Optional[bool] = None) -> int:
+        """Stream columnar batches to a CSV file as they are produced, returns rows written"""
+        if review_text is None:
+            review_text = self.include_review_text
+        rows_written = 0
+        pd.DataFrame(columns=[c for c in TRANSACTION_COLUMNS if review_text or c != 'review_text']).to_csv(
+            filename, index=False)
+
+        for batch in batches:
+            batch.to_pandas(review_text=review_text).to_csv(filename, mode='a', header=False, index=False)
+            rows_written += len(batch)
+            ROWS_WRITTEN.inc(len(batch), sink='csv')
+
+        logger.info("Data saved to %s", filename)
+        return rows_written
+
+    def save_batches_to_parquet(self, batches: Iterator[TransactionBatch], root_dir: str, branch_buckets: int = 0,
+                                review_text: Optional[bool] = None) -> int:
+        """Stream columnar batches to a date-partitioned Parquet dataset, returns rows written"""
+        if review_text is None:
+            review_text = self.include_review_text
+        with ParquetSink(root_dir, branch_buckets=branch_buckets, review_text=review_text) as sink:
+            for batch in batches:
+                ROWS_WRITTEN.inc(sink.write(batch), sink='parquet')
+
+        logger.info("Data saved to %s/ (Parquet, partitioned by date%s)", root_dir,
+                    ', branch_bucket' if branch_buckets else '')
+        return sink.rows_written
 
     def print_data_summary(self, df: pd.DataFrame):
         """Print summary statistics of generated data"""
-        if df.empty:
-            print("No data to summarize")
-            return
+        summary = SummaryAccumulator()
+        summary.update_frame(df)
+        summary.print_report(self.good_data_percentage, self.data_dispersion)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory of this process now, in MB (None where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def queue_wait_minutes(wait_seconds):
+    """Queue wait rounded to whole minutes, at least 1 like the drawn waiting times"""
+    return np.maximum(1, (wait_seconds + 30) // 60)
+
+
+# Generator rebuilt once per worker process and reused for every shard it runs
+_worker_generator = None
+
+
+def _init_shard_worker(settings: Dict):
+    """Build the per-process generator used by _generate_shard"""
+    global _worker_generator
+    _worker_generator = BPITransactionGenerator(
+        settings['sheet_id'],
+        credentials_path=None,
+        data_dispersion=settings['data_dispersion'],
+        good_data_percentage=settings['good_data_percentage'],
+        vectorized=settings['vectorized'],
+        seed=settings['seed'],
+        hourly_profiles=settings['hourly_profiles'],
+        queue_model=settings['queue_model'],
+        seasonal_demand=settings['seasonal_demand']
+    )
+    _worker_generator.transaction_config = settings['transaction_config']
+    _worker_generator.holidays = settings['holidays']
+    _worker_generator.build_calendar()
+    _worker_generator.review_samples = settings['review_samples']
+    _worker_generator.review_weights = settings['review_weights']
+    _worker_generator.branch_profiles = settings['branch_profiles']
+    _worker_generator.build_vectorized_tables()
+    _worker_generator.build_review_table()
+
 
-        print(f"\n📊 Generated Data Summary:")
-        print(f"   Total transactions: {len(df):,}")
-        print(f"   Date range: {df['date'].min()} to {df['date'].max()}")
-        print(f"   Branches: {df['branch_name'].nunique()}")
-
-        print(f"\n⏱️  Time Statistics:")
-        print(f"   Average waiting time: {df['waiting_time'].mean():.2f} minutes")
-        print(f"   Average processing time: {df['processing_time'].mean():.2f} minutes")
-        print(f"   Average total time: {df['transaction_time'].mean():.2f} minutes")
-        print(f"   Waiting time std dev: {df['waiting_time'].std():.2f}")
-        print(f"   Processing time std dev: {df['processing_time'].std():.2f}")
-
-        print(f"\n😊 Sentiment Statistics:")
-        print(f"   Average sentiment score: {df['sentiment_score'].mean():.2f}")
-        print(f"   Sentiment distribution:")
-        sentiment_counts = df['sentiment'].value_counts()
-        for sentiment, count in sentiment_counts.items():
-            percentage = (count / len(df)) * 100
-            print(f"     {sentiment}: {count:,} ({percentage:.1f}%)")
-
-        print(f"\n🏦 Transaction Types:")
-        type_counts = df['transaction_type'].value_counts()
-        for ttype, count in type_counts.items():
-            percentage = (count / len(df)) * 100
-            print(f"     {ttype}: {count:,} ({percentage:.1f}%)")
-
-        print(f"\n📈 Branch Performance (Top 5 by avg transaction time):")
-        branch_stats = df.groupby('branch_name').agg({
-            'transaction_time': ['mean', 'count'],
-            'sentiment_score': 'mean'
-        }).round(2)
-        branch_stats.columns = ['avg_time', 'transactions', 'avg_sentiment']
-        branch_stats = branch_stats.sort_values('avg_time')
-
-        for i, (branch, stats) in enumerate(branch_stats.head().iterrows()):
-            print(
-                f"     {i + 1}. {branch}: {stats['avg_time']}min, {stats['transactions']} txns, {stats['avg_sentiment']} sentiment")
-
-        print(f"\n🎯 Data Quality Achieved:")
-        good_transactions = len(df[df['sentiment_score'] >= 3.5])
-        bad_transactions = len(df[df['sentiment_score'] < 3.0])
-        actual_good_percentage = (good_transactions / len(df)) * 100
-        actual_bad_percentage = (bad_transactions / len(df)) * 100
-
-        print(f"   Target good data: {self.good_data_percentage:.1f}%")
-        print(f"   Actual good data: {actual_good_percentage:.1f}%")
-        print(f"   Actual bad data: {actual_bad_percentage:.1f}%")
-        print(f"   Dispersion factor used: {self.data_dispersion}")
+def _generate_shard(branches: List[str], dates: List[datetime.date]) -> Dict[datetime.date, Dict[str, TransactionBatch]]:
+    """Generate one (branch-block, date-block) shard inside a worker process"""
+    return {
+        date: {branch: _worker_generator.generate_daily_batch_for_branch(date, branch) for branch in branches}
+        for date in dates
+    }
 
 
 def get_user_input():
@@ -818,6 +1556,29 @@ def get_user_input():
         good_percentage = 70.0
         print("Invalid input, using default: 70%")
 
+    workers = input(f"Enter number of worker processes (1-{os.cpu_count()}, default: 1): ").strip()
+    try:
+        workers = max(1, int(workers)) if workers else 1
+    except ValueError:
+        workers = 1
+        print("Invalid input, using default: 1")
+
+    output_format = input("Output format (csv/parquet, default: csv): ").strip().lower()
+    if output_format not in ['csv', 'parquet']:
+        output_format = 'csv'
+
+    review_text = input("Include review text in output? (y/n, default: n): ").strip().lower() == 'y'
+    queue_model = input("Derive waiting times from teller queues? (y/n, default: n): ").strip().lower() == 'y'
+    seasonal_demand = input("Apply seasonal demand (holidays, paydays, month-end)? (y/n, default: n): "
+                            ).strip().lower() == 'y'
+
+    memory_budget = input("Memory budget in MB (default: no limit): ").strip()
+    try:
+        memory_budget = float(memory_budget) if memory_budget else None
+    except ValueError:
+        memory_budget = None
+        print("Invalid input, using no limit")
+
     # Get generation mode
     print("\nGeneration Options:")
     print("1. Generate specific date range (all at once)")
@@ -844,7 +1605,13 @@ def get_user_input():
             'end_date': end_date,
             'days': days,
             'dispersion': dispersion,
-            'good_percentage': good_percentage
+            'good_percentage': good_percentage,
+            'workers': workers,
+            'output_format': output_format,
+            'review_text': review_text,
+            'queue_model': queue_model,
+            'seasonal_demand': seasonal_demand,
+            'memory_budget': memory_budget
         }
 
     elif mode == "2":
@@ -858,6 +1625,9 @@ def get_user_input():
         days = int(input("Enter number of days to generate: "))
         frequency = int(input("Enter frequency in seconds (1-10, default: 1): ") or "1")
         records_per_interval = int(input("Enter number of records per interval (1-50, default: 5): ") or "5")
+        queue_full_policy = input("When uploads fall behind (block/drop/spill, default: block): ").strip().lower()
+        if queue_full_policy not in ('block', 'drop', 'spill'):
+            queue_full_policy = 'block'
 
         return {
             'mode': 'realtime',
@@ -866,8 +1636,15 @@ def get_user_input():
             'days': days,
             'frequency': frequency,
             'records_per_interval': records_per_interval,
+            'queue_full_policy': queue_full_policy,
             'dispersion': dispersion,
-            'good_percentage': good_percentage
+            'good_percentage': good_percentage,
+            'workers': workers,
+            'output_format': output_format,
+            'review_text': review_text,
+            'queue_model': queue_model,
+            'seasonal_demand': seasonal_demand,
+            'memory_budget': memory_budget
         }
 
     else:
@@ -878,23 +1655,243 @@ def get_user_input():
             'start_date': datetime.date.today(),
             'days': 1,
             'dispersion': dispersion,
-            'good_percentage': good_percentage
+            'good_percentage': good_percentage,
+            'workers': workers,
+            'output_format': output_format,
+            'review_text': review_text,
+            'queue_model': queue_model,
+            'seasonal_demand': seasonal_demand,
+            'memory_budget': memory_budget
         }
 
 
-def main():
-    # Your Google Sheet ID
-    SHEET_ID = "1rHjXMxilei_FCJN49NDKmdFz8kSiX4ryCnaHPNcqeDc"
 
-    # Get user preferences
-    config = get_user_input()
+
+def parse_args(argv: List[str]) -> Dict:
+    """Non-interactive counterpart of get_user_input: command-line flags plus an optional JSON config file"""
+    parser = argparse.ArgumentParser(
+        description="Generate BPI transactions without prompts",
+        epilog="Without any arguments generate.py asks for every option interactively. "
+               "A --config file holds the same options keyed by flag name; flags given on the command line win.")
+    parser.add_argument('--config', help="JSON file of option values")
+    parser.add_argument('--mode', choices=['range', 'realtime', 'today'], default='today')
+    parser.add_argument('--branch-file', default="branch.csv")
+    parser.add_argument('--review-samples', default="bpi_review_samples.csv")
+    parser.add_argument('--hourly-profiles', default="bpi_hourly_profiles.csv",
+                        help="Hourly arrival profiles CSV (built-in defaults when the file does not exist)")
+    parser.add_argument('--start-date', type=datetime.date.fromisoformat,
+                        help="YYYY-MM-DD for range/realtime (default: today)")
+    parser.add_argument('--days', type=int, default=1, help="Days to generate for range/realtime")
+    parser.add_argument('--dispersion', type=float, default=1.0, help="Dispersion factor (0.5-2.0)")
+    parser.add_argument('--good-percentage', type=float, default=70.0, help="Good data percentage (50-90)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes")
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--review-text', action='store_true', help="Include review text in output")
+    parser.add_argument('--queue-model', action='store_true', help="Derive waiting times from teller queues")
+    parser.add_argument('--vectorized', action='store_true', help="Use the NumPy branch-day engine")
+    parser.add_argument('--seasonal-demand', action='store_true',
+                        help="Scale daily volumes for holidays, paydays, month-end and December")
+    parser.add_argument('--holidays', default="ph_holidays.csv",
+                        help="Public holiday CSV: date, name, type (skipped when the file does not exist)")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="Resident memory limit; batch sizes and workers are fitted to it")
+    parser.add_argument('--seed', type=int, help="Master seed (required with --shard)")
+    parser.add_argument('--frequency', type=int, default=1, help="Realtime: seconds between intervals")
+    parser.add_argument('--records-per-interval', type=int, default=5, help="Realtime: records per interval")
+    parser.add_argument('--queue-full-policy', choices=['block', 'drop', 'spill'], default='block',
+                        help="Realtime: what to do when uploads fall behind")
+    parser.add_argument('--upload', choices=['no', 'replace', 'append'], default='no',
+                        help="Upload today/range output to Google Sheets")
+    parser.add_argument('--continue-without-reviews', action='store_true',
+                        help="Generate with empty review text when the review samples cannot be loaded")
+    parser.add_argument('--continue-without-sheets', action='store_true',
+                        help="Realtime: stream to CSV only when there is no Sheets connection")
+    parser.add_argument('--output-dir', default=".", help="Directory for output files (shared by all shards)")
+    parser.add_argument('--shard', type=parse_shard, metavar='K/N',
+                        help="Range mode: generate only shard K of N of the (date, branch block) cells")
+    parser.add_argument('--block-size', type=int, default=50, help="Branches per block (shard cell width)")
+    parser.add_argument('--merge', action='store_true', help="Validate the shards in --output-dir and exit")
+    parser.add_argument('--combine', action='store_true',
+                        help="With --merge: also concatenate CSV cells into one file")
+    parser.add_argument('--summary-json', metavar='PATH', help="Also write the end-of-run summary as JSON")
+    parser.add_argument('--log-level', choices=['debug', 'info', 'warning', 'error'], default='warning',
+                        help="Progress logging (info shows per-day progress, debug per-branch volumes)")
+    parser.add_argument('--metrics-textfile', metavar='PATH',
+                        help="Rewrite Prometheus metrics to this file (node_exporter textfile collector)")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--metrics-interval', type=float, default=15.0,
+                        help="Seconds between metrics textfile rewrites")
+
+    known, _ = parser.parse_known_args(argv)
+    if known.config:
+        with open(known.config) as f:
+            values = {key.replace('-', '_'): value for key, value in json.load(f).items()}
+        unknown = set(values) - {action.dest for action in parser._actions} - {'config'}
+        if unknown:
+            parser.error(f"Unknown options in {known.config}: {', '.join(sorted(unknown))}")
+        parser.set_defaults(**values)  # String values go through each option's type, like flags do
+    args = parser.parse_args(argv)
+
+    if args.shard and args.mode != 'range':
+        parser.error("--shard needs --mode range (today and realtime output is not split into cells)")
+    if args.shard and args.seed is None:
+        parser.error("--shard needs --seed, so every shard draws from the same dataset")
+
+    config = vars(args)
+    del config['config']
+    config['dispersion'] = max(0.5, min(2.0, args.dispersion))
+    config['good_percentage'] = max(50.0, min(90.0, args.good_percentage))
+    config['workers'] = max(1, args.workers)
+    if args.mode == 'today' or args.start_date is None:
+        config['start_date'] = datetime.date.today()
+    if args.mode == 'today':
+        config['days'] = 1
+    config['end_date'] = config['start_date'] + datetime.timedelta(days=config['days'] - 1)
+    return config
+
+
+def confirm(config: Dict, key: str, prompt: str) -> bool:
+    """Answer a yes/no question from a headless config, or ask it interactively"""
+    if key in config:
+        return bool(config[key])
+    return input(prompt).strip().lower() == 'y'
+
+
+def run_shard(generator: BPITransactionGenerator, config: Dict) -> int:
+    """Generate shard k of n of a range run into the shared output directory, then record its manifest"""
+    shard, shards = config['shard']
+    output_dir = config['output_dir']
+    dates = [config['start_date'] + datetime.timedelta(days=day_num) for day_num in range(config['days'])]
+    grid = cell_grid(dates, len(generator.branches), generator.shard_branches)
+    cells = shard_cells(grid, shard, shards)
+    print(f"\nGenerating shard {shard}/{shards}: {len(cells)} of {len(grid)} (date, branch block) cells...")
+
+    written = {}
+    for date, block, batch in generator.iter_cells(cells):
+        if config['output_format'] == 'parquet':
+            with ParquetSink(output_dir, review_text=generator.include_review_text,
+                             part_prefix=f"branches-{block:04d}") as sink:
+                sink.write(batch)
+            path = sink.paths[0]
+        else:
+            path = os.path.join(output_dir, cell_file(date, block, 'csv'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            batch.to_pandas(review_text=generator.include_review_text).to_csv(path, index=False)
+
+        written[cell_key(date, block)] = {'file': os.path.relpath(path, output_dir), 'rows': len(batch),
+                                          'bytes': os.path.getsize(path)}
+        logger.info("  %s block %d: %d transactions", date, block, len(batch))
+
+    settings = generator.get_dataset_settings(config['start_date'], config['days'], config['output_format'])
+    manifest = write_shard_manifest(output_dir, shard, shards, settings, written)
+    total_records = sum(cell['rows'] for cell in written.values())
+
+    print(f"\n✅ Shard {shard}/{shards} complete!")
+    print(f"   Total records: {total_records:,}")
+    print(f"   Manifest: {manifest}")
+    return total_records
+
+
+def merge_shards(sheet_id: str, config: Dict) -> bool:
+    """Validate that the shards in the output directory form one complete dataset (and optionally combine them)"""
+    output_dir = config['output_dir']
+    manifests = load_shard_manifests(output_dir)
+
+    expected_rows = None
+    if manifests:
+        # Customer volumes depend only on the seed, branch names and calendar, so they can be recounted cheaply
+        settings = manifests[0]['settings']
+        counter = BPITransactionGenerator(sheet_id, seed=settings['seed'],
+                                          seasonal_demand=settings.get('seasonal_demand', False))
+        counter.branches = settings['branches']
+        counter.branch_profiles.add_branches(counter.branches)
+        counter.holidays = {datetime.date.fromisoformat(d): tuple(h) for d, h in settings.get('holidays', {}).items()}
+        counter.build_calendar()
+
+        def expected_rows(date: datetime.date, block: int) -> int:
+            return sum(counter.get_customer_volume(date, branch)
+                       for branch in block_branches(settings['branches'], block, settings['block_size']))
+
+    problems = validate_shards(output_dir, manifests, expected_rows)
+    if problems:
+        print(f"❌ Shards in {output_dir} are incomplete ({len(problems)} problems):")
+        for problem in problems[:20]:
+            print(f"   {problem}")
+        if len(problems) > 20:
+            print(f"   ... and {len(problems) - 20} more")
+        return False
+
+    manifest = write_dataset_manifest(output_dir, manifests)
+    total_records = sum(m['rows'] for m in manifests)
+    settings = manifests[0]['settings']
+    print(f"✅ {manifests[0]['shards']} shards complete: {total_records:,} records "
+          f"({settings['days']} days from {settings['start_date']}, {len(settings['branches'])} branches)")
+    print(f"   Manifest: {manifest}")
+
+    if config.get('combine'):
+        if settings['output_format'] != 'csv':
+            print(f"   Parquet cells already read as one dataset: {output_dir}/")
+        else:
+            filename = os.path.join(
+                output_dir, f"bpi_transactions_{settings['start_date'].replace('-', '')}_{total_records}records.csv")
+            combine_csv(output_dir, manifests, filename)
+            print(f"   Combined file: {filename}")
+    return True
+
+
+def main(argv: Optional[List[str]] = None):
+    # Flags or a config file run headless; no arguments keeps the interactive prompts
+    if argv is None:
+        argv = sys.argv[1:]
+    config = parse_args(argv) if argv else get_user_input()
+
+    # Headless runs only log warnings unless asked; interactive runs keep their progress output
+    if argv:
+        logging.basicConfig(level=config['log_level'].upper(), format="%(asctime)s %(levelname)s %(message)s")
+    else:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    exporter = None
+    if config.get('metrics_textfile') or config.get('metrics_port') is not None:
+        exporter = MetricsExporter(config.get('metrics_textfile'), config.get('metrics_port'),
+                                   config['metrics_interval']).start()
+        if exporter.port is not None:
+            logger.info("Serving metrics on http://127.0.0.1:%d/metrics", exporter.port)
+
+    try:
+        run(config)
+    finally:
+        if exporter:
+            exporter.close()
+
+
+def run(config: Dict):
+    """Run one generation job from a headless or interactive config"""
+    if config.get('merge'):
+        if not merge_shards(SHEET_ID, config):
+            sys.exit(1)
+        return
+
+    output_dir = config.get('output_dir', ".")
+    os.makedirs(output_dir, exist_ok=True)
 
     # Initialize the generator with data quality parameters
     generator = BPITransactionGenerator(
         SHEET_ID,
-        credentials_path="trashscan-450913-39acb2996c94.json",
+        credentials_path=CREDENTIALS_PATH,
         data_dispersion=config['dispersion'],
-        good_data_percentage=config['good_percentage']
+        good_data_percentage=config['good_percentage'],
+        vectorized=config.get('vectorized', False),
+        seed=config.get('seed'),
+        workers=config['workers'],
+        shard_branches=config.get('block_size', 50),
+        include_review_text=config['review_text'],
+        queue_model=config['queue_model'],
+        memory_budget_mb=config.get('memory_budget'),
+        seasonal_demand=config.get('seasonal_demand', False),
+        sheets_client=client_from_env(),  # BPI_FAKE_SHEETS=<db> runs against the local fake backend
+        output_dir=output_dir
     )
 
     # Load branches from CSV
@@ -903,57 +1900,119 @@ def main():
         return
 
     # Load review samples
-    if not generator.load_review_samples():
+    if not generator.load_review_samples(config.get('review_samples', "bpi_review_samples.csv")):
         print("⚠️  Warning: Failed to load review samples. Review text will be empty.")
-        proceed = input("Continue anyway? (y/n): ").strip().lower()
-        if proceed != 'y':
+        if not confirm(config, 'continue_without_reviews', "Continue anyway? (y/n): "):
             print("Exiting...")
             return
 
-    # Generate data based on mode
+    if not config['review_text'] and generator.review_samples:
+        # Output carries review_id only; the text lives in one small lookup table
+        if not config.get('shard'):
+            generator.save_review_table(os.path.join(output_dir, "bpi_review_table.csv"))
+        elif config['shard'][0] == 1:
+            # Written once per sharded dataset, with a leading underscore so dataset readers skip it
+            generator.save_review_table(os.path.join(output_dir, "_bpi_review_table.csv"))
+
+    # Optional intraday arrival profiles (built-in defaults otherwise)
+    hourly_profiles_file = config.get('hourly_profiles', "bpi_hourly_profiles.csv")
+    if os.path.exists(hourly_profiles_file):
+        generator.load_hourly_profiles(hourly_profiles_file)
+
+    # Public holidays for the calendar (they change volumes only with seasonal demand)
+    holidays_file = config.get('holidays', "ph_holidays.csv")
+    if os.path.exists(holidays_file):
+        generator.load_holidays(holidays_file)
+
+    if config.get('shard'):
+        run_shard(generator, config)
+        return
+
+    # Generate data based on mode (rows stream straight to disk, so memory stays flat)
+    partial_filename = os.path.join(output_dir,
+                                    f"bpi_transactions_{config['start_date'].strftime('%Y%m%d')}.partial.csv")
+
+    # Summary totals are kept as batches stream to disk, so nothing is read back afterwards
+    summary = SummaryAccumulator()
+
     if config['mode'] == 'today':
         print(f"\nGenerating data for today ({config['start_date']})...")
-        today_transactions = generator.generate_all_transactions_mixed(config['start_date'], 1)
-        df = pd.DataFrame(today_transactions)
+        batches = summary.observe(generator.generate_iter(config['start_date'], 1, mixed=True))
 
     elif config['mode'] == 'range':
         print(f"\nGenerating data for date range...")
-        df = generator.generate_date_range_data(config['start_date'], config['end_date'])
+        batches = summary.observe(generator.generate_iter(config['start_date'], config['days']))
 
-    elif config['mode'] == 'realtime':
+    if config['mode'] == 'realtime':
         print(f"\nStarting real-time streaming generation...")
         if not generator.gc:
             print("⚠️  Warning: No Google Sheets connection. Real-time streaming will only save to CSV.")
-            proceed = input("Continue anyway? (y/n): ").strip().lower()
-            if proceed != 'y':
+            if not confirm(config, 'continue_without_sheets', "Continue anyway? (y/n): "):
                 print("Exiting...")
                 return
 
-        df = generator.generate_with_realtime_streaming(
-            config['start_date'],
-            config['days'],
-            config['frequency'],
-            config['records_per_interval']
-        )
+        try:
+            total_records = generator.stream_realtime(
+                config['start_date'],
+                config['days'],
+                config['frequency'],
+                config['records_per_interval'],
+                output_file=partial_filename,
+                queue_full_policy=config['queue_full_policy'],
+                summary=summary
+            )
+        except KeyboardInterrupt:
+            print(f"Progress kept in {partial_filename}")
+            return
+
+        if os.path.exists(StreamCheckpoint(partial_filename).offset_path):
+            print(f"Progress kept in {partial_filename}")
+            return
+
+    elif config['output_format'] == 'parquet':
+        dataset_dir = os.path.join(output_dir,
+                                   f"bpi_transactions_{config['start_date'].strftime('%Y%m%d')}_{config['days']}days")
+        total_records = generator.save_batches_to_parquet(batches, dataset_dir)
+
+        summary.print_report(generator.good_data_percentage, generator.data_dispersion)
+        if config.get('summary_json'):
+            summary.write_json(config['summary_json'], generator.good_data_percentage, generator.data_dispersion)
+
+        print(f"\n✅ Generation complete!")
+        print(f"   Total records: {total_records:,}")
+        print(f"   Branches: {len(generator.branches)}")
+        print(f"   Dataset saved: {dataset_dir}/")
+        return
+
+    else:
+        total_records = generator.save_batches_to_csv(batches, partial_filename)
 
     # Save results
-    filename = f"bpi_transactions_{config['start_date'].strftime('%Y%m%d')}_{len(df)}records.csv"
-    generator.save_to_csv(df, filename)
+    filename = os.path.join(output_dir,
+                            f"bpi_transactions_{config['start_date'].strftime('%Y%m%d')}_{total_records}records.csv")
+    os.replace(partial_filename, filename)
+    print(f"Data saved to {filename}")
 
-    # Print detailed summary
-    generator.print_data_summary(df)
+    summary.print_report(generator.good_data_percentage, generator.data_dispersion)
+    if config.get('summary_json'):
+        summary.write_json(config['summary_json'], generator.good_data_percentage, generator.data_dispersion)
 
     # Upload to Google Sheets if available and not in realtime mode (realtime already uploads)
     if generator.gc and config['mode'] != 'realtime':
-        upload_choice = input("\nUpload to Google Sheets? (y/n/a - where 'a' means append): ").strip().lower()
+        if 'upload' in config:
+            upload_choice = {'no': 'n', 'replace': 'y', 'append': 'a'}[config['upload']]
+        else:
+            upload_choice = input("\nUpload to Google Sheets? (y/n/a - where 'a' means append): ").strip().lower()
         if upload_choice in ['y', 'a']:
             append_mode = upload_choice == 'a'
             action = "append to" if append_mode else "replace data in"
             print(f"Will {action} Google Sheets...")
-            generator.upload_to_sheets(df, append_mode=append_mode)
+            chunks = pd.read_csv(filename, chunksize=10000, keep_default_na=False)
+            for chunk_num, chunk in enumerate(chunks):
+                generator.upload_to_sheets(chunk, append_mode=append_mode or chunk_num > 0)
 
     print(f"\n✅ Generation complete!")
-    print(f"   Total records: {len(df):,}")
+    print(f"   Total records: {total_records:,}")
     print(
         f"   Date range: {config['start_date']} to {config['start_date'] + datetime.timedelta(days=config['days'] - 1)}")
     print(f"   Branches: {len(generator.branches)}")
@@ -961,4 +2020,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
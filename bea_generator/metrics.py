@@ -0,0 +1,269 @@
+"""
+Prometheus metrics for the BPI Transaction Generator.
+
+A small, dependency-free registry of counters, gauges and histograms that
+the generator, the Sheets uploader and the streaming loop update as they
+run (each update is a lock and an add, so metrics are always on). Nothing
+leaves the process unless an exporter is started: MetricsExporter
+rewrites a node_exporter textfile every few seconds (atomically, via a
+temporary file) and/or serves the same text exposition format on a local
+HTTP port at /metrics.
+
+Worker processes keep their own (unexported) registry; everything that is
+exported is counted in the main process.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Default histogram buckets in seconds, from sub-millisecond generation to slow API calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """{name="value",...} (empty string when there are no labels)"""
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def format_value(value: float) -> str:
+    """Sample value in exposition format"""
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple[str, ...], object] = {}
+        if not self.label_names:
+            self.values[()] = self.initial()  # Unlabelled metrics are exported from the start, at zero
+
+    def initial(self):
+        return 0
+
+    def key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.extend(self.samples(key, value))
+        return lines
+
+    def samples(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self.key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self.key(labels)] = value
+
+    def get(self, **labels) -> float:
+        return self.values.get(self.key(labels), 0)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels)
+
+    def initial(self):
+        return [0] * (len(self.buckets) + 1), 0.0
+
+    def observe(self, value: float, **labels):
+        key = self.key(labels)
+        with self.lock:
+            counts, total = self.values.get(key) or self.initial()
+            # Count in the first bucket the value fits; cumulated when rendered
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self, key: Tuple[str, ...], value) -> List[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{format_labels(self.label_names, key, ('le', format_value(bound)))} "
+                         f"{cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.label_names, key)} {format_value(total)}")
+        lines.append(f"{self.name}_count{format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+ROWS_GENERATED = REGISTRY.counter("bpi_rows_generated_total", "Transactions generated")
+ROWS_WRITTEN = REGISTRY.counter("bpi_rows_written_total", "Transactions written to an output file", ["sink"])
+ROWS_UPLOADED = REGISTRY.counter("bpi_rows_uploaded_total", "Transactions appended to Google Sheets")
+ROWS_NOT_UPLOADED = REGISTRY.counter("bpi_rows_not_uploaded_total",
+                                     "Transactions the background uploader dropped or failed to upload", ["reason"])
+SHEETS_RETRIES = REGISTRY.counter("bpi_sheets_retries_total", "Google Sheets API calls retried after 429/5xx")
+BATCH_GENERATION_SECONDS = REGISTRY.histogram("bpi_batch_generation_seconds",
+                                              "Time to generate one day of transactions across all branches")
+UPLOAD_SECONDS = REGISTRY.histogram("bpi_upload_latency_seconds",
+                                    "Duration of one Google Sheets append (including retries)")
+QUEUE_WAIT_SECONDS = REGISTRY.histogram("bpi_upload_queue_wait_seconds",
+                                        "Time a batch waited in the background upload queue")
+UPLOAD_QUEUE_DEPTH = REGISTRY.gauge("bpi_upload_queue_depth", "Batches waiting in the background upload queue")
+STREAM_UPLOAD_LAG = REGISTRY.gauge("bpi_stream_upload_lag_seconds",
+                                   "Seconds from queueing to upload completion of the latest write")
+STREAM_EMIT_LAG = REGISTRY.gauge("bpi_stream_emit_lag_seconds",
+                                 "How far the real-time emitter is behind its wall-clock schedule")
+STREAM_ROWS_PENDING = REGISTRY.gauge("bpi_stream_rows_unconfirmed",
+                                     "Streamed rows not yet confirmed in Google Sheets")
+
+
+class MetricsExporter:
+    def __init__(self, textfile: Optional[str] = None, port: Optional[int] = None, interval: float = 15.0,
+                 registry: MetricsRegistry = REGISTRY):
+        """
+        Export a registry (call start(); close() writes the final values)
+
+        Args:
+            textfile: Prometheus textfile to rewrite every interval seconds (node_exporter textfile collector)
+            port: Serve /metrics on this local port (0 = pick a free port, see self.port)
+            interval: Seconds between textfile rewrites
+            registry: Metrics to export
+        """
+        self.textfile = textfile
+        self.port = port
+        self.interval = interval
+        self.registry = registry
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+
+    def start(self) -> "MetricsExporter":
+        if self.port is not None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass  # Scrapes are not worth a log line each
+
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+            self.port = self.server.server_address[1]
+            self.threads.append(threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True))
+
+        if self.textfile:
+            self.write_textfile()
+            self.threads.append(threading.Thread(target=self.run, name="metrics-textfile", daemon=True))
+
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def run(self):
+        """Textfile loop"""
+        while not self.stop_event.wait(self.interval):
+            self.write_textfile()
+
+    def write_textfile(self):
+        """Rewrite the textfile atomically, so the collector never reads a partial file"""
+        temp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.registry.render())
+        os.replace(temp_path, self.textfile)
+
+    def close(self):
+        """Stop exporting (the textfile keeps the final values)"""
+        self.stop_event.set()
+        if self.textfile:
+            self.write_textfile()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+
+class Timer:
+    """Context manager observing elapsed seconds into a histogram"""
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
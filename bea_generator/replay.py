@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Wall-clock replay of pre-generated BPI transaction datasets.
+
+Reads a CSV file or a Parquet dataset written by generate.py and emits its
+rows to the usual sinks (CSV file, Parquet dataset, Google Sheets or the
+fake Sheets backend) at a target pace, so load tests spend no CPU on
+generation:
+
+    --rate N      N rows per second
+    --speedup F   the synthetic timestamps, F times faster than real time
+                  (rows are put in timestamp order within each day)
+    --max         as fast as the sinks accept them
+
+Every row has a due time on the replay clock. Rows that are due are sent
+together in one batch (at most one batch per --interval seconds, so fast
+rates do not turn into one write per row). A row's lag is how late it went
+out; the report gives the achieved rate next to the target and the mean,
+95th percentile and maximum lag.
+
+Usage:
+    python replay.py bpi_transactions_20250101_221914records.csv --rate 500 --sink csv:replayed.csv
+    python replay.py bpi_transactions_20250101_30days/ --speedup 600 --max-gap 60 --sink sheets
+    python replay.py dataset.csv --max --sink none --report replay_report.json
+
+The sheets sink joins review text from review_id with the run's review
+table (bpi_review_table.csv next to the source, or --review-table). The
+exit status is 1 when a sink failed, dropped or held back rows.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from generate import CREDENTIALS_PATH, SHEET_ID, TRANSACTION_COLUMNS, BPITransactionGenerator
+from fake_sheets import client_from_env
+from sinks import ParquetSink
+from sheets_sink import BackgroundUploader
+
+try:
+    import pyarrow.dataset as ds
+except ImportError:  # Parquet input is optional; CSV replay works without pyarrow
+    ds = None
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def read_source(path: str, batch_rows: int = 10000) -> Iterator[pd.DataFrame]:
+    """Chunks of a CSV file or Parquet dataset in stored order, with date and timestamp as CSV-style strings"""
+    if os.path.isdir(path):
+        if ds is None:
+            raise ImportError("pyarrow is required for Parquet input (pip install pyarrow)")
+        # Single-threaded scan keeps the dataset's file order (dates in order)
+        scanner = ds.dataset(path, format="parquet", partitioning="hive").scanner(batch_size=batch_rows,
+                                                                                  use_threads=False)
+        for record_batch in scanner.to_batches():
+            if record_batch.num_rows:
+                chunk = record_batch.to_pandas()
+                chunk = chunk[[column for column in TRANSACTION_COLUMNS if column in chunk]]  # date was a partition
+                chunk['date'] = chunk['date'].astype(str)
+                chunk['sentiment_score'] = np.round(chunk['sentiment_score'].astype(np.float64), 2)  # As in CSV
+                if 'timestamp' in chunk:
+                    chunk['timestamp'] = chunk['timestamp'].dt.strftime(TIMESTAMP_FORMAT)
+                yield chunk
+    else:
+        yield from pd.read_csv(path, chunksize=batch_rows, keep_default_na=False)
+
+
+def timestamp_seconds(frame: pd.DataFrame) -> np.ndarray:
+    """Timestamps as int64 seconds since the epoch"""
+    if 'timestamp' not in frame:
+        raise ValueError("--speedup replays by timestamp, but this dataset has no timestamp column")
+    return pd.to_datetime(frame['timestamp'], format=TIMESTAMP_FORMAT).to_numpy().astype('datetime64[s]').astype(
+        np.int64)
+
+
+def in_time_order(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """One frame per day in timestamp order (range output is in branch order; a day is held at a time)"""
+    pending: List[pd.DataFrame] = []
+
+    def flush_day() -> pd.DataFrame:
+        day = pd.concat(pending, ignore_index=True)
+        pending.clear()
+        return day.iloc[np.argsort(timestamp_seconds(day), kind='stable')].reset_index(drop=True)
+
+    for chunk in chunks:
+        # Datasets hold each date contiguously; a chunk may end one day and start the next
+        dates = chunk['date'].to_numpy()
+        starts = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+        for piece_num, piece in enumerate(np.split(np.arange(len(chunk)), starts)):
+            if pending and (piece_num > 0 or pending[-1]['date'].iat[-1] != dates[piece[0]]):
+                yield flush_day()
+            pending.append(chunk.iloc[piece])
+    if pending:
+        yield flush_day()
+
+
+class CsvReplaySink:
+    def __init__(self, path: str):
+        """Append replayed rows to a CSV file (header written with the first batch)"""
+        self.path = path
+        self.rows_written = 0
+
+    def write(self, batch: pd.DataFrame):
+        batch.to_csv(self.path, mode='w' if self.rows_written == 0 else 'a', header=self.rows_written == 0,
+                     index=False)
+        self.rows_written += len(batch)
+
+    def close(self) -> Dict:
+        return {'sink': f"csv:{self.path}", 'rows': self.rows_written}
+
+
+class ParquetReplaySink:
+    def __init__(self, root_dir: str):
+        """Write replayed rows to a date-partitioned Parquet dataset (see sinks.ParquetSink)"""
+        self.root_dir = root_dir
+        self.sink: Optional[ParquetSink] = None
+
+    def write(self, batch: pd.DataFrame):
+        if self.sink is None:
+            self.sink = ParquetSink(self.root_dir, review_text='review_text' in batch)
+        if 'timestamp' in batch:
+            batch = batch.assign(timestamp=pd.to_datetime(batch['timestamp'], format=TIMESTAMP_FORMAT))
+        self.sink.write(batch)
+
+    def close(self) -> Dict:
+        if self.sink is not None:
+            self.sink.close()
+        return {'sink': f"parquet:{self.root_dir}", 'rows': self.sink.rows_written if self.sink else 0}
+
+
+class SheetsReplaySink:
+    def __init__(self, generator, queue_full_policy: str = 'block', max_queue: int = 100):
+        """
+        Append replayed rows to Google Sheets through the generator's appender and write quota
+
+        Uploads run behind a BackgroundUploader, so a slow API call shows up as upload lag
+        instead of delaying the replay clock.
+        """
+        self.generator = generator
+        self.uploader = BackgroundUploader(generator.append_batch_to_sheets, max_queue=max_queue,
+                                           full_policy=queue_full_policy,
+                                           spill_path="bpi_replay.spill.csv").start()
+
+    def write(self, batch: pd.DataFrame):
+        self.uploader.submit(batch)
+
+    def close(self) -> Dict:
+        self.uploader.close()
+        try:
+            self.generator.flush_sheets()
+        except Exception as e:
+            print(f"❌ Final Google Sheets flush failed: {e}")  # Rows left pending are reported as held
+        self.uploader.settle(len(self.generator.get_sheets_appender().pending))
+        stats = self.uploader.stats()
+        return {'sink': "sheets", 'rows': stats['uploaded'], **stats}
+
+
+def replay(frames: Iterator[pd.DataFrame], sinks: List, rate: Optional[float] = None,
+           speedup: Optional[float] = None, max_gap: Optional[float] = None, interval: float = 0.1,
+           max_batch_rows: int = 5000, progress_seconds: float = 5.0) -> Dict:
+    """
+    Emit frames to sinks on the replay clock and return the achieved rate and lag
+
+    Args:
+        frames: Rows to replay, in emission order (in_time_order(...) for speedup)
+        sinks: Objects with write(DataFrame) and close() -> dict
+        rate: Target rows per second
+        speedup: Replay the timestamps this many times faster than real time (used when rate is None)
+        max_gap: Longest synthetic pause between consecutive rows, in timestamp seconds (e.g. overnight)
+        interval: Minimum seconds between batches while on schedule
+        max_batch_rows: Largest batch handed to the sinks at once
+        progress_seconds: Seconds between progress lines (0 = none)
+    """
+    rows_sent = 0
+    batches = 0
+    lag_sum = 0.0
+    batch_lags = []  # Lag of the oldest row of each batch (the largest in it)
+    synthetic_clock = 0.0  # Timestamp seconds replayed so far (after max_gap)
+    last_timestamp = None
+    last_emit = -interval
+    next_progress = progress_seconds
+    due = np.zeros(0)
+    interrupted = False
+    start = time.monotonic()
+
+    try:
+        for frame in frames:
+            n = len(frame)
+            if n == 0:
+                continue
+
+            # Due time of every row on the replay clock
+            if rate is not None:
+                due = (rows_sent + np.arange(n)) / rate
+            elif speedup is not None:
+                stamps = timestamp_seconds(frame)
+                previous = stamps[0] if last_timestamp is None else last_timestamp
+                gaps = np.diff(stamps, prepend=previous).astype(np.float64)
+                np.clip(gaps, 0, max_gap, out=gaps)
+                offsets = synthetic_clock + np.cumsum(gaps)
+                synthetic_clock, last_timestamp = offsets[-1], stamps[-1]
+                due = offsets / speedup
+            else:
+                due = np.zeros(n)
+
+            pos = 0
+            while pos < n:
+                now = time.monotonic() - start
+                ready = int(np.searchsorted(due, now, side='right'))
+                if ready <= pos:
+                    # Nothing due yet: sleep until the next row is (batches at most once per interval)
+                    time.sleep(max(due[pos], last_emit + interval) - now)
+                    continue
+                if now < last_emit + interval and ready - pos < max_batch_rows:
+                    # On schedule: let due rows gather into one batch per interval
+                    time.sleep(last_emit + interval - now)
+                    continue
+
+                stop = min(ready, pos + max_batch_rows)
+                batch = frame.iloc[pos:stop]
+                for sink in sinks:
+                    sink.write(batch)
+
+                last_emit = time.monotonic() - start
+                lags = last_emit - due[pos:stop]
+                lag_sum += float(lags.sum())
+                batch_lags.append(float(lags[0]))
+                rows_sent += stop - pos
+                batches += 1
+                pos = stop
+
+                if progress_seconds and last_emit >= next_progress:
+                    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {rows_sent:,} rows "
+                          f"({rows_sent / last_emit:,.0f} rows/s, lag {batch_lags[-1]:.3f}s)")
+                    next_progress = last_emit + progress_seconds
+    except KeyboardInterrupt:
+        interrupted = True  # Rows sent so far are still reported; sinks are closed below
+
+    elapsed = time.monotonic() - start
+    sink_stats = [sink.close() for sink in sinks]
+    paced = rows_sent > 0 and (rate is not None or speedup is not None)  # Lag is only meaningful on a schedule
+    if not paced:
+        scheduled = None
+    elif pos < len(due):
+        scheduled = float(due[pos])  # Due time of the first row not sent (due[0] if the frame had not started)
+    else:
+        scheduled = float(due[-1])  # Every row read was sent: the last one closes the schedule
+
+    return {
+        'rows': rows_sent,
+        'batches': batches,
+        'interrupted': interrupted,
+        'elapsed_seconds': round(elapsed, 3),
+        'target_rows_per_second': (rate if rate is not None else
+                                   round(rows_sent / scheduled, 1) if scheduled else None),
+        'achieved_rows_per_second': round(rows_sent / elapsed, 1) if elapsed > 0 else None,
+        'mean_lag_seconds': round(lag_sum / rows_sent, 4) if paced else None,
+        'p95_lag_seconds': round(float(np.percentile(batch_lags, 95)), 4) if paced else None,
+        'max_lag_seconds': round(max(batch_lags), 4) if paced else None,
+        'sinks': sink_stats
+    }
+
+
+def find_review_table(source: str) -> Optional[str]:
+    """The review table written with a dataset: next to a CSV file, or inside or next to a Parquet directory"""
+    directories = [source, os.path.dirname(os.path.abspath(source))] if os.path.isdir(source) else \
+        [os.path.dirname(os.path.abspath(source))]
+    for directory in directories:
+        for name in ("bpi_review_table.csv", "_bpi_review_table.csv"):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def build_sinks(specs: List[str], queue_full_policy: str, review_table: Optional[str] = None) -> List:
+    """Sinks from --sink specs: csv:PATH, parquet:DIR, sheets or none"""
+    sinks = []
+    for spec in specs:
+        kind, _, target = spec.partition(':')
+        if kind == 'csv' and target:
+            sinks.append(CsvReplaySink(target))
+        elif kind == 'parquet' and target:
+            sinks.append(ParquetReplaySink(target))
+        elif kind == 'sheets':
+            generator = BPITransactionGenerator(SHEET_ID, credentials_path=CREDENTIALS_PATH,
+                                                sheets_client=client_from_env())
+            if not generator.gc:
+                raise ValueError("The sheets sink needs a Google Sheets connection (or BPI_FAKE_SHEETS)")
+            # Sheets carry review text; id-only sources are joined with the run's lookup (or the samples)
+            if not (review_table and generator.load_review_table(review_table)) and \
+                    not generator.load_review_samples():
+                raise ValueError("The sheets sink needs the run's review table (--review-table) to join review "
+                                 "text into review_id-only sources")
+            sinks.append(SheetsReplaySink(generator, queue_full_policy))
+        elif kind != 'none':
+            raise ValueError(f"Unknown sink {spec!r} (csv:PATH, parquet:DIR, sheets or none)")
+    return sinks
+
+
+def not_delivered(stats: Dict) -> int:
+    """Rows a sink failed, dropped or still held back at the end"""
+    return stats.get('failed', 0) + stats.get('dropped', 0) + stats.get('held', 0)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a generated BPI dataset at a target rate")
+    parser.add_argument('source', help="CSV file or Parquet dataset directory written by generate.py")
+    pace = parser.add_mutually_exclusive_group(required=True)
+    pace.add_argument('--rate', type=float, help="Rows per second")
+    pace.add_argument('--speedup', type=float, help="Replay timestamps this many times faster than real time")
+    pace.add_argument('--max', action='store_true', help="As fast as the sinks accept rows")
+    parser.add_argument('--max-gap', type=float, help="Cap synthetic pauses (e.g. overnight) at this many seconds")
+    parser.add_argument('--sink', action='append', default=[],
+                        help="csv:PATH, parquet:DIR, sheets or none (repeatable; default: none)")
+    parser.add_argument('--interval', type=float, default=0.1, help="Minimum seconds between batches")
+    parser.add_argument('--max-batch-rows', type=int, default=5000)
+    parser.add_argument('--queue-full-policy', choices=BackgroundUploader.FULL_POLICIES, default='block',
+                        help="Sheets sink: what to do when uploads fall behind")
+    parser.add_argument('--review-table',
+                        help="review_id -> review_text lookup for the sheets sink (default: found next to the source)")
+    parser.add_argument('--report', help="Also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if (args.rate is not None and args.rate <= 0) or (args.speedup is not None and args.speedup <= 0):
+        parser.error("--rate and --speedup must be positive")
+
+    try:
+        sinks = build_sinks(args.sink, args.queue_full_policy, args.review_table or find_review_table(args.source))
+    except ValueError as e:
+        parser.error(str(e))
+
+    frames = read_source(args.source)
+    if args.speedup is not None:
+        frames = in_time_order(frames)
+    pace = f"{args.rate:,.0f} rows/s" if args.rate else f"{args.speedup:g}x timestamps" if args.speedup else "max"
+    print(f"▶️  Replaying {args.source} at {pace} into {', '.join(args.sink) or 'no sink'}")
+
+    report = replay(frames, sinks, rate=args.rate, speedup=args.speedup, max_gap=args.max_gap,
+                    interval=args.interval, max_batch_rows=args.max_batch_rows)
+
+    lost = sum(not_delivered(stats) for stats in report['sinks'])
+    outcome = ("⏹️  Interrupted after replaying" if report['interrupted'] else
+               "⚠️  Replayed (with undelivered rows)" if lost else "✅ Replayed")
+    print(f"\n{outcome} {report['rows']:,} rows in {report['batches']:,} batches "
+          f"over {report['elapsed_seconds']:.1f}s")
+    if report['target_rows_per_second']:
+        print(f"   Target rate:   {report['target_rows_per_second']:,.1f} rows/s")
+    print(f"   Achieved rate: {report['achieved_rows_per_second'] or 0:,.1f} rows/s")
+    if report['mean_lag_seconds'] is not None:
+        print(f"   Lag: mean {report['mean_lag_seconds']:.3f}s, p95 {report['p95_lag_seconds']:.3f}s, "
+              f"max {report['max_lag_seconds']:.3f}s")
+    for stats in report['sinks']:
+        print(f"   {stats['sink']}: {stats['rows']:,} rows")
+        if not_delivered(stats):
+            print(f"   ❌ {stats['sink']}: {stats.get('failed', 0):,} failed, {stats.get('dropped', 0):,} dropped, "
+                  f"{stats.get('held', 0):,} held back")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'source': args.source, 'rate': args.rate, 'speedup': args.speedup, 'max_gap': args.max_gap,
+                       **report}, f, indent=1)
+        print(f"   Report saved to {args.report}")
+
+    if lost:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Sharded generation for headless generate.py runs.
+
+A dataset is a grid of (date, branch block) cells, in canonical order:
+date first, then blocks of consecutive branches from the branch file.
+Shard k of n owns every n-th cell of that grid and writes each cell to its
+own file in the shared output directory (date=YYYY-MM-DD/branches-NNNN),
+so any number of processes or hosts can fill one directory without
+coordinating. Every branch-day has its own random stream, which makes a
+cell's rows independent of the shard that produced them.
+
+When a shard has written all of its cells it records them (file, rows,
+bytes) together with the run's settings in _shards/shard-K-of-N.json.
+The merge step checks that all n manifests exist and agree on the
+settings, that they cover every cell exactly once with the expected row
+counts, and that every file is still there at its recorded size; CSV
+cells can then be concatenated in canonical order, which gives the same
+file a single-process range run writes.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+SHARD_DIR = "_shards"
+DATASET_MANIFEST = "_manifest.json"
+
+Cell = Tuple[datetime.date, int]
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """(k, n) from 'k/n', with 1 <= k <= n"""
+    try:
+        shard, shards = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard must look like k/n, got {text!r}")
+    if not 1 <= shard <= shards:
+        raise ValueError(f"Shard {shard}/{shards} is out of range (need 1 <= k <= n)")
+    return shard, shards
+
+
+def cell_grid(dates: List[datetime.date], branch_count: int, block_size: int) -> List[Cell]:
+    """Every (date, branch block) cell of a dataset in canonical order"""
+    blocks = -(-branch_count // block_size)
+    return [(date, block) for date in dates for block in range(blocks)]
+
+
+def shard_cells(grid: List[Cell], shard: int, shards: int) -> List[Cell]:
+    """Cells owned by shard k of n (round robin, so every shard gets a similar mix of days)"""
+    return grid[shard - 1::shards]
+
+
+def block_branches(branches: List[str], block: int, block_size: int) -> List[str]:
+    """Branches of one block, in branch file order"""
+    return branches[block * block_size:(block + 1) * block_size]
+
+
+def cell_key(date: datetime.date, block: int) -> str:
+    """Manifest key of a cell"""
+    return f"{date.isoformat()}/{block:04d}"
+
+
+def cell_file(date: datetime.date, block: int, output_format: str) -> str:
+    """Path of a cell's file relative to the output directory"""
+    return os.path.join(f"date={date.isoformat()}", f"branches-{block:04d}.{output_format}")
+
+
+def settings_digest(settings: Dict) -> str:
+    """Short stable digest of a run's settings (shards of one dataset share it)"""
+    encoded = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def shard_manifest_path(output_dir: str, shard: int, shards: int) -> str:
+    """Manifest file of one shard"""
+    return os.path.join(output_dir, SHARD_DIR, f"shard-{shard:04d}-of-{shards:04d}.json")
+
+
+def write_json(path: str, data: Dict):
+    """Write JSON via a temporary file, so a manifest is either complete or absent"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=1)
+    os.replace(temp_path, path)
+
+
+def write_shard_manifest(output_dir: str, shard: int, shards: int, settings: Dict,
+                         cells: Dict[str, Dict]) -> str:
+    """Record a finished shard: its settings and {cell_key: {'file', 'rows', 'bytes'}}"""
+    path = shard_manifest_path(output_dir, shard, shards)
+    write_json(path, {
+        'shard': shard,
+        'shards': shards,
+        'settings': settings,
+        'settings_digest': settings_digest(settings),
+        'rows': sum(cell['rows'] for cell in cells.values()),
+        'cells': cells
+    })
+    return path
+
+
+def load_shard_manifests(output_dir: str) -> List[Dict]:
+    """Every shard manifest in an output directory"""
+    manifest_dir = os.path.join(output_dir, SHARD_DIR)
+    if not os.path.isdir(manifest_dir):
+        return []
+    manifests = []
+    for name in sorted(os.listdir(manifest_dir)):
+        if name.startswith("shard-") and name.endswith(".json"):
+            with open(os.path.join(manifest_dir, name)) as f:
+                manifests.append(json.load(f))
+    return manifests
+
+
+def validate_shards(output_dir: str, manifests: List[Dict],
+                    expected_rows: Optional[Callable[[datetime.date, int], int]] = None) -> List[str]:
+    """
+    Check that the shard manifests make up one complete dataset
+
+    Args:
+        output_dir: Shared output directory
+        manifests: Shard manifests (load_shard_manifests)
+        expected_rows: Rows a (date, block) cell must hold (None = skip the row count check)
+
+    Returns:
+        Problems found (empty when the dataset is complete)
+    """
+    if not manifests:
+        return [f"No shard manifests in {os.path.join(output_dir, SHARD_DIR)}"]
+
+    problems = []
+    shards = manifests[0]['shards']
+    digest = manifests[0]['settings_digest']
+    settings = manifests[0]['settings']
+
+    by_shard = {}
+    for manifest in manifests:
+        if manifest['shards'] != shards:
+            problems.append(f"Shard {manifest['shard']} was run as one of {manifest['shards']} shards, not {shards}")
+        elif manifest['settings_digest'] != digest:
+            problems.append(f"Shard {manifest['shard']} was generated with different settings")
+        else:
+            by_shard[manifest['shard']] = manifest
+    missing = sorted(set(range(1, shards + 1)) - set(by_shard))
+    if missing:
+        problems.append(f"Missing shards: {', '.join(f'{k}/{shards}' for k in missing)}")
+    if problems:
+        return problems
+
+    # Every cell of the grid exactly once, from the shard that owns it
+    start_date = datetime.date.fromisoformat(settings['start_date'])
+    dates = [start_date + datetime.timedelta(days=day_num) for day_num in range(settings['days'])]
+    grid = cell_grid(dates, len(settings['branches']), settings['block_size'])
+    for shard, manifest in by_shard.items():
+        owned = {cell_key(date, block): (date, block) for date, block in shard_cells(grid, shard, shards)}
+        listed = manifest['cells']
+        for key in sorted(set(owned) - set(listed)):
+            problems.append(f"Shard {shard}/{shards} is missing cell {key}")
+        for key in sorted(set(listed) - set(owned)):
+            problems.append(f"Shard {shard}/{shards} lists cell {key}, which belongs to another shard")
+
+        for key in sorted(set(owned) & set(listed)):
+            cell = listed[key]
+            path = os.path.join(output_dir, cell['file'])
+            if not os.path.exists(path):
+                problems.append(f"Cell {key}: {cell['file']} is missing")
+            elif os.path.getsize(path) != cell['bytes']:
+                problems.append(f"Cell {key}: {cell['file']} is {os.path.getsize(path)} bytes, "
+                                f"manifest says {cell['bytes']}")
+            if expected_rows is not None and cell['rows'] != expected_rows(*owned[key]):
+                problems.append(f"Cell {key}: {cell['rows']} rows, expected {expected_rows(*owned[key])}")
+    return problems
+
+
+def ordered_cells(manifests: List[Dict]) -> List[Dict]:
+    """All cells of a validated dataset in canonical (date, block) order"""
+    cells = {key: cell for manifest in manifests for key, cell in manifest['cells'].items()}
+    return [cells[key] for key in sorted(cells)]
+
+
+def write_dataset_manifest(output_dir: str, manifests: List[Dict]) -> str:
+    """Record the merged dataset: settings, total rows and every cell file in order"""
+    cells = ordered_cells(manifests)
+    path = os.path.join(output_dir, DATASET_MANIFEST)
+    write_json(path, {
+        'settings': manifests[0]['settings'],
+        'settings_digest': manifests[0]['settings_digest'],
+        'shards': manifests[0]['shards'],
+        'rows': sum(cell['rows'] for cell in cells),
+        'files': [cell['file'] for cell in cells]
+    })
+    return path
+
+
+def combine_csv(output_dir: str, manifests: List[Dict], filename: str) -> int:
+    """Concatenate the CSV cells in canonical order under one header; returns rows written"""
+    rows = 0
+    with open(filename, 'wb') as out:
+        for cell_num, cell in enumerate(ordered_cells(manifests)):
+            with open(os.path.join(output_dir, cell['file']), 'rb') as f:
+                header = f.readline()
+                if cell_num == 0:
+                    out.write(header)
+                while True:
+                    chunk = f.read(1 << 20)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+            rows += cell['rows']
+    return rows
@@ -0,0 +1,435 @@
+"""
+Google Sheets output for generated transactions.
+
+SheetsAppender appends rows to a worksheet without re-reading it: the row
+count is read once, the cursor is then tracked locally, and rows are
+written with values.append (INSERT_ROWS). The API reports where each
+append actually landed, so if another writer moved the end of the sheet
+the cursor re-syncs from that response instead of from a full read.
+
+WriteScheduler keeps every API call under the per-minute quota with a
+token bucket and retries 429/5xx responses with jittered exponential
+backoff; while no token is free the appender holds rows back and sends
+them together in the next write.
+
+BackgroundUploader runs uploads on a separate thread behind a bounded
+queue, so the real-time emitter keeps its wall-clock cadence while slow
+API calls catch up by merging queued batches into larger writes.
+"""
+
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from metrics import (QUEUE_WAIT_SECONDS, ROWS_NOT_UPLOADED, ROWS_UPLOADED, SHEETS_RETRIES, STREAM_UPLOAD_LAG,
+                     UPLOAD_QUEUE_DEPTH, UPLOAD_SECONDS, Timer)
+
+logger = logging.getLogger(__name__)
+
+# Matches the row numbers in an updatedRange such as "Sheet1!A101:L105"
+UPDATED_RANGE_PATTERN = re.compile(r"![A-Z]+(\d+)(?::[A-Z]+(\d+))?$")
+
+
+class WriteScheduler:
+    # HTTP statuses worth retrying (quota exceeded and server-side errors)
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, requests_per_minute: float = 60, burst: int = 5, max_retries: int = 8,
+                 base_delay: float = 1.0, max_delay: float = 64.0):
+        """
+        Initialize the scheduler (one per Sheets project; shared by every worksheet writer)
+
+        Args:
+            requests_per_minute: Sustained request rate (the Sheets per-minute quota)
+            burst: Requests that may go out back to back before the rate applies
+            max_retries: Retries of a request that fails with 429/5xx before the error is raised
+            base_delay: First backoff delay in seconds (doubled on each retry)
+            max_delay: Cap on a single backoff delay in seconds
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = random.Random()  # Backoff jitter only; never touches the data streams
+        self._lock = threading.Lock()  # Guards the bucket and the counters (writers share one scheduler)
+
+        self.requests = 0
+        self.retries = 0
+        self.waited = 0.0  # Seconds spent waiting for tokens or backing off
+
+    def refill(self):
+        """Add the tokens earned since the last update (call with the lock held)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now"""
+        with self._lock:
+            self.refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Take a token, waiting for one if the bucket is empty"""
+        while True:
+            with self._lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+    @staticmethod
+    def error_status(error: Exception) -> Optional[int]:
+        """HTTP status of a gspread APIError (None for other errors)"""
+        response = getattr(error, 'response', None)
+        return getattr(response, 'status_code', None)
+
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Retry-After if the API sent one, else exponential backoff with full jitter"""
+        response = getattr(error, 'response', None)
+        retry_after = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.jitter.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def run(self, fn: Callable, *args, acquired: bool = False, **kwargs):
+        """Call fn under the rate limit, retrying 429/5xx errors with backoff"""
+        attempt = 0
+        while True:
+            if not acquired:
+                self.acquire()
+            acquired = False
+            with self._lock:
+                self.requests += 1
+
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if self.error_status(e) not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    raise
+                with self._lock:
+                    delay = self.backoff_delay(attempt, e)
+                    self.retries += 1
+                    self.waited += delay
+                logger.warning("      ⏳ Sheets API returned %s; retrying in %.1fs", self.error_status(e), delay)
+                SHEETS_RETRIES.inc()
+                attempt += 1
+                time.sleep(delay)
+
+
+class SheetsAppender:
+    def __init__(self, worksheet, columns: List[str], scheduler: Optional[WriteScheduler] = None,
+                 max_write_rows: int = 10000, manifest=None):
+        """
+        Initialize the appender
+
+        Args:
+            worksheet: gspread Worksheet to append to
+            columns: Header row written when the worksheet is empty (a non-empty worksheet's row 1 must
+                match it, or be a prefix of it, which is then extended)
+            scheduler: Rate limiter/retrier for API calls (None = call the API directly)
+            max_write_rows: Upper bound on rows sent in one append request
+            manifest: DateManifest told where each date's rows landed (None = not tracked)
+        """
+        self.worksheet = worksheet
+        self.columns = columns
+        self.scheduler = scheduler
+        self.max_write_rows = max_write_rows
+        self.manifest = manifest
+        self.date_index = columns.index('date') if 'date' in columns else None
+        self.next_row: Optional[int] = None  # 1-based row the next append should land on
+        self.pending: List[List] = []  # Rows waiting for a write token
+        self.resyncs = 0
+        self.writes = 0
+
+    def call(self, fn: Callable, *args, acquired: bool = False, **kwargs):
+        """Run an API call through the scheduler (if any)"""
+        if self.scheduler is None:
+            return fn(*args, **kwargs)
+        return self.scheduler.run(fn, *args, acquired=acquired, **kwargs)
+
+    def sync(self):
+        """Read the current row count once (single-column read, not the whole sheet) and check the header"""
+        self.next_row = len(self.call(self.worksheet.col_values, 1)) + 1
+        if self.next_row > 1:
+            self.check_header()
+
+    def check_header(self):
+        """
+        Make sure rows will land under matching column names
+
+        A header that is a prefix of columns (an older layout without the newer trailing columns) is
+        extended in place; earlier rows keep their values and leave the new columns empty. Any other
+        header raises ValueError rather than appending misaligned rows.
+        """
+        header = self.call(self.worksheet.row_values, 1)
+        if header == self.columns:
+            return
+        if header and header == self.columns[:len(header)]:
+            self.call(self.worksheet.update, [self.columns], range_name='A1')
+            logger.info("      🧩 Extended the header of %s with %s", self.worksheet.title,
+                        ", ".join(self.columns[len(header):]))
+            return
+        raise ValueError(f"Worksheet {self.worksheet.title!r} has header {header}, expected {self.columns} "
+                         f"(clear it or write to another worksheet)")
+
+    def clear(self):
+        """Clear the worksheet (and any rows not yet written)"""
+        self.call(self.worksheet.clear)
+        self.pending = []
+        self.next_row = 1
+        if self.manifest is not None:
+            self.manifest.reset(self.worksheet.title)
+
+    def append(self, rows: List[List]) -> int:
+        """
+        Queue rows for appending; returns the row count accepted
+
+        Rows are written straight away when a write token is free. Otherwise they stay pending
+        and go out together with the next write, so bursts of small appends become one larger
+        request instead of queuing up behind the rate limit. Call flush() to write the remainder.
+        """
+        self.pending.extend(rows)
+        if self.pending and (self.scheduler is None or self.scheduler.try_acquire()):
+            self.write_pending(acquired=True)
+        return len(rows)
+
+    def flush(self):
+        """Write every pending row (waiting for tokens if needed)"""
+        if self.pending:
+            self.write_pending(acquired=False)
+
+    def write_pending(self, acquired: bool):
+        """Append pending rows in requests of up to max_write_rows; failed rows stay pending"""
+        if self.next_row is None:
+            self.sync()
+
+        while self.pending:
+            chunk = self.pending[:self.max_write_rows]
+            header_rows = 1 if self.next_row == 1 else 0
+            values = [self.columns] * header_rows + chunk
+            with Timer(UPLOAD_SECONDS):
+                response = self.call(self.worksheet.append_rows, values, acquired=acquired, value_input_option='RAW',
+                                     insert_data_option='INSERT_ROWS', table_range='A1')
+            acquired = False
+            del self.pending[:len(chunk)]
+            self.writes += 1
+            ROWS_UPLOADED.inc(len(chunk))
+
+            # Track the cursor from where the rows actually landed
+            landed = self.landed_rows(response)
+            if landed is None:
+                first_row = self.next_row
+                self.next_row += len(values)
+            else:
+                first_row, last_row = landed
+                if first_row != self.next_row:
+                    self.resyncs += 1
+                    logger.info("      ↪️  Sheet cursor re-synced: expected row %d, rows landed at %d",
+                                self.next_row, first_row)
+                self.next_row = last_row + 1
+
+            if self.manifest is not None and self.date_index is not None:
+                self.manifest.record(self.worksheet.title, first_row + header_rows,
+                                     [row[self.date_index] for row in chunk])
+
+    @staticmethod
+    def landed_rows(response) -> Optional[tuple]:
+        """First and last row of an append response's updatedRange (None if it is not reported)"""
+        try:
+            updated_range = response['updates']['updatedRange']
+        except (KeyError, TypeError):
+            return None
+
+        match = UPDATED_RANGE_PATTERN.search(updated_range)
+        if not match:
+            return None
+        first_row = int(match.group(1))
+        last_row = int(match.group(2) or first_row)
+        return first_row, last_row
+
+
+class BackgroundUploader:
+    # What submit() does when the queue is full
+    FULL_POLICIES = ('block', 'drop', 'spill')
+
+    def __init__(self, upload: Callable[[pd.DataFrame], Optional[int]], max_queue: int = 100,
+                 full_policy: str = 'block', spill_path: Optional[str] = None, max_write_rows: int = 5000):
+        """
+        Initialize the uploader (call start() to launch the thread)
+
+        Args:
+            upload: Function that writes one DataFrame (called only from the uploader thread); it may return
+                the rows its writer still holds back for a later write (e.g. waiting for quota), which are
+                counted as held rather than uploaded. Raising means the rows are lost (counted as failed)
+            max_queue: Maximum number of batches waiting to be uploaded
+            full_policy: 'block' waits for room, 'drop' discards the batch, 'spill' writes it to spill_path
+            spill_path: CSV file for spilled batches (uploaded when the uploader is closed)
+            max_write_rows: Upper bound on rows merged into one write when the queue has backed up
+        """
+        if full_policy not in self.FULL_POLICIES:
+            raise ValueError(f"full_policy must be one of {self.FULL_POLICIES}, got '{full_policy}'")
+        if full_policy == 'spill' and not spill_path:
+            raise ValueError("spill_path is required for the 'spill' policy")
+
+        self.upload = upload
+        self.full_policy = full_policy
+        self.spill_path = spill_path
+        self.max_write_rows = max_write_rows
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()  # Guards the counters (updated from both threads)
+
+        # Counters (rows unless noted)
+        self.submitted = 0
+        self.uploaded = 0
+        self.held = 0  # Handed to the writer but held back for a later write (not lost, not yet uploaded)
+        self.dropped = 0
+        self.spilled = 0
+        self.failed = 0
+        self.writes = 0  # API writes, after merging queued batches
+        self.last_lag = 0.0  # Seconds from submit() to upload completion for the latest write
+        self.max_lag = 0.0
+
+    def start(self) -> "BackgroundUploader":
+        """Launch the uploader thread"""
+        self.thread = threading.Thread(target=self.run, name="sheets-uploader", daemon=True)
+        self.thread.start()
+        return self
+
+    def submit(self, df: pd.DataFrame) -> bool:
+        """Queue a batch for upload; returns False if it was dropped or spilled instead"""
+        item = (time.monotonic(), df)
+        with self._lock:
+            self.submitted += len(df)
+
+        if self.full_policy == 'block':
+            self.queue.put(item)
+            UPLOAD_QUEUE_DEPTH.set(self.depth())
+            return True
+
+        try:
+            self.queue.put_nowait(item)
+            UPLOAD_QUEUE_DEPTH.set(self.depth())
+            return True
+        except queue.Full:
+            if self.full_policy == 'drop':
+                with self._lock:
+                    self.dropped += len(df)
+                ROWS_NOT_UPLOADED.inc(len(df), reason='dropped')
+            else:
+                df.to_csv(self.spill_path, mode='a', header=not os.path.exists(self.spill_path))
+                with self._lock:
+                    self.spilled += len(df)
+            return False
+
+    def depth(self) -> int:
+        """Batches waiting in the queue"""
+        return self.queue.qsize()
+
+    def run(self):
+        """Uploader loop: merge whatever has queued up (bounded by max_write_rows) into one write"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            items = [item]
+            rows = len(item[1])
+            stop = False
+            while rows < self.max_write_rows:
+                try:
+                    queued = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is None:
+                    stop = True
+                    break
+                items.append(queued)
+                rows += len(queued[1])
+
+            UPLOAD_QUEUE_DEPTH.set(self.depth())
+            now = time.monotonic()
+            for submitted, _ in items:
+                QUEUE_WAIT_SECONDS.observe(now - submitted)
+
+            self.write([df for _, df in items], oldest_submit=items[0][0])
+            if stop:
+                return
+
+    def write(self, frames: List[pd.DataFrame], oldest_submit: float):
+        """Upload merged frames and record lag; failures are counted, not raised"""
+        df = frames[0] if len(frames) == 1 else pd.concat(frames)  # Index kept so callers can track rows
+        try:
+            held = self.upload(df) or 0
+            with self._lock:
+                # Rows held back earlier may have gone out with this write
+                self.uploaded += max(0, self.held + len(df) - held)
+                self.held = held
+                self.writes += 1
+                self.last_lag = time.monotonic() - oldest_submit
+                self.max_lag = max(self.max_lag, self.last_lag)
+                lag = self.last_lag
+            STREAM_UPLOAD_LAG.set(lag)
+        except Exception as e:
+            with self._lock:
+                self.failed += len(df)
+            ROWS_NOT_UPLOADED.inc(len(df), reason='failed')
+            logger.error("      ❌ Background upload failed (%d records): %s", len(df), e)
+
+    def close(self) -> Dict[str, float]:
+        """Drain the queue, upload any spilled batches, stop the thread and return the final stats"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+        if self.spill_path and os.path.exists(self.spill_path):
+            logger.info("      📤 Uploading %d spilled records from %s", self.spilled, self.spill_path)
+            for chunk in pd.read_csv(self.spill_path, chunksize=self.max_write_rows, index_col=0,
+                                     keep_default_na=False):
+                self.write([chunk], oldest_submit=time.monotonic())
+            os.remove(self.spill_path)
+
+        return self.stats()
+
+    def settle(self, held: int = 0):
+        """Account for a final flush of the writer after close(): rows it no longer holds back were uploaded"""
+        with self._lock:
+            self.uploaded += max(0, self.held - held)
+            self.held = held
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of queue depth, lag and row counters"""
+        with self._lock:
+            return {
+                'queue_depth': self.depth(),
+                'last_lag_seconds': round(self.last_lag, 3),
+                'max_lag_seconds': round(self.max_lag, 3),
+                'submitted': self.submitted,
+                'uploaded': self.uploaded,
+                'held': self.held,
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+                'failed': self.failed,
+                'writes': self.writes
+            }
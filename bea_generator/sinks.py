@@ -0,0 +1,165 @@
+"""
+Typed output sinks for generated transactions.
+
+ParquetSink writes Arrow record batches to a Hive-partitioned Parquet
+dataset (date=YYYY-MM-DD[/branch_bucket=N]) with dictionary-encoded
+categorical columns and small integer time columns, so consumers can
+read only the partitions and columns they need without re-parsing CSV.
+"""
+
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional; CSV output works without pyarrow
+    pa = None
+
+# Columns stored in each Parquet file (date and branch_bucket live in the partition path)
+if pa is not None:
+    TRANSACTION_SCHEMA = pa.schema([
+        ('transaction_id', pa.string()),
+        ('customer_id', pa.string()),
+        ('branch_name', pa.dictionary(pa.int32(), pa.string())),
+        ('transaction_type', pa.dictionary(pa.int8(), pa.string())),
+        ('waiting_time', pa.int16()),
+        ('processing_time', pa.int16()),
+        ('transaction_time', pa.int16()),
+        ('timestamp', pa.timestamp('s')),
+        ('sentiment', pa.dictionary(pa.int8(), pa.string())),
+        ('sentiment_score', pa.float32()),
+        ('review_id', pa.int16()),
+        ('review_text', pa.dictionary(pa.int16(), pa.string())),
+        ('bhs', pa.string())
+    ])
+
+
+def transaction_schema(review_text: bool = False) -> "pa.Schema":
+    """File schema, with or without the joined review_text column"""
+    if review_text:
+        return TRANSACTION_SCHEMA
+    return TRANSACTION_SCHEMA.remove(TRANSACTION_SCHEMA.get_field_index('review_text'))
+
+
+def branch_bucket(branch_name: str, buckets: int) -> int:
+    """Stable bucket number for a branch (same in every process and run)"""
+    digest = hashlib.blake2b(branch_name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % buckets
+
+
+class ParquetSink:
+    def __init__(self, root_dir: str, branch_buckets: int = 0, compression: str = "zstd",
+                 review_text: bool = False, part_prefix: str = "part"):
+        """
+        Initialize the Parquet sink
+
+        Args:
+            root_dir: Dataset directory (created if missing)
+            branch_buckets: Also partition by branch_bucket=N when > 0
+            compression: Parquet compression codec
+            review_text: Also store the review text (review_id is always stored)
+            part_prefix: File name prefix of the part files (<prefix>-NNNNN.parquet)
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+
+        self.root_dir = root_dir
+        self.branch_buckets = branch_buckets
+        self.compression = compression
+        self.review_text = review_text
+        self.schema = transaction_schema(review_text)
+        self.writers: Dict[str, "pq.ParquetWriter"] = {}  # Open writer per partition directory
+        self.part_prefix = part_prefix
+        self.part_counter = 0
+        self.paths: List[str] = []  # Part files written, in order
+        self.rows_written = 0
+
+        os.makedirs(root_dir, exist_ok=True)
+
+    def partition_dir(self, date: str, bucket: Optional[int] = None) -> str:
+        """Directory of one partition"""
+        parts = [self.root_dir, f"date={date}"]
+        if bucket is not None:
+            parts.append(f"branch_bucket={bucket}")
+        return os.path.join(*parts)
+
+    def write(self, batch) -> int:
+        """Write one TransactionBatch or DataFrame, splitting it across its partitions; returns rows written"""
+        if not isinstance(batch, pd.DataFrame):
+            # Categorical codes map straight onto dictionary columns
+            batch = batch.to_pandas(categorical=True, review_text=self.review_text)
+        if batch.empty:
+            return 0
+
+        keys = ['date']
+        if self.branch_buckets:
+            # Every category gets a bucket: a categorical column may list branches this batch does not hold,
+            # and an unmapped category would turn the buckets into floats (branch_bucket=1.0)
+            names = batch['branch_name']
+            categories = names.cat.categories if isinstance(names.dtype, pd.CategoricalDtype) else names.unique()
+            buckets = {name: branch_bucket(name, self.branch_buckets) for name in categories}
+            batch = batch.assign(branch_bucket=names.map(buckets).astype(np.int32))
+            keys.append('branch_bucket')
+
+        active_partitions = set()
+        for key, partition in batch.groupby(keys, sort=False, observed=True):
+            date, bucket = (key[0], key[1]) if self.branch_buckets else (key[0], None)
+            directory = self.partition_dir(date, bucket)
+            active_partitions.add(directory)
+
+            table = pa.Table.from_pandas(partition[self.schema.names], schema=self.schema, preserve_index=False)
+            self.writer_for(directory).write_table(table)
+
+        # Batches arrive in date order, so partitions missing from this batch are complete
+        for directory in list(self.writers):
+            if directory not in active_partitions:
+                self.writers.pop(directory).close()
+
+        self.rows_written += len(batch)
+        return len(batch)
+
+    def writer_for(self, directory: str) -> "pq.ParquetWriter":
+        """Open (or reuse) the writer for a partition; reopened partitions get a new part file"""
+        if directory not in self.writers:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{self.part_prefix}-{self.part_counter:05d}.parquet")
+            self.part_counter += 1
+            self.paths.append(path)
+            self.writers[directory] = pq.ParquetWriter(path, self.schema, compression=self.compression)
+        return self.writers[directory]
+
+    def close(self):
+        """Close every open partition writer"""
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_transactions(root_dir: str, columns: Optional[List[str]] = None,
+                      dates: Optional[List[str]] = None, branch_buckets: Optional[List[int]] = None) -> pd.DataFrame:
+    """Read only the requested columns and partitions of a Parquet transaction dataset"""
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet input (pip install pyarrow)")
+
+    dataset = ds.dataset(root_dir, format="parquet", partitioning="hive")
+
+    expression = None
+    if dates:
+        expression = ds.field('date').isin(list(dates))
+    if branch_buckets:
+        bucket_filter = ds.field('branch_bucket').isin(list(branch_buckets))
+        expression = bucket_filter if expression is None else expression & bucket_filter
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
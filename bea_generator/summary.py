@@ -0,0 +1,253 @@
+"""
+Running summary of generated transactions.
+
+SummaryAccumulator updates one TransactionBatch (or DataFrame) at a time as
+batches stream to disk, so the end-of-run report needs no second pass over
+the output and no rows held in memory. Means and variances are Welford
+running moments: each batch's count, mean and sum of squared deviations are
+computed in one vectorized pass and merged into the totals with Chan's
+parallel update, which stays accurate for any run length. The same moments
+are kept per branch, next to per-type and per-sentiment counters.
+
+The report is available as printed text (the same as the original
+print_data_summary) or as a JSON-ready dict, which makes it a cheap quality
+check for runs far too large to load back.
+"""
+
+import datetime
+import json
+import math
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from transaction_batch import SENTIMENTS, TransactionBatch
+
+TIME_COLUMNS = ['waiting_time', 'processing_time', 'transaction_time']
+
+
+class Moments:
+    """Welford count, mean and sum of squared deviations for each of a growable set of groups"""
+
+    def __init__(self, groups: int = 1):
+        self.count = np.zeros(groups, dtype=np.int64)
+        self.mean = np.zeros(groups)
+        self.m2 = np.zeros(groups)
+
+    def grow(self, groups: int):
+        extra = groups - len(self.count)
+        if extra > 0:
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+            self.mean = np.concatenate([self.mean, np.zeros(extra)])
+            self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+
+    def add(self, values: np.ndarray, groups: Optional[np.ndarray] = None):
+        """Merge a batch of values (group 0 unless groups gives each value's group)"""
+        values = values.astype(np.float64)
+        size = len(self.count)
+        if groups is None:
+            groups = np.zeros(len(values), dtype=np.intp)
+
+        count = np.bincount(groups, minlength=size)
+        present = count > 0
+        mean = np.divide(np.bincount(groups, weights=values, minlength=size), count, out=np.zeros(size),
+                         where=present)
+        deviations = values - mean[groups]
+        m2 = np.bincount(groups, weights=deviations * deviations, minlength=size)
+
+        # Chan et al.: combine (n_a, mean_a, M2_a) with (n_b, mean_b, M2_b)
+        total = self.count + count
+        delta = mean - self.mean
+        weight = np.divide(count, total, out=np.zeros(size), where=present)
+        self.mean = np.where(present, self.mean + delta * weight, self.mean)
+        self.m2 = np.where(present, self.m2 + m2 + delta * delta * self.count * weight, self.m2)
+        self.count = total
+
+    def std(self) -> np.ndarray:
+        """Sample standard deviation (ddof=1, like pandas; NaN below two values)"""
+        variance = np.divide(self.m2, self.count - 1, out=np.full(len(self.count), np.nan), where=self.count > 1)
+        return np.sqrt(np.maximum(variance, 0.0))
+
+
+def json_number(value: float) -> Optional[float]:
+    """NaN has no JSON form"""
+    return None if math.isnan(value) else float(value)
+
+
+class SummaryAccumulator:
+    def __init__(self):
+        self.rows = 0
+        self.first_date: Optional[str] = None
+        self.last_date: Optional[str] = None
+        self.time_moments = {column: Moments() for column in TIME_COLUMNS}
+        self.score_moments = Moments()
+        self.good_rows = 0  # sentiment_score >= 3.5
+        self.bad_rows = 0  # sentiment_score < 3.0
+        self.sentiment_counts: Dict[str, int] = {}
+        self.type_counts: Dict[str, int] = {}
+        self.branch_names: List[str] = []
+        self.branch_positions: Dict[str, int] = {}
+        self.branch_time_moments = Moments(0)
+        self.branch_score_moments = Moments(0)
+
+    def update(self, batch: TransactionBatch):
+        """Add one batch's rows to the totals"""
+        if len(batch) == 0:
+            return
+        first, last = int(batch.date_ordinals.min()), int(batch.date_ordinals.max())
+        self.add(
+            first_date=datetime.date.fromordinal(first).isoformat(),
+            last_date=datetime.date.fromordinal(last).isoformat(),
+            times={column: getattr(batch, column) for column in TIME_COLUMNS},
+            # Scores as written (rounded to 2 decimals), so the report matches the output files
+            scores=np.round(batch.sentiment_score.astype(np.float64), 2),
+            sentiment_counts=dict(zip(SENTIMENTS, np.bincount(batch.sentiment_codes,
+                                                              minlength=len(SENTIMENTS)).tolist())),
+            type_counts=dict(zip(batch.transaction_types, np.bincount(batch.type_codes,
+                                                                      minlength=len(batch.transaction_types)).tolist())),
+            branch_ids=batch.branch_ids,
+            branch_names=batch.branch_names)
+
+    def update_frame(self, df: pd.DataFrame):
+        """Add the rows of a transaction DataFrame (as returned by the generate_* methods)"""
+        if df.empty:
+            return
+        dates = df['date'].astype(str)
+        branch_ids, branch_names = pd.factorize(df['branch_name'])
+        self.add(
+            first_date=dates.min(),
+            last_date=dates.max(),
+            times={column: df[column].to_numpy() for column in TIME_COLUMNS},
+            scores=df['sentiment_score'].to_numpy(dtype=np.float64),
+            sentiment_counts=df['sentiment'].value_counts(sort=False).to_dict(),
+            type_counts=df['transaction_type'].value_counts(sort=False).to_dict(),
+            branch_ids=branch_ids,
+            branch_names=list(branch_names))
+
+    def add(self, first_date: str, last_date: str, times: Dict[str, np.ndarray], scores: np.ndarray,
+            sentiment_counts: Dict[str, int], type_counts: Dict[str, int], branch_ids: np.ndarray,
+            branch_names: Sequence[str]):
+        """Merge one batch's columns into the totals"""
+        self.rows += len(scores)
+        self.first_date = first_date if self.first_date is None else min(self.first_date, first_date)
+        self.last_date = last_date if self.last_date is None else max(self.last_date, last_date)
+
+        for column in TIME_COLUMNS:
+            self.time_moments[column].add(times[column])
+        self.score_moments.add(scores)
+        self.good_rows += int(np.count_nonzero(scores >= 3.5))
+        self.bad_rows += int(np.count_nonzero(scores < 3.0))
+
+        for counter, counts in ((self.sentiment_counts, sentiment_counts), (self.type_counts, type_counts)):
+            for name, count in counts.items():
+                if count:
+                    counter[name] = counter.get(name, 0) + int(count)
+
+        # Batch dictionaries differ between runs and workers, so branches are keyed by name
+        lookup = np.array([self.branch_position(name) for name in branch_names], dtype=np.intp)
+        self.branch_time_moments.grow(len(self.branch_names))
+        self.branch_score_moments.grow(len(self.branch_names))
+        groups = lookup[branch_ids]
+        self.branch_time_moments.add(times['transaction_time'], groups)
+        self.branch_score_moments.add(scores, groups)
+
+    def branch_position(self, name: str) -> int:
+        position = self.branch_positions.get(name)
+        if position is None:
+            position = self.branch_positions[name] = len(self.branch_names)
+            self.branch_names.append(name)
+        return position
+
+    def observe(self, batches: Iterator[TransactionBatch]) -> Iterator[TransactionBatch]:
+        """Pass batches through unchanged, adding each to the totals on the way"""
+        for batch in batches:
+            self.update(batch)
+            yield batch
+
+    def mean(self, column: str) -> float:
+        return float(self.time_moments[column].mean[0])
+
+    def std(self, column: str) -> float:
+        """Sample standard deviation (ddof=1, like pandas)"""
+        return float(self.time_moments[column].std()[0])
+
+    def report(self, good_data_percentage: float, data_dispersion: float) -> Dict:
+        """The summary as plain JSON-ready values (branches ordered by average transaction time)"""
+        if self.rows == 0:
+            return {'rows': 0}
+
+        branch_stds = self.branch_time_moments.std()
+        branches = sorted(
+            ({'branch': name,
+              'transactions': int(self.branch_time_moments.count[i]),
+              'avg_time': float(self.branch_time_moments.mean[i]),
+              'std_time': json_number(branch_stds[i]),
+              'avg_sentiment': float(self.branch_score_moments.mean[i])}
+             for i, name in enumerate(self.branch_names) if self.branch_time_moments.count[i]),
+            key=lambda stats: (round(stats['avg_time'], 2), stats['branch']))
+
+        return {
+            'rows': self.rows,
+            'first_date': self.first_date,
+            'last_date': self.last_date,
+            'branches': len(branches),
+            'time': {column: {'mean': self.mean(column), 'std': json_number(self.std(column))}
+                     for column in TIME_COLUMNS},
+            'sentiment_score': {'mean': float(self.score_moments.mean[0]),
+                                'std': json_number(float(self.score_moments.std()[0]))},
+            'sentiment_counts': dict(sorted(self.sentiment_counts.items(), key=lambda item: -item[1])),
+            'transaction_type_counts': dict(sorted(self.type_counts.items(), key=lambda item: -item[1])),
+            'branch_performance': branches,
+            'quality': {'target_good_percentage': good_data_percentage,
+                        'actual_good_percentage': self.good_rows / self.rows * 100,
+                        'actual_bad_percentage': self.bad_rows / self.rows * 100,
+                        'dispersion': data_dispersion},
+        }
+
+    def write_json(self, path: str, good_data_percentage: float, data_dispersion: float):
+        with open(path, 'w') as f:
+            json.dump(self.report(good_data_percentage, data_dispersion), f, indent=2)
+
+    def print_report(self, good_data_percentage: float, data_dispersion: float):
+        """Print the summary in the generator's report layout"""
+        report = self.report(good_data_percentage, data_dispersion)
+        if report['rows'] == 0:
+            print("No data to summarize")
+            return
+        rows = report['rows']
+        time = report['time']
+
+        print(f"\n📊 Generated Data Summary:")
+        print(f"   Total transactions: {rows:,}")
+        print(f"   Date range: {report['first_date']} to {report['last_date']}")
+        print(f"   Branches: {report['branches']}")
+
+        print(f"\n⏱️  Time Statistics:")
+        print(f"   Average waiting time: {time['waiting_time']['mean']:.2f} minutes")
+        print(f"   Average processing time: {time['processing_time']['mean']:.2f} minutes")
+        print(f"   Average total time: {time['transaction_time']['mean']:.2f} minutes")
+        print(f"   Waiting time std dev: {self.std('waiting_time'):.2f}")
+        print(f"   Processing time std dev: {self.std('processing_time'):.2f}")
+
+        print(f"\n😊 Sentiment Statistics:")
+        print(f"   Average sentiment score: {report['sentiment_score']['mean']:.2f}")
+        print(f"   Sentiment distribution:")
+        for sentiment, count in report['sentiment_counts'].items():
+            print(f"     {sentiment}: {count:,} ({count / rows * 100:.1f}%)")
+
+        print(f"\n🏦 Transaction Types:")
+        for ttype, count in report['transaction_type_counts'].items():
+            print(f"     {ttype}: {count:,} ({count / rows * 100:.1f}%)")
+
+        print(f"\n📈 Branch Performance (Top 5 by avg transaction time):")
+        for i, stats in enumerate(report['branch_performance'][:5]):
+            print(f"     {i + 1}. {stats['branch']}: {round(stats['avg_time'], 2)}min, "
+                  f"{float(stats['transactions'])} txns, {round(stats['avg_sentiment'], 2)} sentiment")
+
+        quality = report['quality']
+        print(f"\n🎯 Data Quality Achieved:")
+        print(f"   Target good data: {quality['target_good_percentage']:.1f}%")
+        print(f"   Actual good data: {quality['actual_good_percentage']:.1f}%")
+        print(f"   Actual bad data: {quality['actual_bad_percentage']:.1f}%")
+        print(f"   Dispersion factor used: {quality['dispersion']}")
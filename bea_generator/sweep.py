@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Scenario sweep for the BPI Transaction Generator.
+
+Runs every combination of a parameter grid (dispersion, good data
+percentage, teller queue model, seasonal demand) over the same branches,
+dates and seed, and writes one comparison table of summary statistics per
+scenario. Branches, branch profiles, review samples, hourly profiles and
+the calendar are loaded once and handed to each worker process when it
+starts; a scenario then only builds its own time ranges and streams its
+batches into a SummaryAccumulator, so nothing is written but the table.
+Scenarios share the seed, so differences between rows come from the
+settings alone.
+
+Usage:
+    python sweep.py                                                   # 3 x 3 dispersion/quality grid
+    python sweep.py --dispersion 0.5,0.75,1,1.5,2 --good-percentage 50,60,70,80,90 --queue-model no,yes
+    python sweep.py --grid grid.json --days 30 --output sweep_30days.csv
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+import pandas as pd
+
+from calendar_table import DEFAULT_DEMAND_FACTORS, CalendarTable
+from generate import BPITransactionGenerator
+from summary import SummaryAccumulator
+
+# Sweepable settings and their defaults when a grid leaves them out
+GRID_DEFAULTS = {
+    'dispersion': [0.5, 1.0, 2.0],
+    'good_percentage': [50.0, 70.0, 80.0],
+    'queue_model': [False],
+    'seasonal_demand': [False],
+}
+
+START_DATE = datetime.date(2025, 1, 6)
+
+
+def parse_flags(value: str) -> List[bool]:
+    """'no,yes' -> [False, True]"""
+    flags = {'no': False, 'n': False, 'false': False, '0': False, 'yes': True, 'y': True, 'true': True, '1': True}
+    try:
+        return [flags[item.strip().lower()] for item in value.split(',') if item.strip()]
+    except KeyError as e:
+        raise argparse.ArgumentTypeError(f"Expected yes/no values, got {e}")
+
+
+def parse_numbers(value: str) -> List[float]:
+    return [float(item) for item in value.split(',') if item.strip()]
+
+
+def build_scenarios(grid: Dict[str, list]) -> List[Dict]:
+    """Every combination of the grid values, in grid order"""
+    keys = list(GRID_DEFAULTS)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def scenario_name(scenario: Dict) -> str:
+    name = f"d={scenario['dispersion']:g} good={scenario['good_percentage']:g}%"
+    if scenario['queue_model']:
+        name += " queue"
+    if scenario['seasonal_demand']:
+        name += " seasonal"
+    return name
+
+
+def load_shared(args) -> Dict:
+    """Everything scenarios have in common, loaded once in the parent process"""
+    base = BPITransactionGenerator("sweep", vectorized=args.engine == 'vectorized', seed=args.seed)
+    if not base.load_branches(args.branch_file):
+        raise SystemExit(f"Failed to load branches from {args.branch_file}")
+    if args.branches:
+        base.branches = base.branches[:args.branches]
+    base.branch_profiles.add_branches(base.branches)
+    base.load_review_samples(args.review_samples)
+    if os.path.exists(args.hourly_profiles):
+        base.load_hourly_profiles(args.hourly_profiles)
+    if os.path.exists(args.holidays):
+        base.load_holidays(args.holidays)
+
+    # Both calendars are built for the swept dates up front, so workers never rebuild them
+    end_date = args.start_date + datetime.timedelta(days=args.days - 1)
+    calendars = {seasonal: CalendarTable(base.holidays, DEFAULT_DEMAND_FACTORS if seasonal else None)
+                 for seasonal in (False, True)}
+    for calendar in calendars.values():
+        calendar.cover(args.start_date, end_date)
+
+    return {
+        'seed': base.streams.master_seed,
+        'vectorized': base.vectorized,
+        'branches': base.branches,
+        'branch_profiles': base.branch_profiles,
+        'review_samples': base.review_samples,
+        'review_weights': base.review_weights,
+        'hourly_profiles': base.hourly_profiles,
+        'holidays': base.holidays,
+        'calendars': calendars,
+        'start_date': args.start_date,
+        'days': args.days,
+    }
+
+
+# Shared inputs, set once per worker process
+_shared = None
+
+
+def _init_sweep_worker(shared: Dict):
+    global _shared
+    _shared = shared
+
+
+def run_scenario(scenario: Dict) -> Dict:
+    """Generate one scenario into a summary (inside a worker process)"""
+    start = time.perf_counter()
+    generator = BPITransactionGenerator(
+        "sweep",
+        data_dispersion=scenario['dispersion'],
+        good_data_percentage=scenario['good_percentage'],
+        vectorized=_shared['vectorized'],
+        seed=_shared['seed'],
+        hourly_profiles=_shared['hourly_profiles'],
+        queue_model=scenario['queue_model'],
+        seasonal_demand=scenario['seasonal_demand']
+    )
+    generator.branches = _shared['branches']
+    generator.branch_profiles = _shared['branch_profiles']
+    generator.review_samples = _shared['review_samples']
+    generator.review_weights = _shared['review_weights']
+    generator.holidays = _shared['holidays']
+    generator.calendar = _shared['calendars'][scenario['seasonal_demand']]
+
+    summary = SummaryAccumulator()
+    for batch in generator.generate_iter(_shared['start_date'], _shared['days']):
+        summary.update(batch)
+
+    report = summary.report(generator.good_data_percentage, generator.data_dispersion)
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def comparison_row(scenario: Dict, report: Dict) -> Dict:
+    """One line of the comparison table"""
+    row = {'scenario': scenario_name(scenario), **scenario, 'rows': report['rows']}
+    if report['rows']:
+        for column, label in (('waiting_time', 'waiting'), ('processing_time', 'processing'),
+                              ('transaction_time', 'total')):
+            row[f'avg_{label}'] = report['time'][column]['mean']
+            row[f'std_{label}'] = report['time'][column]['std']
+        row['avg_sentiment'] = report['sentiment_score']['mean']
+        row['good_pct'] = report['quality']['actual_good_percentage']
+        row['bad_pct'] = report['quality']['actual_bad_percentage']
+        for sentiment in ('positive', 'neutral', 'negative'):
+            row[f'{sentiment}_pct'] = report['sentiment_counts'].get(sentiment, 0) / report['rows'] * 100
+        branch_times = [stats['avg_time'] for stats in report['branch_performance']]
+        row['branch_avg_time_min'] = min(branch_times)
+        row['branch_avg_time_max'] = max(branch_times)
+    row['seconds'] = report['seconds']
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a grid of generator scenarios and compare their summaries")
+    parser.add_argument('--grid', help="JSON file of {setting: [values]} (settings: %s)" % ", ".join(GRID_DEFAULTS))
+    parser.add_argument('--dispersion', type=parse_numbers, help="Dispersion values (default: 0.5,1,2)")
+    parser.add_argument('--good-percentage', type=parse_numbers, help="Good data percentages (default: 50,70,80)")
+    parser.add_argument('--queue-model', type=parse_flags, help="no, yes or no,yes (default: no)")
+    parser.add_argument('--seasonal-demand', type=parse_flags, help="no, yes or no,yes (default: no)")
+    parser.add_argument('--start-date', type=datetime.date.fromisoformat, default=START_DATE)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--branches', type=int, help="Use only the first N branches")
+    parser.add_argument('--branch-file', default="branch.csv")
+    parser.add_argument('--review-samples', default="bpi_review_samples.csv")
+    parser.add_argument('--hourly-profiles', default="bpi_hourly_profiles.csv")
+    parser.add_argument('--holidays', default="ph_holidays.csv")
+    parser.add_argument('--engine', choices=['vectorized', 'scalar'], default='vectorized')
+    parser.add_argument('--seed', type=int, default=12345, help="Seed shared by every scenario")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (%(default)s)")
+    parser.add_argument('--output', default="sweep_results.csv", help="Comparison table (%(default)s)")
+    parser.add_argument('--report-json', help="Also write every scenario's full summary as JSON")
+    args = parser.parse_args()
+
+    grid = {key: list(values) for key, values in GRID_DEFAULTS.items()}
+    if args.grid:
+        with open(args.grid) as f:
+            values = json.load(f)
+        unknown = set(values) - set(GRID_DEFAULTS)
+        if unknown:
+            parser.error(f"Unknown settings in {args.grid}: {', '.join(sorted(unknown))}")
+        grid.update(values)
+    for key in GRID_DEFAULTS:
+        if getattr(args, key) is not None:
+            grid[key] = getattr(args, key)  # Flags win over the grid file
+    scenarios = build_scenarios(grid)
+
+    shared = load_shared(args)
+    workers = max(1, min(args.workers, len(scenarios)))
+    print(f"🧪 Running {len(scenarios)} scenarios: {len(shared['branches'])} branches x {args.days} days "
+          f"from {args.start_date}, {workers} workers")
+
+    start = time.perf_counter()
+    reports = [None] * len(scenarios)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker, initargs=(shared,)) as executor:
+        futures = {executor.submit(run_scenario, scenario): i for i, scenario in enumerate(scenarios)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            reports[i] = future.result()
+            print(f"[{done}/{len(scenarios)}] {scenario_name(scenarios[i])}: {reports[i]['rows']:,} rows "
+                  f"in {reports[i]['seconds']:.1f}s")
+
+    table = pd.DataFrame([comparison_row(scenario, report) for scenario, report in zip(scenarios, reports)])
+    table.to_csv(args.output, index=False, float_format='%.4f')
+    if args.report_json:
+        with open(args.report_json, 'w') as f:
+            json.dump([{'scenario': scenario, 'summary': report} for scenario, report in zip(scenarios, reports)],
+                      f, indent=1)
+
+    columns = [c for c in ['scenario', 'rows', 'avg_waiting', 'avg_processing', 'avg_total', 'std_total',
+                           'avg_sentiment', 'good_pct', 'bad_pct', 'seconds'] if c in table.columns]
+    print(f"\n📊 Scenario comparison:")
+    print(table[columns].to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    print(f"\n✅ {len(scenarios)} scenarios in {time.perf_counter() - start:.1f}s; table saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
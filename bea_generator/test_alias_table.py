@@ -0,0 +1,56 @@
+"""Tests for alias-table sampling (run with pytest)"""
+
+import random
+
+import numpy as np
+import pytest
+
+from alias_table import AliasTable
+
+
+def table_probabilities(table: AliasTable) -> np.ndarray:
+    """Exact outcome probabilities encoded by a table"""
+    n = len(table)
+    probabilities = table.prob / n
+    np.add.at(probabilities, table.alias, (1.0 - table.prob) / n)
+    return probabilities
+
+
+@pytest.mark.parametrize("weights", [[1, 1, 1], [1, 2, 3, 4], [0.1, 5, 0, 2.5], [7], [0, 0, 1]])
+def test_table_encodes_weights(weights):
+    table = AliasTable(weights)
+    expected = np.asarray(weights, dtype=float) / sum(weights)
+    assert np.allclose(table_probabilities(table), expected)
+
+
+def test_samples_follow_weights():
+    weights = [1, 2, 3, 4]
+    table = AliasTable(weights)
+    draws = table.sample(np.random.default_rng(1), 200000)
+
+    frequencies = np.bincount(draws, minlength=len(weights)) / len(draws)
+    assert np.allclose(frequencies, np.asarray(weights) / sum(weights), atol=0.005)
+
+
+def test_zero_weight_never_drawn():
+    table = AliasTable([3, 0, 1])
+    assert 1 not in table.sample(np.random.default_rng(2), 10000)
+    rand = random.Random(2)
+    assert 1 not in {table.sample_one(rand) for _ in range(10000)}
+
+
+def test_uniform_weights_draw_like_plain_choice():
+    # Equal weights skip the coin flip, so draws match a plain uniform pick from the same stream
+    table = AliasTable([2.0] * 5)
+    assert table.uniform
+    assert table.sample(np.random.default_rng(3), 100).tolist() == \
+        np.random.default_rng(3).integers(0, 5, size=100).tolist()
+
+    rand, plain = random.Random(3), random.Random(3)
+    assert [table.sample_one(rand) for _ in range(100)] == [plain.randrange(5) for _ in range(100)]
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0], [1, -1]])
+def test_rejects_bad_weights(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
@@ -0,0 +1,64 @@
+"""Tests for intraday arrival times (run with pytest)"""
+
+import datetime
+
+import numpy as np
+import pytest
+
+from arrivals import DEFAULT_HOURLY_PROFILES, ArrivalProfile, build_arrival_profiles
+from generate import BPITransactionGenerator
+
+
+def test_arrivals_are_sorted_and_in_open_hours():
+    profile = ArrivalProfile(DEFAULT_HOURLY_PROFILES['normal'])
+    times = profile.sample(np.random.default_rng(1), 5000)
+
+    assert times.dtype == np.int32
+    assert len(times) == 5000
+    assert (np.diff(times) >= 0).all()
+    assert set(np.unique(times // 3600)) <= set(profile.open_hours.tolist())
+
+
+def test_closed_hours_are_skipped():
+    rates = [0] * 24
+    rates[9], rates[14] = 1.0, 1.0  # Open 9:00-10:00 and 14:00-15:00 only
+    times = ArrivalProfile(rates).sample(np.random.default_rng(2), 2000)
+    assert set(np.unique(times // 3600).tolist()) == {9, 14}
+
+
+def test_hourly_shares_follow_profile():
+    rates = DEFAULT_HOURLY_PROFILES['peak']
+    profile = ArrivalProfile(rates)
+    times = profile.sample(np.random.default_rng(3), 200000)
+
+    shares = np.bincount(times // 3600, minlength=24) / len(times)
+    assert np.allclose(shares, np.asarray(rates) / sum(rates), atol=0.005)
+
+
+def test_seeded_and_empty_draws():
+    profile = ArrivalProfile(DEFAULT_HOURLY_PROFILES['normal'])
+    assert profile.sample(np.random.default_rng(4), 100).tolist() == \
+        profile.sample(np.random.default_rng(4), 100).tolist()
+    assert len(profile.sample(np.random.default_rng(4), 0)) == 0
+
+
+def test_profiles_by_peak_flag():
+    profiles = build_arrival_profiles(DEFAULT_HOURLY_PROFILES)
+    assert profiles[False].rates.tolist() == DEFAULT_HOURLY_PROFILES['normal']
+    assert profiles[True].rates.tolist() == DEFAULT_HOURLY_PROFILES['peak']
+
+
+@pytest.mark.parametrize("rates", [[1] * 23, [0] * 24, [-1] + [1] * 23])
+def test_rejects_bad_profiles(rates):
+    with pytest.raises(ValueError):
+        ArrivalProfile(rates)
+
+
+def test_mixed_day_is_in_arrival_order():
+    generator = BPITransactionGenerator("test", seed=5)
+    generator.branches = ["BPI Ayala Branch", "BPI Makati Branch", "BPI Pasig Branch"]
+    generator.branch_profiles.add_branches(generator.branches)
+    day = next(generator.iter_days([datetime.date(2025, 1, 6)], mixed=True))
+
+    assert (np.diff(day.arrival_seconds) >= 0).all()
+    assert set(np.unique(day.branch_ids).tolist()) == {0, 1, 2}
@@ -0,0 +1,74 @@
+"""Tests for the precomputed calendar table (run with pytest)"""
+
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from calendar_table import DEFAULT_DEMAND_FACTORS, CalendarTable, load_holidays, max_demand_multiplier
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+HOLIDAYS = {
+    datetime.date(2025, 1, 1): ("New Year's Day", 'regular'),
+    datetime.date(2025, 12, 8): ("Feast of the Immaculate Conception", 'special'),
+}
+
+
+def test_rows_match_per_date_rules():
+    calendar = CalendarTable()
+    first = datetime.date(2024, 1, 1)
+    dates = [first + datetime.timedelta(days=offset) for offset in range(731)]
+    rows = calendar.lookup(dates)
+
+    for date, row in zip(dates, rows):
+        month_end = (date + datetime.timedelta(days=1)).month != date.month
+        assert row['weekday'] == date.weekday()
+        assert row['is_peak'] == (date.weekday() in (0, 4) or date.day in (15, 30))
+        assert row['is_month_end'] == month_end
+        assert row['is_payday'] == (date.day == 15 or month_end)
+    assert (rows['demand_multiplier'] == 1.0).all()  # No demand factors
+
+
+def test_holiday_flags_and_demand():
+    calendar = CalendarTable(HOLIDAYS, DEFAULT_DEMAND_FACTORS)
+
+    new_year = calendar.day(datetime.date(2025, 1, 1))
+    assert new_year['holiday'] == 1
+    assert calendar.holiday_name(datetime.date(2025, 1, 1)) == "New Year's Day"
+    assert calendar.holiday_name(datetime.date(2025, 1, 3)) is None
+
+    # Dec 31 is the eve (and a payday/month-end in December); Jan 2 is the first day after
+    eve = calendar.day(datetime.date(2024, 12, 31))
+    assert np.isclose(eve['demand_multiplier'], 1.1 * 1.1 * 1.05 * 1.1)
+    assert np.isclose(new_year['demand_multiplier'], 0.35)
+    assert np.isclose(calendar.day(datetime.date(2025, 1, 2))['demand_multiplier'], 1.2)
+    assert np.isclose(calendar.day(datetime.date(2025, 12, 8))['demand_multiplier'], 0.7 * 1.1)
+    assert calendar.days['demand_multiplier'].max() <= calendar.max_demand_multiplier
+
+
+def test_table_grows_by_whole_years():
+    calendar = CalendarTable()
+    calendar.day(datetime.date(2025, 6, 1))
+    assert len(calendar.days) == 365
+
+    positions = calendar.index([datetime.date(2023, 3, 1), datetime.date(2025, 6, 1)])
+    assert len(calendar.days) == 365 * 2 + 366
+    assert calendar.days[positions]['weekday'].tolist() == [2, 6]
+
+
+def test_max_demand_multiplier():
+    assert max_demand_multiplier(None) == 1.0
+    assert np.isclose(max_demand_multiplier({'payday': 1.1, 'regular_holiday': 0.35, 'december': 1.2}), 1.32)
+
+
+def test_load_holidays(tmp_path):
+    holidays = load_holidays(os.path.join(HERE, "ph_holidays.csv"))
+    assert holidays[datetime.date(2025, 1, 1)][1] == 'regular'
+    assert {kind for _, kind in holidays.values()} <= {'regular', 'special'}
+
+    bad = tmp_path / "bad.csv"
+    bad.write_text("date,name,type\n2025-01-01,New Year,optional\n")
+    with pytest.raises(ValueError):
+        load_holidays(str(bad))
@@ -0,0 +1,134 @@
+"""Tests for real-time stream checkpoints and resume (run with pytest)"""
+
+import datetime
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from checkpoint import StreamCheckpoint, contiguous_runs
+from fake_sheets import FakeSheetsClient
+from generate import BPITransactionGenerator
+from sheets_sink import WriteScheduler
+from summary import SummaryAccumulator
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+START_DATE = datetime.date(2025, 1, 6)
+
+
+class InterruptAfter(SummaryAccumulator):
+    """Summary that raises KeyboardInterrupt (like Ctrl-C) when the given batch arrives"""
+
+    def __init__(self, batches: int):
+        super().__init__()
+        self.batches = batches
+
+    def update(self, batch):
+        if self.batches == 0:
+            raise KeyboardInterrupt
+        self.batches -= 1
+        super().update(batch)
+
+
+def make_generator(db_path: Optional[str] = None) -> BPITransactionGenerator:
+    client = FakeSheetsClient(db_path) if db_path else None
+    generator = BPITransactionGenerator("test", seed=11, vectorized=True, sheets_client=client)
+    generator.write_scheduler = WriteScheduler(requests_per_minute=60000, burst=100)  # The fake has no quota
+    generator.branches = ["BPI Ayala Branch", "BPI Makati Branch"]
+    generator.branch_profiles.add_branches(generator.branches)
+    generator.load_review_samples(os.path.join(HERE, "bpi_review_samples.csv"))
+    return generator
+
+
+def test_contiguous_runs():
+    assert contiguous_runs(np.array([5, 1, 2, 3, 7, 8, 3])) == [(1, 4), (5, 6), (7, 9)]
+    assert contiguous_runs(np.array([], dtype=np.int64)) == []
+
+
+def test_commit_advances_only_the_contiguous_prefix(tmp_path):
+    checkpoint = StreamCheckpoint(str(tmp_path / "progress.csv"))
+    checkpoint.start({'days': 1}, seed=1, dates=["2025-01-06"], columns=['a'])
+
+    checkpoint.commit(np.arange(10, 20))
+    assert checkpoint.state['committed_rows'] == 0  # Rows 0-9 are not confirmed yet
+    checkpoint.commit(np.arange(0, 10))
+    assert checkpoint.state['committed_rows'] == 20
+    assert checkpoint.load()['committed_rows'] == 20
+    checkpoint.close()
+
+
+def test_resume_truncates_unrecorded_log_bytes(tmp_path):
+    log_path = str(tmp_path / "progress.csv")
+    checkpoint = StreamCheckpoint(log_path)
+    checkpoint.start({'days': 1}, seed=1, dates=["2025-01-06"], columns=['a', 'b'])
+    checkpoint.append(pd.DataFrame({'a': [1, 2], 'b': [3, 4]}))
+    checkpoint.close()
+
+    # A crash between writing a batch and recording it leaves bytes the offset file does not cover
+    with open(log_path, 'a') as f:
+        f.write("5,6\n")
+
+    resumed = StreamCheckpoint(log_path)
+    state = resumed.load()
+    assert resumed.matches(state, {'days': 1})
+    assert not resumed.matches(state, {'days': 2})
+    resumed.resume(state)
+    resumed.append(pd.DataFrame({'a': [7], 'b': [8]}))
+    resumed.finish()
+
+    assert pd.read_csv(log_path).values.tolist() == [[1, 3], [2, 4], [7, 8]]
+    assert not os.path.exists(resumed.offset_path)
+
+
+def test_interrupted_stream_resumes_without_duplicate_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Date manifests are kept in the working directory
+    db_path = str(tmp_path / "sheets.db")
+    output_file = str(tmp_path / "progress.csv")
+    stream = dict(frequency_seconds=0, records_per_interval=100, output_file=output_file)
+
+    with pytest.raises(KeyboardInterrupt):
+        make_generator(db_path).stream_realtime(START_DATE, 2, summary=InterruptAfter(5), **stream)
+    state = StreamCheckpoint(output_file).load()
+    assert state['emitted_batches'] == 5
+
+    # A fresh unseeded process (another master seed) picks the saved stream back up
+    generator = make_generator(db_path)
+    generator.reseed(99)
+    generator.requested_seed = None
+    rows = generator.stream_realtime(START_DATE, 2, **stream)
+
+    expected = pd.concat(batch.to_pandas() for batch in make_generator().generate_iter(START_DATE, 2, mixed=True))
+    expected_ids = expected['transaction_id'].tolist()
+
+    values = FakeSheetsClient(db_path).open_by_key("test").worksheet("Sheet1").get_all_values()
+    sheet = pd.DataFrame(values[1:], columns=values[0])
+    assert rows == len(expected_ids)
+    assert sheet['transaction_id'].tolist() == expected_ids
+    assert pd.read_csv(output_file)['transaction_id'].tolist() == expected_ids
+    assert not os.path.exists(f"{output_file}.offset.json")
+
+
+@pytest.mark.parametrize("change, reason", [
+    (lambda generator: setattr(generator, 'data_dispersion', 2.0), "data_dispersion"),
+    (lambda generator: generator.load_holidays(os.path.join(HERE, "ph_holidays.csv")) and
+        setattr(generator, 'seasonal_demand', True), "holidays, seasonal_demand"),
+    (lambda generator: setattr(generator, 'branches', generator.branches[:1]), "branches"),
+    (lambda generator: setattr(generator, 'requested_seed', 12), "seed 11, not 12"),
+])
+def test_changed_settings_refuse_to_resume(tmp_path, monkeypatch, caplog, change, reason):
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / "sheets.db")
+    output_file = str(tmp_path / "progress.csv")
+    stream = dict(frequency_seconds=0, records_per_interval=100, output_file=output_file)
+    with pytest.raises(KeyboardInterrupt):
+        make_generator(db_path).stream_realtime(START_DATE, 2, summary=InterruptAfter(2), **stream)
+
+    generator = make_generator(db_path)
+    change(generator)
+    generator.stream_realtime(START_DATE, 2, **stream)
+
+    assert f"Not resuming {output_file}" in caplog.text and reason in caplog.text
+    # A new stream: the partly uploaded first date is skipped instead of continued with other rows
+    assert set(pd.read_csv(output_file)['date']) == {"2025-01-07"}
@@ -0,0 +1,82 @@
+"""Tests for the vectorized branch-day engine against the scalar path (run with pytest)"""
+
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from generate import TRANSACTION_COLUMNS, BPITransactionGenerator
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BRANCHES = ["BPI Ayala Branch", "BPI Makati Branch", "BPI Quezon City Branch", "BPI Manila Branch"]
+START_DATE = datetime.date(2025, 1, 6)
+
+
+def make_generator(vectorized: bool, seed: int = 21, workers: int = 1) -> BPITransactionGenerator:
+    # Small shards so two workers split both branches and days
+    generator = BPITransactionGenerator("test", vectorized=vectorized, seed=seed, workers=workers, shard_branches=3,
+                                        shard_days=2)
+    generator.branches = list(BRANCHES)
+    generator.branch_profiles.add_branches(generator.branches)
+    generator.load_review_samples(os.path.join(HERE, "bpi_review_samples.csv"))
+    return generator
+
+
+def generate(vectorized: bool, days: int = 14, seed: int = 21) -> pd.DataFrame:
+    generator = make_generator(vectorized, seed)
+    return pd.concat(batch.to_pandas(review_text=True) for batch in generator.generate_iter(START_DATE, days))
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return generate(vectorized=True), generate(vectorized=False)
+
+
+def test_engines_draw_the_same_volumes(frames):
+    vectorized, scalar = frames
+    assert list(vectorized.columns) == list(scalar.columns) == TRANSACTION_COLUMNS
+    counts = [frame.groupby(['date', 'branch_name']).size() for frame in frames]
+    pd.testing.assert_series_equal(counts[0], counts[1])
+    assert vectorized['transaction_id'].str.match(r"^[A-Z]{3}\d{4}[BN]\d{3}$").all()
+
+
+def test_engines_match_in_distribution(frames):
+    vectorized, scalar = frames
+    for column in ['waiting_time', 'processing_time', 'sentiment_score']:
+        assert np.isclose(vectorized[column].mean(), scalar[column].mean(), rtol=0.05), column
+        assert np.isclose(vectorized[column].std(), scalar[column].std(), rtol=0.1), column
+
+    for frame in frames:
+        assert (frame['transaction_time'] == frame['waiting_time'] + frame['processing_time']).all()
+        assert frame['sentiment_score'].between(1.0, 5.0).all()
+    shares = [frame['transaction_type'].value_counts(normalize=True).sort_index() for frame in frames]
+    assert np.allclose(shares[0], shares[1], atol=0.02)
+    bulk = [(frame['customer_id'].str[0] == 'B').mean() for frame in frames]
+    assert np.isclose(bulk[0], bulk[1], atol=0.02)
+
+
+def test_seeded_vectorized_output_is_reproducible():
+    pd.testing.assert_frame_equal(generate(vectorized=True, days=2, seed=5),
+                                  generate(vectorized=True, days=2, seed=5))
+    assert not generate(vectorized=True, days=2, seed=5).equals(generate(vectorized=True, days=2, seed=6))
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_workers_match_serial_output(tmp_path, vectorized):
+    dates = [START_DATE + datetime.timedelta(days=offset) for offset in range(3)]
+    serial, parallel = make_generator(vectorized), make_generator(vectorized, workers=2)
+
+    for (date, expected), (parallel_date, batches) in zip(serial.generate_branch_days(dates),
+                                                          parallel.generate_branch_days(dates)):
+        assert parallel_date == date and list(batches) == list(expected) == BRANCHES
+        for branch in BRANCHES:
+            pd.testing.assert_frame_equal(batches[branch].to_pandas(review_text=True),
+                                          expected[branch].to_pandas(review_text=True))
+
+    paths = [str(tmp_path / f"workers_{generator.workers}.csv") for generator in (serial, parallel)]
+    for generator, path in zip((serial, parallel), paths):
+        generator.save_batches_to_csv(generator.generate_iter(START_DATE, 3), path)
+    with open(paths[0], 'rb') as expected_file, open(paths[1], 'rb') as parallel_file:
+        assert expected_file.read() == parallel_file.read()
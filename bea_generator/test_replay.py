@@ -0,0 +1,64 @@
+"""Tests for the dataset replay tool (run with pytest)"""
+
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+import generate
+import replay
+from fake_sheets import FakeSheetsClient
+from generate import SHEET_COLUMNS, SHEET_ID, BPITransactionGenerator
+from sheets_sink import WriteScheduler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    """A review_id-only CSV with its review table, as a range run writes them"""
+    monkeypatch.chdir(tmp_path)
+    # The fake has no quota
+    monkeypatch.setattr(generate, 'WriteScheduler', lambda: WriteScheduler(requests_per_minute=60000, burst=100))
+    generator = BPITransactionGenerator("test", seed=9, vectorized=True)
+    generator.branches = ["BPI Ayala Branch", "BPI Makati Branch"]
+    generator.branch_profiles.add_branches(generator.branches)
+    generator.load_review_samples(os.path.join(HERE, "bpi_review_samples.csv"))
+    generator.save_review_table(str(tmp_path / "bpi_review_table.csv"))
+    path = str(tmp_path / "bpi_transactions.csv")
+    generator.save_batches_to_csv(generator.generate_iter(datetime.date(2025, 1, 6), 1), path, review_text=False)
+    expected = pd.concat(batch.to_pandas(review_text=True)
+                         for batch in generator.generate_iter(datetime.date(2025, 1, 6), 1))
+    return path, expected
+
+
+def test_review_id_only_csv_replays_into_fake_sheets(dataset, tmp_path, monkeypatch, capsys):
+    path, expected = dataset
+    assert 'review_text' not in pd.read_csv(path, nrows=1)
+    db = str(tmp_path / "fake.db")
+    monkeypatch.setenv("BPI_FAKE_SHEETS", db)
+
+    replay.main([path, '--max', '--sink', 'sheets'])
+
+    rows = FakeSheetsClient(db).open_by_key(SHEET_ID).worksheet("Sheet1").get_all_values()
+    assert rows[0] == SHEET_COLUMNS
+    assert len(rows) - 1 == len(expected)
+    column = SHEET_COLUMNS.index('review_text')
+    assert [row[column] for row in rows[1:]] == expected['review_text'].tolist()
+    assert "✅ Replayed" in capsys.readouterr().out
+
+
+def test_undelivered_rows_fail_the_run(dataset, tmp_path, monkeypatch, capsys):
+    path, _ = dataset
+    os.remove(tmp_path / "bpi_review_table.csv")
+    monkeypatch.setenv("BPI_FAKE_SHEETS", str(tmp_path / "fake.db"))
+    # No review table and only an unrelated sample file: review ids past it cannot be joined
+    pd.DataFrame({'sentiment': ['positive'], 'review_text': ['Fast']}).to_csv("bpi_review_samples.csv", index=False)
+
+    with pytest.raises(SystemExit) as exit_info:
+        replay.main([path, '--max', '--sink', 'sheets'])
+
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    assert "✅ Replayed" not in out and "failed" in out
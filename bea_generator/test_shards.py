@@ -0,0 +1,70 @@
+"""Tests for sharded range runs and the shard merge (run with pytest)"""
+
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+import generate
+from shards import cell_grid, load_shard_manifests, shard_cells, shard_manifest_path, validate_shards
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def shard_dir(tmp_path, monkeypatch):
+    """Both shards of a 2-day range run in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("BPI_FAKE_SHEETS", raising=False)
+    for shard in ("1/2", "2/2"):
+        generate.main(['--mode', 'range', '--start-date', '2025-01-06', '--days', '2', '--seed', '5',
+                       '--vectorized', '--block-size', '100', '--shard', shard, '--output-dir', str(tmp_path),
+                       '--branch-file', os.path.join(HERE, "branch.csv"),
+                       '--review-samples', os.path.join(HERE, "bpi_review_samples.csv")])
+    return tmp_path
+
+
+def test_cells_are_split_round_robin():
+    dates = [datetime.date(2025, 1, 6), datetime.date(2025, 1, 7)]
+    grid = cell_grid(dates, branch_count=250, block_size=100)
+    assert len(grid) == 6
+    owned = [shard_cells(grid, shard, 4) for shard in range(1, 5)]
+    assert sorted(cell for cells in owned for cell in cells) == sorted(grid)
+    assert owned[0] == [grid[0], grid[4]]
+
+
+def test_merge_combines_complete_shards(shard_dir):
+    generate.main(['--merge', '--combine', '--output-dir', str(shard_dir)])
+
+    combined = [name for name in os.listdir(shard_dir) if name.endswith("records.csv")]
+    assert len(combined) == 1
+    df = pd.read_csv(shard_dir / combined[0])
+    manifests = load_shard_manifests(str(shard_dir))
+    assert len(df) == sum(manifest['rows'] for manifest in manifests)
+    assert sorted(df['date'].unique()) == ["2025-01-06", "2025-01-07"]
+
+
+def test_merge_with_missing_shard_exits_1(shard_dir, capsys):
+    os.remove(shard_manifest_path(str(shard_dir), 2, 2))
+
+    with pytest.raises(SystemExit) as exit_info:
+        generate.main(['--merge', '--output-dir', str(shard_dir)])
+
+    assert exit_info.value.code == 1
+    assert "Missing shards: 2/2" in capsys.readouterr().out
+
+
+def test_validate_reports_changed_and_missing_cells(shard_dir):
+    manifests = load_shard_manifests(str(shard_dir))
+    assert validate_shards(str(shard_dir), manifests) == []
+
+    cell = next(iter(manifests[0]['cells'].values()))
+    with open(shard_dir / cell['file'], 'a') as f:
+        f.write("extra\n")
+    other = next(iter(manifests[1]['cells'].values()))
+    os.remove(shard_dir / other['file'])
+
+    problems = validate_shards(str(shard_dir), manifests)
+    assert any("bytes, manifest says" in problem for problem in problems)
+    assert any(problem.endswith("is missing") for problem in problems)
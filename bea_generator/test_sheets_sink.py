@@ -0,0 +1,184 @@
+"""Tests for the Sheets appender, write scheduler and background uploader (run with pytest)"""
+
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from fake_sheets import FakeSheetsClient, api_error, client_from_env
+from generate import LEGACY_SHEET_COLUMNS, SHEET_COLUMNS, BPITransactionGenerator
+from sheets_sink import BackgroundUploader, SheetsAppender, WriteScheduler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_generator(client: FakeSheetsClient) -> BPITransactionGenerator:
+    generator = BPITransactionGenerator("test", seed=7, sheets_client=client)
+    generator.write_scheduler = WriteScheduler(requests_per_minute=60000, burst=100)  # The fake has no quota
+    generator.branches = ["BPI Ayala Branch", "BPI Makati Branch"]
+    generator.branch_profiles.add_branches(generator.branches)
+    generator.load_review_samples(os.path.join(HERE, "bpi_review_samples.csv"))
+    return generator
+
+
+def test_append_extends_legacy_header(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The generator keeps its date manifest in the working directory
+    client = FakeSheetsClient(":memory:")
+    worksheet = client.open_by_key("test").worksheet("Sheet1")
+    legacy_row = ["T1", "C1", "BPI Ayala Branch", "Deposit", 5, 3, 8, "2025-01-05", "positive", 4.5, "Fast", ""]
+    worksheet.append_rows([LEGACY_SHEET_COLUMNS, legacy_row])
+
+    generator = make_generator(client)
+    df = next(generator.generate_iter(datetime.date(2025, 1, 6), 1)).to_pandas()
+    assert generator.upload_batch_to_sheets(df)
+    generator.flush_sheets()
+
+    values = worksheet.get_all_values()
+    assert values[0] == SHEET_COLUMNS
+    assert values[1][:len(legacy_row)] == [str(value) for value in legacy_row]
+    assert len(values) == 2 + len(df)
+
+    # Every appended row lines up with the header, including review text joined from review_id
+    sheet = pd.DataFrame(values[2:], columns=values[0])
+    assert (sheet['transaction_id'] == df['transaction_id']).all()
+    assert (sheet['date'] == "2025-01-06").all()
+    assert (sheet['sentiment'] == df['sentiment']).all()
+    texts = generator.review_texts + [""]
+    assert (sheet['review_text'] == [texts[i] for i in df['review_id']]).all()
+
+
+def test_append_rejects_foreign_header():
+    client = FakeSheetsClient(":memory:")
+    worksheet = client.open_by_key("test").worksheet("Sheet1")
+    worksheet.append_rows([["date", "branch_name", "total"], ["2025-01-05", "BPI Ayala Branch", 10]])
+
+    appender = SheetsAppender(worksheet, SHEET_COLUMNS)
+    with pytest.raises(ValueError):
+        appender.append([["x"] * len(SHEET_COLUMNS)])
+    assert worksheet.row_values(1) == ["date", "branch_name", "total"]
+
+
+def test_append_to_empty_sheet_writes_header():
+    client = FakeSheetsClient(":memory:")
+    worksheet = client.open_by_key("test").worksheet("Sheet1")
+
+    appender = SheetsAppender(worksheet, ["a", "b"])
+    appender.append([[1, 2], [3, 4]])
+    appender.append([[5, 6]])
+
+    assert worksheet.get_all_values() == [["a", "b"], ["1", "2"], ["3", "4"], ["5", "6"]]
+
+
+def flaky(errors):
+    """Function that raises the given errors in turn, then returns 'ok'"""
+    errors = list(errors)
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+    return call
+
+
+def test_scheduler_retries_quota_and_server_errors():
+    scheduler = WriteScheduler(requests_per_minute=60000, base_delay=0.001)
+    assert scheduler.run(flaky([api_error(429, "quota"), api_error(503, "unavailable")])) == 'ok'
+    assert (scheduler.requests, scheduler.retries) == (3, 2)
+    assert scheduler.waited > 0
+
+
+def test_scheduler_raises_other_errors_and_gives_up():
+    scheduler = WriteScheduler(requests_per_minute=60000, max_retries=2, base_delay=0.001)
+    with pytest.raises(Exception):
+        scheduler.run(flaky([api_error(400, "bad range")]))
+    assert scheduler.retries == 0
+
+    with pytest.raises(Exception):
+        scheduler.run(flaky([api_error(429, "quota")] * 3))
+    assert scheduler.retries == 2
+
+
+def test_scheduler_burst_then_rate():
+    scheduler = WriteScheduler(requests_per_minute=1, burst=2)
+    assert [scheduler.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_appender_coalesces_rows_while_no_token_is_free():
+    worksheet = FakeSheetsClient(":memory:").open_by_key("test").worksheet("Sheet1")
+    appender = SheetsAppender(worksheet, ["a"], scheduler=WriteScheduler(requests_per_minute=600, burst=2))
+
+    appender.append([[1]])  # Uses the second token (the row count read took the first)
+    appender.append([[2]])
+    appender.append([[3]])
+    assert appender.pending == [[2], [3]]
+    appender.flush()
+
+    assert appender.writes == 2
+    assert worksheet.col_values(1) == ["a", "1", "2", "3"]
+
+
+def test_uploader_counts_held_rows_apart_from_failures():
+    results = iter([5, 0, RuntimeError("sheet gone")])
+
+    def upload(df):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    uploader = BackgroundUploader(upload)
+    frame = pd.DataFrame({'a': range(5)})
+    uploader.write([frame], oldest_submit=0.0)
+    assert uploader.stats()['held'] == 5 and uploader.stats()['uploaded'] == 0
+
+    uploader.write([frame], oldest_submit=0.0)  # The held rows went out with this write
+    uploader.write([frame], oldest_submit=0.0)
+    stats = uploader.stats()
+    assert (stats['uploaded'], stats['held'], stats['failed']) == (10, 0, 5)
+
+
+def test_uploader_drop_policy():
+    uploader = BackgroundUploader(lambda df: 0, max_queue=1, full_policy='drop')  # Not started: the queue fills
+    assert uploader.submit(pd.DataFrame({'a': [1, 2]}))
+    assert not uploader.submit(pd.DataFrame({'a': [3]}))
+    uploader.start()
+    stats = uploader.close()
+    assert (stats['submitted'], stats['uploaded'], stats['dropped'], stats['failed']) == (3, 2, 1, 0)
+
+
+def test_failed_write_is_held_and_flushed_later(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = FakeSheetsClient(":memory:")
+    generator = make_generator(client)
+    generator.write_scheduler.max_retries = 0
+    df = next(generator.generate_iter(datetime.date(2025, 1, 6), 1, batch_rows=50)).to_pandas()
+    generator.get_sheets_appender()
+
+    uploader = BackgroundUploader(generator.append_batch_to_sheets)
+    client.error_rate = 1.0
+    uploader.write([df], oldest_submit=0.0)
+    assert uploader.stats()['held'] == len(df) and uploader.stats()['failed'] == 0
+
+    client.error_rate = 0.0
+    generator.flush_sheets()
+    uploader.settle(len(generator.get_sheets_appender().pending))
+    assert uploader.stats()['uploaded'] == len(df)
+    assert len(client.open_by_key("test").worksheet("Sheet1").col_values(1)) == len(df) + 1
+
+
+def test_client_from_env_reads_faults(tmp_path, monkeypatch):
+    monkeypatch.delenv("BPI_FAKE_SHEETS", raising=False)
+    assert client_from_env() is None
+
+    monkeypatch.setenv("BPI_FAKE_SHEETS", str(tmp_path / "fake.db"))
+    monkeypatch.setenv("BPI_FAKE_SHEETS_LATENCY_MS", "25")
+    monkeypatch.setenv("BPI_FAKE_SHEETS_RPM", "90")
+    monkeypatch.setenv("BPI_FAKE_SHEETS_ERROR_RATE", "0.1")
+    client = client_from_env()
+    assert (client.latency, client.latency_jitter, client.requests_per_minute, client.error_rate) == \
+        (0.025, 0.0, 90, 0.1)
+
+    monkeypatch.setenv("BPI_FAKE_SHEETS_RPM", "lots")
+    with pytest.raises(ValueError, match="BPI_FAKE_SHEETS_RPM"):
+        client_from_env()
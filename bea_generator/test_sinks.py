@@ -0,0 +1,89 @@
+"""Tests for the Parquet transaction sink (run with pytest)"""
+
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from generate import BPITransactionGenerator
+from sinks import ParquetSink, branch_bucket, read_transactions, transaction_schema
+
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BRANCHES = ["BPI Ayala Branch", "BPI Makati Branch", "BPI Quezon City Branch", "BPI Manila Branch"]
+START_DATE = datetime.date(2025, 1, 6)
+
+
+@pytest.fixture(scope="module")
+def batches():
+    generator = BPITransactionGenerator("test", seed=13, vectorized=True)
+    generator.branches = list(BRANCHES)
+    generator.branch_profiles.add_branches(generator.branches)
+    generator.load_review_samples(os.path.join(HERE, "bpi_review_samples.csv"))
+    return list(generator.generate_iter(START_DATE, 3, batch_rows=700))
+
+
+def sort_rows(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(['date', 'transaction_id']).reset_index(drop=True)
+
+
+def test_round_trip_keeps_values_and_types(tmp_path, batches):
+    with ParquetSink(str(tmp_path), review_text=True) as sink:
+        for batch in batches:
+            sink.write(batch)
+    expected = pd.concat(batch.to_pandas(review_text=True) for batch in batches)
+    assert sink.rows_written == len(expected)
+
+    # Stored columns keep the file schema: dictionary strings, small integers (Parquet stores seconds as ms)
+    dataset = ds.dataset(str(tmp_path), format="parquet", partitioning="hive")
+    for field in transaction_schema(review_text=True):
+        if field.name == 'timestamp':
+            assert pa.types.is_timestamp(dataset.schema.field(field.name).type)
+        else:
+            assert dataset.schema.field(field.name).type == field.type, field.name
+
+    df = sort_rows(read_transactions(str(tmp_path)))
+    expected = sort_rows(expected)
+    for column in ['branch_name', 'transaction_type', 'sentiment', 'review_text']:
+        assert df[column].dtype == 'category'  # Dictionary columns decode to the original names
+        assert df[column].astype(str).tolist() == expected[column].tolist(), column
+    for column in ['waiting_time', 'processing_time', 'transaction_time', 'review_id']:
+        assert df[column].dtype == np.int16
+        assert df[column].tolist() == expected[column].tolist(), column
+    for column in ['transaction_id', 'customer_id', 'bhs', 'date']:
+        assert df[column].astype(str).tolist() == expected[column].tolist(), column
+    assert np.allclose(df['sentiment_score'], expected['sentiment_score'], atol=1e-6)
+    assert (df['timestamp'] == pd.to_datetime(expected['timestamp'])).all()
+
+
+def test_partitions_prune_dates_and_branch_buckets(tmp_path, batches):
+    with ParquetSink(str(tmp_path), branch_buckets=2) as sink:
+        for batch in batches:
+            sink.write(batch)
+    assert sorted(os.listdir(tmp_path)) == ["date=2025-01-06", "date=2025-01-07", "date=2025-01-08"]
+    # Batches that hold only some branches still land in integer buckets
+    assert {os.path.basename(os.path.dirname(path)) for path in sink.paths} == {"branch_bucket=0", "branch_bucket=1"}
+    everything = sort_rows(read_transactions(str(tmp_path)))
+
+    one_day = read_transactions(str(tmp_path), dates=["2025-01-07"])
+    assert set(one_day['date']) == {"2025-01-07"}
+    assert len(one_day) == (everything['date'] == "2025-01-07").sum()
+
+    bucket = branch_bucket("BPI Ayala Branch", 2)
+    in_bucket = {name for name in BRANCHES if branch_bucket(name, 2) == bucket}
+    pruned = read_transactions(str(tmp_path), columns=['branch_name', 'date'], dates=["2025-01-06"],
+                               branch_buckets=[bucket])
+    assert list(pruned.columns) == ['branch_name', 'date']
+    assert set(pruned['branch_name'].astype(str)) == in_bucket
+    assert len(pruned) == ((everything['date'] == "2025-01-06") & everything['branch_name'].isin(in_bucket)).sum()
+
+    # Only the matching partition's files are opened
+    dataset = ds.dataset(str(tmp_path), format="parquet", partitioning="hive")
+    fragments = list(dataset.get_fragments(filter=(ds.field('date') == "2025-01-06") &
+                                           (ds.field('branch_bucket') == bucket)))
+    assert [fragment.path for fragment in fragments] == \
+        [path for path in sink.paths if f"date=2025-01-06{os.sep}branch_bucket={bucket}{os.sep}" in path]
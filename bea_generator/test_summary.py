@@ -0,0 +1,71 @@
+"""Tests for the online run summary (run with pytest)"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from generate import BPITransactionGenerator
+from summary import Moments, SummaryAccumulator
+
+
+def test_merged_batches_match_np_var():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.normal(1e6, 3.0, 5000), rng.normal(1e6 + 5, 0.5, 17), rng.exponential(2.0, 999)])
+
+    moments = Moments()
+    for chunk in np.array_split(values, [1, 2, 100, 3000, 3001]):
+        moments.add(chunk)
+
+    assert moments.count[0] == len(values)
+    assert np.isclose(moments.mean[0], values.mean(), rtol=0, atol=1e-8)
+    assert np.isclose(moments.m2[0] / (len(values) - 1), np.var(values, ddof=1), rtol=1e-9)
+    assert np.isclose(moments.std()[0], np.std(values, ddof=1), rtol=1e-9)
+
+
+def test_grouped_moments_match_per_group_var():
+    rng = np.random.default_rng(2)
+    groups = rng.integers(0, 4, 3000)
+    values = rng.gamma(2.0, 3.0, 3000)
+
+    moments = Moments(4)
+    for start in range(0, 3000, 700):
+        moments.add(values[start:start + 700], groups[start:start + 700])
+
+    for group in range(4):
+        selected = values[groups == group]
+        assert moments.count[group] == len(selected)
+        assert np.isclose(moments.mean[group], selected.mean())
+        assert np.isclose(moments.std()[group], np.std(selected, ddof=1))
+
+
+def test_std_needs_two_values():
+    moments = Moments(2)
+    moments.add(np.array([3.0]), np.array([0]))
+    assert np.isnan(moments.std()).all()
+
+
+def test_batched_report_matches_whole_frame():
+    generator = BPITransactionGenerator("test", seed=3, vectorized=True)
+    generator.branches = ["BPI Ayala Branch", "BPI Makati Branch", "BPI Pasig Branch"]
+    generator.branch_profiles.add_branches(generator.branches)
+    batches = list(generator.generate_iter(datetime.date(2025, 1, 6), 3, batch_rows=500))
+
+    streamed = SummaryAccumulator()
+    for batch in batches:
+        streamed.update(batch)
+    whole = SummaryAccumulator()
+    df = pd.concat(batch.to_pandas() for batch in batches)
+    whole.update_frame(df)
+
+    report = streamed.report(70.0, 1.0)
+    assert report['rows'] == len(df)
+    assert report['first_date'] == "2025-01-06" and report['last_date'] == "2025-01-08"
+    assert np.isclose(report['time']['waiting_time']['std'], df['waiting_time'].std())
+    assert np.isclose(report['sentiment_score']['mean'], df['sentiment_score'].mean())
+    assert report['sentiment_counts'] == df['sentiment'].value_counts().to_dict()
+
+    expected = whole.report(70.0, 1.0)
+    for ours, theirs in zip(report['branch_performance'], expected['branch_performance']):
+        assert ours['branch'] == theirs['branch'] and ours['transactions'] == theirs['transactions']
+        assert np.isclose(ours['std_time'], theirs['std_time'])
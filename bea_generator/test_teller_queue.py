@@ -0,0 +1,49 @@
+"""Tests for the vectorized teller queue (run with pytest)"""
+
+import numpy as np
+import pytest
+
+from teller_queue import lindley_waits
+
+
+def scalar_waits(arrivals, services, tellers):
+    """Lindley recursion one customer at a time, customer i in lane i % tellers"""
+    waits = []
+    last = {}  # lane -> (arrival, service, wait) of its previous customer
+    for i, (arrival, service) in enumerate(zip(arrivals, services)):
+        lane = i % tellers
+        if lane in last:
+            prev_arrival, prev_service, prev_wait = last[lane]
+            wait = max(0, prev_wait + prev_service - (arrival - prev_arrival))
+        else:
+            wait = 0
+        waits.append(wait)
+        last[lane] = (arrival, service, wait)
+    return waits
+
+
+@pytest.mark.parametrize("n, tellers", [(1, 1), (7, 1), (50, 3), (101, 4), (5, 8), (1000, 6)])
+def test_matches_scalar_recursion(n, tellers):
+    rng = np.random.default_rng(n * 31 + tellers)
+    arrivals = np.sort(rng.integers(9 * 3600, 16 * 3600, size=n))
+    services = rng.integers(60, 1200, size=n)
+
+    waits = lindley_waits(arrivals, services, tellers)
+
+    assert waits.tolist() == scalar_waits(arrivals.tolist(), services.tolist(), tellers)
+
+
+def test_idle_lanes_never_wait():
+    arrivals = np.arange(0, 10000, 1000)
+    services = np.full(len(arrivals), 10)
+    assert (lindley_waits(arrivals, services, 2) == 0).all()
+
+
+def test_burst_queues_up():
+    # Five customers at once on one teller wait for everyone before them
+    waits = lindley_waits(np.zeros(5, dtype=np.int64), np.full(5, 100), 1)
+    assert waits.tolist() == [0, 100, 200, 300, 400]
+
+
+def test_empty_day():
+    assert len(lindley_waits(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), 3)) == 0
@@ -0,0 +1,88 @@
+"""Tests for columnar transaction batches (run with pytest)"""
+
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from generate import TRANSACTION_COLUMNS, BPITransactionGenerator
+from transaction_batch import ARRAY_DTYPES, TransactionBatch
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_batch(branch_names, branch_ids, reviews=("Fast", "Slow"), review_ids=None, date=datetime.date(2025, 1, 6)):
+    n = len(branch_ids)
+    return TransactionBatch(
+        list(branch_names), ['Deposit', 'Withdrawal'], list(reviews),
+        branch_ids=branch_ids,
+        date_ordinals=np.full(n, date.toordinal()),
+        arrival_seconds=np.arange(n) * 60 + 9 * 3600,
+        is_bulk=np.arange(n) % 2 == 1,
+        sequence=np.arange(n) + 1,
+        type_codes=np.arange(n) % 2,
+        waiting_time=np.full(n, 5),
+        processing_time=np.full(n, 3),
+        transaction_time=np.full(n, 8),
+        sentiment_codes=np.full(n, 2),
+        sentiment_score=np.full(n, 4.25),
+        review_ids=review_ids if review_ids is not None else np.zeros(n))
+
+
+def test_to_pandas_layout():
+    batch = make_batch(["BPI Ayala Branch"], [0, 0], review_ids=np.array([0, -1]))
+    df = batch.to_pandas(review_text=True)
+
+    assert list(df.columns) == TRANSACTION_COLUMNS
+    assert df['transaction_id'].tolist() == ["BPI0106N001", "BPI0106B002"]
+    assert df['customer_id'].tolist() == ["N001", "B002"]
+    assert df['timestamp'].tolist() == ["2025-01-06 09:00:00", "2025-01-06 09:01:00"]
+    assert df['review_text'].tolist() == ["Fast", ""]
+    assert 'review_text' not in batch.to_pandas().columns
+
+    categorical = batch.to_pandas(categorical=True, review_text=True)
+    assert categorical['branch_name'].dtype == 'category'
+    assert categorical['review_text'].astype(str).tolist() == ["Fast", ""]
+    assert categorical['timestamp'].iloc[1] == pd.Timestamp("2025-01-06 09:01:00")
+
+
+def test_concat_merges_dictionaries():
+    first = make_batch(["A Branch", "B Branch"], [0, 1], reviews=["Fast"], review_ids=np.array([0, -1]))
+    second = make_batch(["C Branch", "A Branch"], [0, 1], reviews=["Slow", "Fast"], review_ids=np.array([0, 1]))
+
+    combined = TransactionBatch.concat([first, second])
+
+    assert combined.branch_names == ["A Branch", "B Branch", "C Branch"]
+    assert np.asarray(combined.branch_names)[combined.branch_ids].tolist() == \
+        ["A Branch", "B Branch", "C Branch", "A Branch"]
+    assert combined.to_pandas(review_text=True)['review_text'].tolist() == ["Fast", "", "Slow", "Fast"]
+    assert {name: array.dtype for name, array in combined.arrays().items()} == \
+        {name: np.dtype(dtype) for name, dtype in ARRAY_DTYPES.items()}
+
+
+def test_slice_take_and_empty():
+    batch = make_batch(["A Branch"], np.zeros(6, dtype=int))
+    assert batch.slice(2, 5).sequence.tolist() == [3, 4, 5]
+    assert np.shares_memory(batch.slice(2, 5).sequence, batch.sequence)  # Views, not copies
+    assert batch.take(np.array([5, 0])).sequence.tolist() == [6, 1]
+
+    empty = TransactionBatch.empty(["A Branch"], ['Deposit'], [])
+    assert len(empty) == 0
+    assert len(TransactionBatch.concat([empty, batch])) == 6
+
+
+def test_records_round_trip():
+    generator = BPITransactionGenerator("test", seed=4)
+    generator.branches = ["BPI Ayala Branch", "BPI Makati Branch"]
+    generator.branch_profiles.add_branches(generator.branches)
+    generator.load_review_samples(os.path.join(HERE, "bpi_review_samples.csv"))
+    generator.build_review_table()
+    records = generator.generate_daily_transactions_for_branch(datetime.date(2025, 1, 6), "BPI Makati Branch")
+
+    batch = TransactionBatch.from_records(records, generator.branches, generator.transaction_types,
+                                          generator.review_texts)
+    df = batch.to_pandas(review_text=True)
+
+    expected = pd.DataFrame(records)[TRANSACTION_COLUMNS]
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
@@ -0,0 +1,119 @@
+"""Tests for the date watermark manifest (run with pytest)"""
+
+from fake_sheets import FakeSheetsClient
+from generate import BPITransactionGenerator
+from sheets_sink import WriteScheduler
+from watermark import MANIFEST_WORKSHEET, DateManifest, manifest_path
+
+
+def make_spreadsheet():
+    return FakeSheetsClient(":memory:").open_by_key("test")
+
+
+def test_record_tracks_rows_per_date(tmp_path):
+    manifest = DateManifest(str(tmp_path / "manifest.json"))
+    manifest.record("Sheet1", 2, ["2025-01-06", "2025-01-06", "2025-01-07"])
+    manifest.record("Sheet1", 5, ["2025-01-07"])
+
+    assert manifest.entries["Sheet1"] == {
+        "2025-01-06": {'first_row': 2, 'last_row': 3, 'rows': 2},
+        "2025-01-07": {'first_row': 4, 'last_row': 5, 'rows': 2},
+    }
+    assert DateManifest(manifest.path).entries == manifest.entries  # Saved locally after every record
+
+
+def test_lost_local_file_recovers_from_mirror(tmp_path):
+    spreadsheet = make_spreadsheet()
+    writer = DateManifest(str(tmp_path / "a.json"), spreadsheet)
+    writer.record("Sheet1", 2, ["2025-01-06"] * 3 + ["2025-01-07"] * 2)
+    writer.publish()
+    assert spreadsheet.worksheet(MANIFEST_WORKSHEET).get_all_values()[0][:2] == ['worksheet', 'date']
+
+    reader = DateManifest(str(tmp_path / "b.json"), spreadsheet)
+    assert reader.load("Sheet1")
+    assert reader.dates("Sheet1") == {"2025-01-06", "2025-01-07"}
+    assert DateManifest(reader.path).entries == writer.entries
+
+
+def test_stale_local_file_takes_the_mirror(tmp_path):
+    spreadsheet = make_spreadsheet()
+    other = DateManifest(str(tmp_path / "other.json"), spreadsheet)
+    other.record("Sheet1", 2, ["2025-01-06", "2025-01-07", "2025-01-08"])
+    other.publish()
+
+    # This machine's file reaches as far as the mirror but holds a date the sheet no longer has
+    stale = DateManifest(str(tmp_path / "stale.json"), spreadsheet)
+    stale.entries = {"Sheet1": {"2025-01-05": {'first_row': 2, 'last_row': 4, 'rows': 3}}}
+    stale.load("Sheet1")
+
+    assert stale.dates("Sheet1") == {"2025-01-06", "2025-01-07", "2025-01-08"}
+
+
+def test_unpublished_local_rows_are_kept(tmp_path):
+    spreadsheet = make_spreadsheet()
+    manifest = DateManifest(str(tmp_path / "manifest.json"), spreadsheet)
+    manifest.record("Sheet1", 2, ["2025-01-06", "2025-01-07"])
+    manifest.publish()
+    manifest.record("Sheet1", 4, ["2025-01-07", "2025-01-08"])  # Written, not yet mirrored
+
+    restarted = DateManifest(manifest.path, spreadsheet)
+    restarted.load("Sheet1")
+
+    assert restarted.dates("Sheet1") == {"2025-01-06", "2025-01-07", "2025-01-08"}
+    assert restarted.entries["Sheet1"]["2025-01-07"] == {'first_row': 3, 'last_row': 4, 'rows': 2}
+    assert DateManifest.watermark(restarted.entries["Sheet1"]) == 5
+
+
+def test_rebuild_from_date_column(tmp_path):
+    worksheet = make_spreadsheet().worksheet("Sheet1")
+    worksheet.append_rows([["transaction_id", "date"], ["T1", "2025-01-06"], ["T2", "2025-01-06"],
+                           ["T3", "2025-01-07"]])
+
+    manifest = DateManifest(str(tmp_path / "manifest.json"))
+    assert manifest.rebuild(worksheet)
+    assert manifest.entries["Sheet1"] == {
+        "2025-01-06": {'first_row': 2, 'last_row': 3, 'rows': 2},
+        "2025-01-07": {'first_row': 4, 'last_row': 4, 'rows': 1},
+    }
+
+
+def test_rebuild_without_date_column(tmp_path):
+    worksheet = make_spreadsheet().worksheet("Sheet1")
+    worksheet.append_rows([["branch", "total"], ["BPI Ayala Branch", 3]])
+    assert not DateManifest(str(tmp_path / "manifest.json")).rebuild(worksheet)
+
+
+def test_verify_confirms_or_rejects_local_dates(tmp_path):
+    spreadsheet = make_spreadsheet()
+    worksheet = spreadsheet.worksheet("Sheet1")
+    worksheet.append_rows([["transaction_id", "date"], ["T1", "2025-01-06"], ["T2", "2025-01-07"]])
+
+    manifest = DateManifest(str(tmp_path / "manifest.json"), spreadsheet)
+    manifest.record("Sheet1", 2, ["2025-01-06", "2025-01-07"])  # Never mirrored
+    manifest.load("Sheet1")
+    assert manifest.unconfirmed["Sheet1"] == {"2025-01-06", "2025-01-07"}
+    assert manifest.verify("Sheet1", manifest.read_dates(worksheet))
+    assert manifest.unconfirmed["Sheet1"] == set()
+
+    elsewhere = DateManifest(str(tmp_path / "elsewhere.json"), make_spreadsheet())  # Same file, other store
+    elsewhere.record("Sheet1", 2, ["2025-01-06"])
+    elsewhere.load("Sheet1")
+    assert not elsewhere.verify("Sheet1", [])
+
+
+def test_manifest_path_is_per_backend(tmp_path):
+    assert manifest_path("abc", directory=str(tmp_path)) == str(tmp_path / "bpi_manifest_sheets_abc.json")
+    assert manifest_path("abc", FakeSheetsClient(":memory:").backend) != manifest_path("abc")
+
+
+def test_local_only_dates_missing_from_sheet_are_not_skipped(tmp_path):
+    # A manifest left behind by an earlier run, against a store that has since been replaced
+    client = FakeSheetsClient(":memory:")
+    path = manifest_path("test", client.backend, str(tmp_path))
+    stale = DateManifest(path)
+    stale.record("Sheet1", 2, ["2025-01-06"] * 5)
+
+    generator = BPITransactionGenerator("test", sheets_client=client, output_dir=str(tmp_path))
+    generator.write_scheduler = WriteScheduler(requests_per_minute=60000, burst=100)  # The fake has no quota
+    assert generator.check_existing_data_dates() == set()
+    assert DateManifest(path).entries["Sheet1"] == {}
@@ -0,0 +1,272 @@
+"""
+Compact columnar container for generated transactions.
+
+A TransactionBatch stores one value per row in small NumPy arrays: integer
+codes into shared dictionaries for the categorical fields (branch, type,
+sentiment, review), int16 times, a float32 score, the date as an ordinal
+and the arrival time as seconds after midnight. transaction_id and customer_id are derived from the branch,
+date, bulk flag and sequence number, so they are only materialized when a
+batch is converted to a DataFrame or an Arrow table.
+"""
+
+import datetime
+import functools
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow conversion is optional
+    pa = None
+
+# Sentiment categories in code order
+SENTIMENTS = ['negative', 'neutral', 'positive']
+
+# Per-row arrays and their storage types
+ARRAY_DTYPES = {
+    'branch_ids': np.int32,
+    'date_ordinals': np.int32,
+    'arrival_seconds': np.int32,  # Arrival time of day, seconds after midnight
+    'is_bulk': np.bool_,
+    'sequence': np.int32,
+    'type_codes': np.int8,
+    'waiting_time': np.int16,
+    'processing_time': np.int16,
+    'transaction_time': np.int16,
+    'sentiment_codes': np.int8,
+    'sentiment_score': np.float32,
+    'review_ids': np.int16,  # -1 = no review text
+}
+
+
+# Days between 0001-01-01 (ordinal 1) and the Unix epoch
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=1)
+def clock_strings() -> np.ndarray:
+    """HH:MM:SS for every second of the day (built once)"""
+    return np.array([f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}" for second in range(86400)],
+                    dtype=object)
+
+
+def clock_seconds(timestamp: str) -> int:
+    """Seconds after midnight of a 'YYYY-MM-DD HH:MM:SS' timestamp"""
+    hours, minutes, seconds = timestamp[11:19].split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def unify_dictionaries(dictionaries: List[List[str]], codes: List[np.ndarray]) -> tuple:
+    """Merge per-batch dictionaries into one and remap each batch's codes onto it"""
+    merged = dictionaries[0]
+    if all(d is merged or d == merged for d in dictionaries[1:]):
+        return merged, codes
+
+    merged = list(dict.fromkeys(name for d in dictionaries for name in d))
+    position = {name: i for i, name in enumerate(merged)}
+    remapped = []
+    for d, c in zip(dictionaries, codes):
+        lookup = np.array([position[name] for name in d] + [-1], dtype=c.dtype)
+        remapped.append(lookup[c])  # Code -1 maps to the trailing -1
+    return merged, remapped
+
+
+class TransactionBatch:
+    __slots__ = tuple(ARRAY_DTYPES) + ('branch_names', 'transaction_types', 'review_texts')
+
+    def __init__(self, branch_names: List[str], transaction_types: List[str], review_texts: List[str],
+                 **arrays: np.ndarray):
+        """
+        Initialize a batch from per-row arrays
+
+        Args:
+            branch_names: Dictionary for branch_ids
+            transaction_types: Dictionary for type_codes
+            review_texts: Dictionary for review_ids
+            **arrays: One array per ARRAY_DTYPES entry, all of the same length
+        """
+        self.branch_names = branch_names
+        self.transaction_types = transaction_types
+        self.review_texts = review_texts
+        for name, dtype in ARRAY_DTYPES.items():
+            setattr(self, name, np.asarray(arrays[name], dtype=dtype))
+
+    def __len__(self) -> int:
+        return len(self.branch_ids)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Per-row arrays by name"""
+        return {name: getattr(self, name) for name in ARRAY_DTYPES}
+
+    def with_arrays(self, arrays: Dict[str, np.ndarray]) -> "TransactionBatch":
+        """New batch sharing this batch's dictionaries"""
+        return TransactionBatch(self.branch_names, self.transaction_types, self.review_texts, **arrays)
+
+    def slice(self, start: int, stop: int) -> "TransactionBatch":
+        """Rows [start, stop) as views of this batch's arrays"""
+        return self.with_arrays({name: array[start:stop] for name, array in self.arrays().items()})
+
+    def take(self, indices: np.ndarray) -> "TransactionBatch":
+        """Rows in the given order"""
+        return self.with_arrays({name: array[indices] for name, array in self.arrays().items()})
+
+    @classmethod
+    def empty(cls, branch_names: List[str], transaction_types: List[str], review_texts: List[str]) -> "TransactionBatch":
+        """Batch with no rows"""
+        return cls(branch_names, transaction_types, review_texts,
+                   **{name: np.zeros(0, dtype=dtype) for name, dtype in ARRAY_DTYPES.items()})
+
+    @classmethod
+    def concat(cls, batches: Sequence["TransactionBatch"]) -> "TransactionBatch":
+        """Concatenate batches, merging their dictionaries if they differ"""
+        first = batches[0]
+        if len(batches) == 1:
+            return first
+
+        arrays = {name: [getattr(b, name) for b in batches] for name in ARRAY_DTYPES}
+        branch_names, arrays['branch_ids'] = unify_dictionaries([b.branch_names for b in batches],
+                                                                arrays['branch_ids'])
+        transaction_types, arrays['type_codes'] = unify_dictionaries([b.transaction_types for b in batches],
+                                                                     arrays['type_codes'])
+        review_texts, arrays['review_ids'] = unify_dictionaries([b.review_texts for b in batches],
+                                                                arrays['review_ids'])
+
+        return cls(branch_names, transaction_types, review_texts,
+                   **{name: np.concatenate(parts) for name, parts in arrays.items()})
+
+    @classmethod
+    def from_records(cls, records: List[Dict], branch_names: List[str], transaction_types: List[str],
+                     review_texts: List[str]) -> "TransactionBatch":
+        """Encode transaction dicts (the scalar path's output) into a batch"""
+        branch_index = {name: i for i, name in enumerate(branch_names)}
+        type_index = {name: i for i, name in enumerate(transaction_types)}
+        review_index = {text: i for i, text in enumerate(review_texts)}
+        sentiment_index = {name: i for i, name in enumerate(SENTIMENTS)}
+        date_index = {}
+
+        for record in records:
+            if record['date'] not in date_index:
+                date_index[record['date']] = datetime.date.fromisoformat(record['date']).toordinal()
+
+        return cls(
+            branch_names, transaction_types, review_texts,
+            branch_ids=[branch_index[r['branch_name']] for r in records],
+            date_ordinals=[date_index[r['date']] for r in records],
+            arrival_seconds=[clock_seconds(r['timestamp']) for r in records],
+            is_bulk=[r['customer_id'][0] == 'B' for r in records],
+            sequence=[int(r['customer_id'][1:]) for r in records],
+            type_codes=[type_index[r['transaction_type']] for r in records],
+            waiting_time=[r['waiting_time'] for r in records],
+            processing_time=[r['processing_time'] for r in records],
+            transaction_time=[r['transaction_time'] for r in records],
+            sentiment_codes=[sentiment_index[r['sentiment']] for r in records],
+            sentiment_score=[r['sentiment_score'] for r in records],
+            review_ids=[review_index.get(r['review_text'], -1) for r in records]
+        )
+
+    def date_strings(self) -> tuple:
+        """Distinct dates as YYYY-MM-DD strings and each row's index into them"""
+        ordinals, inverse = np.unique(self.date_ordinals, return_inverse=True)
+        dates = [datetime.date.fromordinal(int(o)).strftime('%Y-%m-%d') for o in ordinals]
+        return dates, inverse
+
+    def timestamps(self, row_dates: np.ndarray) -> List[str]:
+        """Materialize 'YYYY-MM-DD HH:MM:SS' arrival timestamps from each row's date string"""
+        clocks = clock_strings()[self.arrival_seconds]
+        return [f"{date} {clock}" for date, clock in zip(row_dates.tolist(), clocks.tolist())]
+
+    def epoch_seconds(self) -> np.ndarray:
+        """Arrival timestamps as seconds since the Unix epoch"""
+        return (self.date_ordinals.astype(np.int64) - EPOCH_ORDINAL) * 86400 + self.arrival_seconds
+
+    def ids(self, dates: List[str], date_inverse: np.ndarray) -> tuple:
+        """Materialize customer_id and transaction_id (BranchInitials + MMDD + B/N + number)"""
+        initials = np.array([name.replace(" ", "")[:3].upper() for name in self.branch_names] + [""], dtype=object)
+        month_days = np.array([d[5:7] + d[8:10] for d in dates] + [""], dtype=object)
+
+        customer_ids = [f"{'B' if bulk else 'N'}{number:03d}"
+                        for bulk, number in zip(self.is_bulk.tolist(), self.sequence.tolist())]
+        transaction_ids = [f"{initial}{month_day}{customer_id}" for initial, month_day, customer_id in
+                           zip(initials[self.branch_ids].tolist(), month_days[date_inverse].tolist(), customer_ids)]
+        return customer_ids, transaction_ids
+
+    def to_pandas(self, categorical: bool = False, review_text: bool = False) -> pd.DataFrame:
+        """
+        DataFrame with the generator's column layout (categoricals share the codes without copying)
+
+        review_id is always included; the review_text column is only joined in when review_text is set.
+        timestamp is a datetime64 column when categorical is set and a 'YYYY-MM-DD HH:MM:SS' string otherwise.
+        """
+        dates, date_inverse = self.date_strings()
+        customer_ids, transaction_ids = self.ids(dates, date_inverse)
+
+        if categorical:
+            branch = pd.Categorical.from_codes(self.branch_ids, categories=self.branch_names)
+            ttype = pd.Categorical.from_codes(self.type_codes, categories=self.transaction_types)
+            sentiment = pd.Categorical.from_codes(self.sentiment_codes, categories=SENTIMENTS)
+            date = pd.Categorical.from_codes(date_inverse, categories=dates)
+            timestamp = self.epoch_seconds().astype('datetime64[s]')
+        else:
+            branch = np.asarray(self.branch_names, dtype=object)[self.branch_ids]
+            ttype = np.asarray(self.transaction_types, dtype=object)[self.type_codes]
+            sentiment = np.asarray(SENTIMENTS, dtype=object)[self.sentiment_codes]
+            date = np.asarray(dates, dtype=object)[date_inverse]
+            timestamp = self.timestamps(date)
+
+        columns = {
+            'transaction_id': transaction_ids,
+            'customer_id': customer_ids,
+            'branch_name': branch,
+            'transaction_type': ttype,
+            'waiting_time': self.waiting_time,
+            'processing_time': self.processing_time,
+            'transaction_time': self.transaction_time,
+            'date': date,
+            'timestamp': timestamp,
+            'sentiment': sentiment,
+            'sentiment_score': np.round(self.sentiment_score.astype(np.float64), 2),
+            'review_id': self.review_ids
+        }
+        if review_text:
+            texts = list(self.review_texts) + [""]  # Id -1 (no review) picks the trailing ""
+            if categorical:
+                review_codes = np.where(self.review_ids < 0, len(self.review_texts), self.review_ids)
+                columns['review_text'] = pd.Categorical.from_codes(review_codes, categories=texts)
+            else:
+                columns['review_text'] = np.asarray(texts, dtype=object)[self.review_ids]
+        columns['bhs'] = np.full(len(self), "", dtype=object)
+
+        return pd.DataFrame(columns)
+
+    def to_arrow(self, review_text: bool = False) -> "pa.Table":
+        """Arrow table with dictionary-encoded categorical columns built directly from the codes"""
+        if pa is None:
+            raise ImportError("pyarrow is required for Arrow conversion (pip install pyarrow)")
+
+        dates, date_inverse = self.date_strings()
+        customer_ids, transaction_ids = self.ids(dates, date_inverse)
+
+        columns = {
+            'transaction_id': pa.array(transaction_ids, pa.string()),
+            'customer_id': pa.array(customer_ids, pa.string()),
+            'branch_name': pa.DictionaryArray.from_arrays(self.branch_ids, pa.array(self.branch_names, pa.string())),
+            'transaction_type': pa.DictionaryArray.from_arrays(self.type_codes,
+                                                               pa.array(self.transaction_types, pa.string())),
+            'waiting_time': self.waiting_time,
+            'processing_time': self.processing_time,
+            'transaction_time': self.transaction_time,
+            'date': pa.DictionaryArray.from_arrays(date_inverse.astype(np.int32), pa.array(dates, pa.string())),
+            'timestamp': pa.array(self.epoch_seconds(), pa.timestamp('s')),
+            'sentiment': pa.DictionaryArray.from_arrays(self.sentiment_codes, pa.array(SENTIMENTS, pa.string())),
+            'sentiment_score': self.sentiment_score,
+            'review_id': self.review_ids
+        }
+        if review_text:
+            review_codes = np.where(self.review_ids < 0, len(self.review_texts), self.review_ids).astype(np.int16)
+            texts = pa.array(list(self.review_texts) + [""], pa.string())
+            columns['review_text'] = pa.DictionaryArray.from_arrays(review_codes, texts)
+        columns['bhs'] = pa.array([""] * len(self), pa.string())
+
+        return pa.table(columns)
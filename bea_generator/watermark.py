@@ -0,0 +1,218 @@
+"""
+Date watermark manifest for Google Sheets uploads.
+
+DateManifest records, per worksheet, which dates have been committed and
+where they landed (first row, last row, row count). It is updated from the
+append responses as rows are written, saved to a small local JSON file
+after every write, and mirrored to a hidden metadata worksheet so other
+machines see the same watermark. The mirror wins over the local file up to
+its own watermark; local entries past it (rows not yet published) are kept,
+but only after one read of the date column confirms them, since the local
+file can outlive the sheet it describes. Checking for existing dates then
+reads a few KB instead of the whole sheet; when no manifest exists yet (or
+the local entries do not match), it is rebuilt from that same single-column
+read of the date column.
+
+The local file is kept per backend and spreadsheet, so runs against the
+fake backend and against Google Sheets never share one.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+import gspread
+from gspread.utils import rowcol_to_a1
+
+# Hidden worksheet that mirrors the manifest inside the spreadsheet
+MANIFEST_WORKSHEET = "_bpi_manifest"
+MANIFEST_COLUMNS = ['worksheet', 'date', 'first_row', 'last_row', 'rows']
+
+
+def manifest_path(sheet_id: str, backend: str = "sheets", directory: str = ".") -> str:
+    """Local manifest file for a spreadsheet on a backend ("sheets", or the fake backend's id)"""
+    return os.path.join(directory, f"bpi_manifest_{backend}_{sheet_id}.json")
+
+
+class DateManifest:
+    def __init__(self, path: str, spreadsheet=None, scheduler=None):
+        """
+        Initialize the manifest
+
+        Args:
+            path: Local JSON file
+            spreadsheet: gspread Spreadsheet holding the hidden mirror (None = local file only)
+            scheduler: WriteScheduler for the mirror's API calls (None = call the API directly)
+        """
+        self.path = path
+        self.spreadsheet = spreadsheet
+        self.scheduler = scheduler
+        self.entries: Dict[str, Dict[str, Dict[str, int]]] = self.load_local()  # worksheet -> date -> entry
+        self.loaded = set()  # Worksheets already compared with the mirror
+        self.unconfirmed: Dict[str, Set[str]] = {}  # worksheet -> dates only the local file knows about
+
+    def call(self, fn, *args, **kwargs):
+        """Run an API call through the scheduler (if any)"""
+        if self.scheduler is None:
+            return fn(*args, **kwargs)
+        return self.scheduler.run(fn, *args, **kwargs)
+
+    def dates(self, worksheet: str) -> set:
+        """Dates committed to a worksheet"""
+        return set(self.entries.get(worksheet, {}))
+
+    @staticmethod
+    def watermark(dates: Dict[str, Dict[str, int]]) -> int:
+        """Last row covered by a worksheet's entries (0 if none)"""
+        return max((entry['last_row'] for entry in dates.values()), default=0)
+
+    def record(self, worksheet: str, first_row: int, dates: List[str]):
+        """Record rows written at first_row onward (one date string per row) and save the local file"""
+        entries = self.entries.setdefault(worksheet, {})
+        for offset, date in enumerate(dates):
+            row = first_row + offset
+            entry = entries.get(date)
+            if entry is None:
+                entries[date] = {'first_row': row, 'last_row': row, 'rows': 1}
+            else:
+                entry['first_row'] = min(entry['first_row'], row)
+                entry['last_row'] = max(entry['last_row'], row)
+                entry['rows'] += 1
+        self.save_local()
+
+    def reset(self, worksheet: str):
+        """Forget a worksheet's dates (after it has been cleared)"""
+        self.entries[worksheet] = {}
+        self.unconfirmed[worksheet] = set()
+        self.loaded.add(worksheet)
+        self.save_local()
+
+    def save_local(self):
+        """Write the local JSON file atomically"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'worksheets': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def load_local(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Entries from the local JSON file ({} if it does not exist)"""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f).get('worksheets', {})
+
+    def load_remote(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Entries from the hidden metadata worksheet ({} if it does not exist)"""
+        if self.spreadsheet is None:
+            return {}
+        try:
+            rows = self.call(self.call(self.spreadsheet.worksheet, MANIFEST_WORKSHEET).get_all_values)
+        except gspread.WorksheetNotFound:
+            return {}
+
+        entries = {}
+        for row in rows[1:]:
+            if len(row) < len(MANIFEST_COLUMNS) or not row[0]:
+                continue
+            worksheet, date, first_row, last_row, count = row[:len(MANIFEST_COLUMNS)]
+            entries.setdefault(worksheet, {})[date] = {
+                'first_row': int(first_row), 'last_row': int(last_row), 'rows': int(count)}
+        return entries
+
+    def load(self, worksheet: str) -> bool:
+        """Reconcile a worksheet's entries with the mirror once; False if neither has any"""
+        if worksheet not in self.loaded:
+            remote = self.load_remote().get(worksheet, {})
+            local = self.entries.get(worksheet, {})
+            merged = self.reconcile(remote, local)
+            if merged != local:
+                self.entries[worksheet] = merged
+                self.save_local()
+            self.unconfirmed[worksheet] = {date for date, entry in merged.items() if remote.get(date) != entry}
+            self.loaded.add(worksheet)
+        return bool(self.entries.get(worksheet))
+
+    @classmethod
+    def reconcile(cls, remote: Dict[str, Dict[str, int]],
+                  local: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+        """
+        Entries up to the mirror's watermark come from the mirror, which every machine shares; local entries
+        only add rows past it (written here but not yet published), so the watermark is the max of the two
+        """
+        remote_watermark = cls.watermark(remote)
+        merged = {date: dict(entry) for date, entry in remote.items()}
+        for date, entry in local.items():
+            if entry['last_row'] <= remote_watermark:
+                continue
+            known = merged.get(date)
+            if known is None:
+                merged[date] = dict(entry)
+            else:
+                merged[date] = {'first_row': min(known['first_row'], entry['first_row']),
+                                'last_row': entry['last_row'], 'rows': max(known['rows'], entry['rows'])}
+        return merged
+
+    def read_dates(self, worksheet, date_column: str = 'date') -> Optional[List[str]]:
+        """Date of every data row (row 2 onward) from the header row and one single-column range read"""
+        header = self.call(worksheet.get, 'A1:Z1')
+        if header and date_column not in header[0]:
+            return None
+
+        values = []  # An empty worksheet has no dates
+        if header:
+            column = rowcol_to_a1(1, header[0].index(date_column) + 1)[:-1]  # Column letters only
+            values = self.call(worksheet.get, f"{column}2:{column}")
+        return [cell[0] if cell else "" for cell in values]
+
+    def verify(self, worksheet: str, dates: List[str]) -> bool:
+        """Whether every unconfirmed entry's first and last row hold its date in the sheet's date column"""
+        for date in self.unconfirmed.get(worksheet, ()):
+            entry = self.entries[worksheet][date]
+            if entry['last_row'] - 2 >= len(dates) or \
+                    dates[entry['first_row'] - 2] != date or dates[entry['last_row'] - 2] != date:
+                return False
+        self.unconfirmed[worksheet] = set()
+        return True
+
+    def replace(self, worksheet: str, dates: List[str]):
+        """Replace a worksheet's entries with those of its date column (see read_dates)"""
+        entries = self.entries[worksheet] = {}
+        for offset, date in enumerate(dates):
+            if date:
+                row = offset + 2
+                entry = entries.setdefault(date, {'first_row': row, 'last_row': row, 'rows': 0})
+                entry['last_row'] = row
+                entry['rows'] += 1
+
+        self.unconfirmed[worksheet] = set()
+        self.loaded.add(worksheet)
+        self.save_local()
+
+    def rebuild(self, worksheet, date_column: str = 'date') -> bool:
+        """Rebuild a worksheet's entries from its date column; False if it has none"""
+        dates = self.read_dates(worksheet, date_column)
+        if dates is None:
+            return False
+        self.replace(worksheet.title, dates)
+        return True
+
+    def publish(self):
+        """Mirror the manifest to the hidden metadata worksheet"""
+        if self.spreadsheet is None:
+            return
+
+        try:
+            mirror = self.call(self.spreadsheet.worksheet, MANIFEST_WORKSHEET)
+        except gspread.WorksheetNotFound:
+            mirror = self.call(self.spreadsheet.add_worksheet, title=MANIFEST_WORKSHEET, rows=1000,
+                               cols=len(MANIFEST_COLUMNS))
+            self.call(mirror.hide)
+
+        # Keep the mirror's entries for worksheets this manifest has never seen
+        entries = {**self.load_remote(), **self.entries}
+        rows = [[worksheet, date, entry['first_row'], entry['last_row'], entry['rows']]
+                for worksheet, dates in sorted(entries.items())
+                for date, entry in sorted(dates.items())]
+        self.call(mirror.clear)
+        self.call(mirror.append_rows, [MANIFEST_COLUMNS] + rows, value_input_option='RAW',
+                  insert_data_option='INSERT_ROWS', table_range='A1')
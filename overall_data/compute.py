@@ -6,12 +6,28 @@ import datetime
 import numpy as np
 from typing import Dict, List, Tuple
 import re
+import os
+import sys
+
+if not __package__:
+    # Run as a script (cd overall_data && python compute.py): make the repository root importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Shared helpers live next to the generator
+from bea_generator.fake_sheets import client_from_env
+from bea_generator.branch_profiles import CAPACITY_STANDARDS
+from bea_generator.calendar_table import CalendarTable, load_holidays
+
+# Public holidays used by the generator's calendar
+HOLIDAYS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bea_generator', 'ph_holidays.csv')
 
 
 class BPIBranchHealthCalculator:
-    def __init__(self, sheet_id: str, credentials_path: str):
+    def __init__(self, sheet_id: str, credentials_path: str, transactions_path: str = None, sheets_client=None,
+                 holidays_path: str = HOLIDAYS_PATH):
         self.sheet_id = sheet_id
-        self.gc = None
+        self.gc = sheets_client  # Ready gspread-compatible client (e.g. FakeSheetsClient) skips credentials
+        self.transactions_path = transactions_path  # Optional Parquet dataset written by the generator
         self.branch_mapping = {}  # Will store mapping between different branch name formats
 
         # Strict Service Standards (in minutes) - More demanding for better score distribution
@@ -33,17 +49,17 @@ class BPIBranchHealthCalculator:
             'max_transaction_time': 9.0  # Maximum combined transaction time for excellent score
         }
 
-        # Branch capacity standards
-        self.capacity_standards = {
-            'normal_day': 190,
-            'peak_day': 310,
-            'regular_branch_bea': 4,  # Business Executive Associates per branch
-        }
+        # Branch capacity standards (shared with the generator's queue model)
+        self.capacity_standards = dict(CAPACITY_STANDARDS)
+
+        # Per-date peak and holiday flags, looked up by array index (same calendar as the generator)
+        self.calendar = CalendarTable(load_holidays(holidays_path) if os.path.exists(holidays_path) else None)
 
         # Randomized financial performance per branch (simulating real variations)
         self.branch_financial_scores = {}  # Will store branch-specific financial scores
 
-        self.setup_sheets_connection(credentials_path)
+        if self.gc is None:
+            self.setup_sheets_connection(credentials_path)
 
     def setup_sheets_connection(self, credentials_path: str):
         """Setup Google Sheets API connection"""
@@ -185,7 +201,10 @@ class BPIBranchHealthCalculator:
         return min(1.0, weighted_similarity)  # Cap at 1.0
 
     def fetch_transaction_data(self) -> pd.DataFrame:
-        """Fetch transaction data from Sheet1"""
+        """Fetch transaction data from Sheet1 (or the Parquet dataset when transactions_path is set)"""
+        if self.transactions_path:
+            return self.fetch_transaction_data_from_parquet()
+
         try:
             sheet = self.gc.open_by_key(self.sheet_id)
             worksheet = sheet.worksheet("Sheet1")
@@ -220,6 +239,26 @@ class BPIBranchHealthCalculator:
             print(f"❌ Error fetching transaction data: {e}")
             return pd.DataFrame()
 
+    def fetch_transaction_data_from_parquet(self) -> pd.DataFrame:
+        """Read only the columns the BHS calculation needs from a date-partitioned Parquet dataset"""
+        try:
+            # Columns are already typed (int16 times, float32 scores), so no to_numeric pass is needed
+            columns = ['branch_name', 'transaction_type', 'waiting_time', 'processing_time',
+                       'transaction_time', 'sentiment_score', 'date']
+            df = pd.read_parquet(self.transactions_path, columns=columns)
+
+            if not df.empty:
+                df['branch_name'] = df['branch_name'].astype(str)
+                df['transaction_type'] = df['transaction_type'].astype(str)
+                df['date'] = pd.to_datetime(df['date'].astype(str), errors='coerce')
+                print(f"📊 Loaded {len(df)} transactions from {self.transactions_path}")
+
+            return df
+
+        except Exception as e:
+            print(f"❌ Error reading Parquet transactions: {e}")
+            return pd.DataFrame()
+
     def fetch_main_sheet_structure(self) -> pd.DataFrame:
         """Fetch the structure and existing data from Main sheet"""
         try:
@@ -286,9 +325,7 @@ class BPIBranchHealthCalculator:
 
     def is_peak_day(self, date) -> bool:
         """Determine if a date is a peak day (same logic as generator)"""
-        weekday = date.weekday()  # Monday = 0, Sunday = 6
-        day = date.day
-        return weekday in [0, 4] or day in [15, 30]  # Mondays, Fridays, 15th, 30th
+        return bool(self.calendar.day(date)['is_peak'])
 
     def calculate_service_efficiency_score(self, branch_data: pd.DataFrame, branch_name: str) -> float:
         """Calculate strict service efficiency score for a branch"""
@@ -404,21 +441,24 @@ class BPIBranchHealthCalculator:
         if branch_data.empty:
             return 0.0
 
-        # Group by date to get daily volumes
-        daily_volumes = branch_data.groupby(branch_data['date'].dt.date).size()
+        # Group by date to get daily volumes and average times in one pass
+        daily = branch_data.groupby(branch_data['date'].dt.date).agg(
+            volume=('transaction_time', 'size'),
+            avg_total_time=('transaction_time', 'mean'),
+            avg_waiting_time=('waiting_time', 'mean'))
 
-        if daily_volumes.empty:
+        if daily.empty:
             return 0.0
 
-        capacity_scores = []
+        # Capacity standard per day from the calendar's peak flags
+        positions = self.calendar.index(daily.index)
+        is_peak = self.calendar.days['is_peak'][positions]
+        standards = np.where(is_peak, self.capacity_standards['peak_day'], self.capacity_standards['normal_day'])
 
-        for date, volume in daily_volumes.items():
-            is_peak = self.is_peak_day(date)
-            standard = self.capacity_standards['peak_day'] if is_peak else self.capacity_standards['normal_day']
+        capacity_scores = []
 
-            daily_data = branch_data[branch_data['date'].dt.date == date]
-            avg_total_time = daily_data['transaction_time'].mean()
-            avg_waiting_time = daily_data['waiting_time'].mean()
+        for volume, avg_total_time, avg_waiting_time, standard in zip(
+                daily['volume'], daily['avg_total_time'], daily['avg_waiting_time'], standards):
 
             # Strict capacity scoring
             if volume <= standard * 0.8:  # Low volume day (80% of standard or less)
@@ -800,9 +840,13 @@ def main():
 
     print("=== BPI Branch Health Score Calculator ===\n")
 
+    # Optional Parquet dataset from the generator instead of Sheet1
+    transactions_path = input("Enter Parquet transactions directory (press Enter to read Sheet1): ").strip()
+
     # Initialize calculator
     try:
-        calculator = BPIBranchHealthCalculator(SHEET_ID, CREDENTIALS_PATH)
+        calculator = BPIBranchHealthCalculator(SHEET_ID, CREDENTIALS_PATH, transactions_path or None,
+                                               sheets_client=client_from_env())  # BPI_FAKE_SHEETS=<db>
     except Exception as e:
         print(f"❌ Failed to initialize calculator: {e}")
         return